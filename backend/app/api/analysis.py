@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
+import numpy as np
 
 from ..core.database import get_db
 from ..crud import analysis as analysis_crud
+from ..services import wire_format
+from ..services.recent_readings import recent_readings_cache
+from ..services.live_alarms import live_alarm_engine, live_alarm_writer
+from ..services.live_analysis import live_analyzer
+from ..services.live_checkpoint import live_checkpoint
+from ..services.live_bus import live_role
+from ..services.live_fanout import live_fanout
+from ..services.live_history import live_history_writer
+from ..services.live_metrics import live_loop_lag, live_tick_timings
+from ..services.live_subscriptions import live_subscriptions
 from .. import schemas
 
 router = APIRouter(
@@ -44,4 +55,86 @@ def get_process_distribution(
         db,
         metric=metric
     )
-    return {"data": distribution} 
\ No newline at end of file
+    return {"data": distribution} 
+
+@router.get("/recent-measurements", summary="모델/캠별 최근 측정값 조회")
+def get_recent_measurements(
+    model_name: str = Query(..., description="모델명"),
+    cam_number: int = Query(..., description="캠 번호"),
+    metric: str = Query(..., regex="^(angle|torque)$", description="측정 항목 (angle 또는 torque)"),
+    limit: Optional[int] = Query(None, ge=1, le=100000, description="최근 N 개만 조회"),
+    start_date: Optional[str] = Query(None, description="조회 시작 시각 (ISO 8601)"),
+    end_date: Optional[str] = Query(None, description="조회 종료 시각 (ISO 8601, 미포함)"),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
+    db: Session = Depends(get_db)
+):
+    """
+    지정된 모델/캠/측정 항목의 최근 측정값을 반환합니다.
+    요청 구간이 메모리 캐시(최근 측정값 링 버퍼) 안에 있으면 DB 를 조회하지 않으며,
+    source 필드로 응답 출처(memory 또는 database)를 알려줍니다.
+    """
+    try:
+        # 측정 시각은 시간대 정보 없이 저장되어 있으므로 시간대 정보는 제거하여 비교
+        start = datetime.fromisoformat(start_date.replace('Z', '+00:00')).replace(tzinfo=None) if start_date else None
+        end = datetime.fromisoformat(end_date.replace('Z', '+00:00')).replace(tzinfo=None) if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+
+    source, readings = recent_readings_cache.window(db, model_name, cam_number, metric, start, end, limit)
+
+    response = {
+        "model_name": model_name,
+        "cam_number": cam_number,
+        "metric": metric,
+        "source": source,
+        "count": len(readings["id"]),
+        "data": [
+            {
+                "id": reading_id,
+                "timestamp": timestamp.isoformat() if timestamp else None,
+                "value": value,
+                "allowance": None if np.isnan(allowance) else allowance
+            }
+            for reading_id, timestamp, value, allowance in zip(
+                readings["id"].tolist(), readings["timestamp"].tolist(),
+                readings["value"].tolist(), readings["allowance"].tolist()
+            )
+        ]
+    }
+    if output_format != "json":
+        return wire_format.encoded_response(response, output_format, "data")
+    return response
+
+@router.get("/recent-measurements/stats", summary="최근 측정값 캐시 상태")
+def get_recent_measurements_cache_stats():
+    return recent_readings_cache.stats()
+
+
+@router.get("/live/stats", summary="실시간 분석 엔진 상태")
+def get_live_analysis_stats():
+    return {
+        **live_analyzer.stats(),
+        "subscriptions": live_subscriptions.stats(),
+        "fanout": live_fanout.stats(),
+        "worker": live_role.stats(),
+        "history": live_history_writer.stats(),
+        "alarms": {**live_alarm_engine.stats(), "writer": live_alarm_writer.stats()},
+        "tick": live_tick_timings.stats(),
+        "loop_lag": live_loop_lag.stats(),
+        "checkpoint": live_checkpoint.stats()
+    }
+
+
+@router.get("/alarms", summary="최근 알람 조회")
+def get_recent_alarms(
+    cam_number: Optional[int] = Query(None, description="캠 번호 (미지정 시 전체)"),
+    limit: int = Query(100, ge=1, le=1000, description="최대 조회 건수"),
+    db: Session = Depends(get_db)
+):
+    """
+    실시간 알람 엔진이 HANDY_ALARMS 에 저장한 알람을 최신순으로 반환하고, 현재 발생 중인 알람 목록을 함께 반환합니다.
+    """
+    return {
+        "data": analysis_crud.get_recent_alarms(db, cam_number=cam_number, limit=limit),
+        "active": live_alarm_engine.active()
+    }
@@ -1,18 +1,35 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional, Dict, Any
+from sqlalchemy import text, func, bindparam
+from typing import List, Optional, Dict, Any, Union
 from datetime import date, datetime, timedelta
 from pydantic import BaseModel
 import re
+import os
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
 import numpy as np
-from statistics import mean, stdev
 import scipy.stats as stats
 
-from ..core.database import get_db
+from ..core.database import get_db, SessionLocal
 from ..models.analysis import CamMeasurement, DistributionAnalysis, Product
 from ..models.handy_raw import HandyRawData, HandyColumnMapper
 from ..crud import analysis as analysis_crud
+from ..services import backtest_engine
+from ..services.result_cache import backtest_cache
+from ..services import wire_format
+from ..services.streaming_stats import SlidingWindowStats, finite_mean_std
+from ..services.backtest_state import IncrementalBacktestState, backtest_state_store
+from ..services.phase_angle_backtest import PhaseAngleBacktestState, PhaseAngleMetricsAccumulator, parse_angle_column
+from ..services.stage_timing import StageTimer, stage_metrics, timed_stage
+from ..services.detectors import ControlChartDetector, create_detector
+from ..services.multivariate import DEFAULT_T2_ALPHA, RollingCovariance, hotelling_t2_limit
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/backtest",
@@ -27,10 +44,17 @@ class BacktestParameters(BaseModel):
     window_size: int = 100  # Z-Score 계산을 위한 윈도우 크기
     z_threshold: float = 3.0  # 불량 판정 임계값
     prediction_horizon: int = 10  # 몇 개 데이터 앞까지 예측할지
+    include_diagnostics: bool = False  # 캠별 전체 데이터 개수 등 진단 정보 포함 여부
+    detector: str = "zscore"  # 불량 예측 방식: zscore (이동 윈도우), ewma, cusum (관리도)
+    ewma_lambda: float = 0.2  # EWMA 평활 계수 (0 < λ <= 1)
+    ewma_limit: float = 3.0  # EWMA 관리 한계 (시그마 배수)
+    cusum_k: float = 0.5  # CUSUM 허용량 (시그마 단위)
+    cusum_h: float = 5.0  # CUSUM 결정 구간 (시그마 단위)
 
 class BacktestResult(BaseModel):
     cam_number: int
     metric: str
+    detector: str = "zscore"
     accuracy: float
     precision: float
     recall: float
@@ -54,6 +78,27 @@ class BacktestDetail(BaseModel):
     predicted_defects: List[bool]
     actual_defects: List[bool]
     z_scores: List[float]
+    detector_statistics: Optional[List[float]] = None  # ewma/cusum 검출기 통계량
+
+class SweepRange(BaseModel):
+    """파라미터 스윕 범위 (start 이상 stop 이하, step 간격)"""
+    start: float
+    stop: float
+    step: float
+
+class BacktestSweepParameters(BaseModel):
+    """백테스팅 파라미터 스윕 요청 (각 항목은 값 목록 또는 범위)"""
+    start_date: str
+    end_date: str
+    cam_numbers: List[int]
+    metrics: List[str]  # ["angle", "torque"]
+    window_sizes: Union[List[int], SweepRange] = [100]
+    z_thresholds: Union[List[float], SweepRange] = [3.0]
+    prediction_horizons: Union[List[int], SweepRange] = [10]
+    top_n: int = 5  # F1 기준 상위 조합 개수
+    include_diagnostics: bool = False  # 캠별 전체 데이터 개수 등 진단 정보 포함 여부
+
+MAX_SWEEP_COMBINATIONS = 2000
 
 class ModelBacktestParameters(BaseModel):
     """모델별 실시간 백테스팅 파라미터"""
@@ -62,6 +107,22 @@ class ModelBacktestParameters(BaseModel):
     z_threshold: float = 2.0
     prediction_horizon: int = 10
     max_records: int = 1000  # 최대 처리할 레코드 수
+    detector: str = "none"  # 변화 감지 검출기: none, ewma, cusum (행별 위상각 평균 감시, 처음 window_size 행이 기준 구간)
+    ewma_lambda: float = 0.2  # EWMA 평활 계수 (0 < λ <= 1)
+    ewma_limit: float = 3.0  # EWMA 관리 한계 (시그마 배수)
+    cusum_k: float = 0.5  # CUSUM 허용량 (시그마 단위)
+    cusum_h: float = 5.0  # CUSUM 결정 구간 (시그마 단위)
+    multivariate: bool = False  # True 이면 6개 위상각 벡터의 Hotelling T² 도 계산 (위상각 간 상관관계 반영)
+    t2_alpha: float = DEFAULT_T2_ALPHA  # T² 관리 한계의 유의수준
+
+class ChunkedModelBacktestParameters(ModelBacktestParameters):
+    """청크 단위(out-of-core) 모델 백테스팅 파라미터"""
+    max_records: Optional[int] = None  # None 이면 전체 이력 처리
+    start_date: Optional[str] = None  # YYYY-MM-DD
+    end_date: Optional[str] = None  # YYYY-MM-DD
+    chunk_rows: int = 10000  # DB 커서에서 한 번에 가져올 행 수
+    downsample_every: int = 1  # N 개 포인트마다 하나씩 전송
+    include_series: bool = True  # False 이면 요약 지표만 전송
 
 class PhaseAngleData(BaseModel):
     """6개 위상각 데이터"""
@@ -79,6 +140,10 @@ class PhaseAngleData(BaseModel):
     ppm_slope: Optional[float] = None
     quality_status: str = "UNKNOWN"  # OK, WARNING, CRITICAL, UNKNOWN
     defect_probability: float = 0.0  # 0-1 확률
+    drift_statistic: Optional[float] = None  # 변화 감지 검출기 통계량 (detector 사용 시)
+    drift_signal: Optional[bool] = None  # 변화 감지 신호 (detector 사용 시)
+    t2_statistic: Optional[float] = None  # Hotelling T² (multivariate 사용 시)
+    t2_signal: Optional[bool] = None  # T² 관리 한계 초과 여부 (multivariate 사용 시)
 
 class ModelBacktestResult(BaseModel):
     """모델별 실시간 백테스팅 결과"""
@@ -89,18 +154,124 @@ class ModelBacktestResult(BaseModel):
     performance_metrics: Dict[str, float]
     processing_info: Dict[str, Any]
 
+def get_measurement_watermark(db: Session):
+    """가공 데이터(HANDY_PRODUCTS)의 최대 ID/타임스탬프를 워터마크로 반환합니다."""
+    max_id, max_timestamp = db.query(func.max(Product.id), func.max(Product.timestamp)).one()
+    return [max_id, max_timestamp.isoformat() if max_timestamp else None]
+
+def get_raw_data_watermark(db: Session, model_name: str):
+    """모델별 원본 데이터(HANDY_ZSCORE_RAW_DATA)의 최대 ID를 워터마크로 반환합니다."""
+    return db.execute(
+        text("SELECT MAX(id) AS max_id FROM HANDY_ZSCORE_RAW_DATA WHERE d001 = :model_name"),
+        {"model_name": model_name}
+    ).scalar()
+
+def cached_response(
+    cache_key: str,
+    watermark,
+    compute,
+    use_cache: bool = True,
+    fmt: str = "json",
+    table_key: Optional[str] = None,
+    timer: Optional[StageTimer] = None
+) -> Response:
+    """
+    캐시에 같은 파라미터/워터마크/포맷의 결과가 있으면 그대로 반환하고,
+    없으면 compute() 결과를 요청 포맷으로 직렬화하여 캐시에 저장한 뒤 반환합니다.
+    table_key 는 columnar/msgpack/arrow 포맷에서 필드별 배열로 변환할 레코드 목록의 키입니다.
+    timer 가 주어지면 직렬화(serialize) 시간을 더해 Server-Timing 헤더로 반환하고 메트릭에 기록합니다.
+    """
+    cache_key = f"{fmt}|{cache_key}"
+    media_type = wire_format.MEDIA_TYPES[fmt]
+    if use_cache:
+        payload = backtest_cache.get(cache_key, watermark)
+        if payload is not None:
+            headers = {"X-Cache": "HIT"}
+            if timer is not None:
+                headers["Server-Timing"] = timer.server_timing_header()
+                timer.finish("cache_hit")
+            return Response(content=payload, media_type=media_type, headers=headers)
+
+    result = compute()
+    with timed_stage(timer, "serialize"):
+        payload, media_type = wire_format.encode_payload(result, fmt, table_key)
+    if use_cache:
+        backtest_cache.put(cache_key, watermark, payload)
+    headers = {"X-Cache": "MISS"}
+    if timer is not None:
+        headers["Server-Timing"] = timer.server_timing_header()
+        timer.finish("computed")
+        logger.info("%s backtest timing: %s", timer.endpoint, timer.as_dict())
+    return Response(content=payload, media_type=media_type, headers=headers)
+
+@router.get("/cache/stats", summary="백테스팅 결과 캐시 통계")
+def get_backtest_cache_stats():
+    """백테스팅 결과 캐시의 항목 수, 사용 바이트, 적중률을 반환합니다."""
+    return backtest_cache.stats()
+
+@router.delete("/cache", summary="백테스팅 결과 캐시 비우기")
+def clear_backtest_cache():
+    """백테스팅 결과 캐시를 모두 비웁니다."""
+    backtest_cache.clear()
+    return {"message": "Backtest cache cleared"}
+
+@router.get("/metrics", summary="백테스팅 단계별 소요 시간 메트릭")
+def get_backtest_metrics():
+    """엔드포인트별 요청 수와 단계(query, fetch, parse, compute, serialize)별 평균/최대 소요 시간을 반환합니다."""
+    return {
+        "endpoints": stage_metrics.snapshot(),
+        "cache": backtest_cache.stats()
+    }
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse, summary="백테스팅 메트릭 (Prometheus 형식)")
+def get_backtest_metrics_prometheus():
+    """단계별 소요 시간 히스토그램과 결과 캐시 지표를 Prometheus 텍스트 형식으로 반환합니다."""
+    cache = backtest_cache.stats()
+    return stage_metrics.prometheus_text([
+        ("backtest_cache_entries", "gauge", "Backtest result cache entries", cache["entries"]),
+        ("backtest_cache_bytes", "gauge", "Backtest result cache size in bytes", cache["bytes"]),
+        ("backtest_cache_hits_total", "counter", "Backtest result cache hits", cache["hits"]),
+        ("backtest_cache_misses_total", "counter", "Backtest result cache misses", cache["misses"])
+    ])
+
 @router.post("/run", summary="백테스팅 실행")
 def run_backtest(
     params: BacktestParameters,
+    use_cache: bool = Query(True, description="결과 캐시 사용 여부"),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
     db: Session = Depends(get_db)
 ):
     """
     지정된 기간과 파라미터로 백테스팅을 실행합니다.
+    같은 파라미터의 결과는 새 데이터가 적재되기 전까지 캐시에서 반환됩니다.
     """
+    timer = StageTimer("run")
+    return cached_response(
+        backtest_cache.make_key("run", params.dict()),
+        get_measurement_watermark(db),
+        lambda: compute_backtest(params, db, timer),
+        use_cache,
+        output_format,
+        "results",
+        timer
+    )
+
+def compute_backtest(params: BacktestParameters, db: Session, timer: Optional[StageTimer] = None):
+    """백테스팅을 실제로 수행합니다. processing_info.timing_ms 에 단계별 소요 시간을 담습니다."""
+    timer = timer or StageTimer("run")
+    validate_detector_params(params, params.window_size)
     results = []
     debug_info = []
     
-    print(f"백테스팅 파라미터: {params}")
+    # 모든 캠의 측정값을 단일 쿼리로 조회
+    measurement_columns = analysis_crud.get_measurement_columns(
+        db, params.cam_numbers, params.start_date, params.end_date, timer
+    )
+    with timer.stage("query"):
+        total_counts = (
+            analysis_crud.get_measurement_counts_by_cam(db, params.cam_numbers)
+            if params.include_diagnostics else None
+        )
     
     for cam_number in params.cam_numbers:
         for metric in params.metrics:
@@ -111,25 +282,26 @@ def run_backtest(
                 "required_minimum": params.window_size + params.prediction_horizon,
                 "status": "processing"
             }
+            if total_counts is not None:
+                debug_entry["total_cam_measurements"] = total_counts.get(cam_number, 0)
+                debug_entry["rows_in_range"] = len(measurement_columns[cam_number]["timestamp"])
             
             try:
-                # 해당 캠과 메트릭의 측정 데이터 조회
-                measurements_data = get_measurement_data_with_timestamps(
-                    db, cam_number, metric, params.start_date, params.end_date
-                )
+                values, allowances = analysis_crud.metric_series(measurement_columns[cam_number], metric)
                 
-                debug_entry["data_count"] = len(measurements_data)
-                print(f"CAM {cam_number}, {metric}: {len(measurements_data)}개 데이터 조회됨")
+                debug_entry["data_count"] = len(values)
                 
-                if len(measurements_data) < params.window_size + params.prediction_horizon:
-                    debug_entry["status"] = f"insufficient_data (need {params.window_size + params.prediction_horizon}, got {len(measurements_data)})"
+                if len(values) < params.window_size + params.prediction_horizon:
+                    debug_entry["status"] = f"insufficient_data (need {params.window_size + params.prediction_horizon}, got {len(values)})"
                     debug_info.append(debug_entry)
                     continue
                     
-                # 백테스팅 수행
-                result = perform_backtest_improved(
-                    measurements_data, params.window_size, params.z_threshold, params.prediction_horizon
-                )
+                # 백테스팅 수행 (allowance 가 NaN 이면 기본 허용 오차 사용)
+                with timer.stage("compute"):
+                    result = perform_backtest_arrays(
+                        values, allowances, params.window_size, params.z_threshold, params.prediction_horizon,
+                        build_detector(params, params.window_size)
+                    )
                 
                 debug_entry["status"] = "success"
                 debug_info.append(debug_entry)
@@ -137,164 +309,247 @@ def run_backtest(
                 results.append(BacktestResult(
                     cam_number=cam_number,
                     metric=metric,
+                    detector=params.detector,
                     **result
                 ))
                 
             except Exception as e:
                 debug_entry["status"] = f"error: {str(e)}"
                 debug_info.append(debug_entry)
-                print(f"CAM {cam_number}, {metric}에서 오류 발생: {e}")
+                logger.warning("CAM %s, %s에서 오류 발생: %s", cam_number, metric, e)
                 continue
     
     return {
         "results": results,
         "debug_info": debug_info,
         "total_combinations": len(params.cam_numbers) * len(params.metrics),
-        "successful_results": len(results)
+        "successful_results": len(results),
+        "processing_info": {"timing_ms": timer.as_dict()}
     }
 
-def get_measurement_data_with_timestamps(db: Session, cam_number: int, metric: str, start_date: str, end_date: str):
-    """지정된 기간의 측정 데이터를 timestamp와 함께 조회합니다."""
-    print(f"데이터 조회 시작: CAM {cam_number}, {metric}, {start_date} ~ {end_date}")
-    
-    # 먼저 전체 데이터 개수 확인
-    total_measurements = db.query(CamMeasurement).filter(
-        CamMeasurement.cam_number == cam_number
-    ).count()
-    print(f"CAM {cam_number}의 전체 측정 데이터: {total_measurements}개")
-    
-    # Product와 CamMeasurement를 조인하여 timestamp 기준으로 필터링
-    query = db.query(CamMeasurement, Product.timestamp).join(
-        Product, CamMeasurement.product_id == Product.id
-    ).filter(
-        CamMeasurement.cam_number == cam_number
+def expand_sweep_values(spec: Union[List[float], SweepRange], as_int: bool = False) -> List[float]:
+    """목록 또는 범위로 주어진 스윕 파라미터를 정렬된 값 목록으로 변환합니다."""
+    if isinstance(spec, SweepRange):
+        if spec.step <= 0:
+            raise HTTPException(status_code=400, detail="Sweep step must be positive")
+        count = int(np.floor((spec.stop - spec.start) / spec.step + 1e-9)) + 1
+        values = [spec.start + k * spec.step for k in range(max(count, 0))]
+    else:
+        values = list(spec)
+
+    if as_int:
+        values = [int(round(v)) for v in values]
+    else:
+        values = [round(float(v), 10) for v in values]
+    return sorted(set(values))
+
+@router.post("/sweep", summary="백테스팅 파라미터 스윕")
+def run_backtest_sweep(
+    params: BacktestSweepParameters,
+    use_cache: bool = Query(True, description="결과 캐시 사용 여부"),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
+    db: Session = Depends(get_db)
+):
+    """
+    window_size, z_threshold, prediction_horizon 의 모든 조합에 대해 백테스팅을 수행합니다.
+    캠/메트릭별 데이터는 한 번만 조회하고, 조합별 정밀도/재현율/F1 그리드를 반환합니다.
+    """
+    timer = StageTimer("sweep")
+    return cached_response(
+        backtest_cache.make_key("sweep", params.dict()),
+        get_measurement_watermark(db),
+        lambda: compute_backtest_sweep(params, db, timer),
+        use_cache,
+        output_format,
+        "results",
+        timer
     )
-    
-    # 조인 후 데이터 개수 확인
-    joined_count = query.count()
-    print(f"Product와 조인 후 데이터: {joined_count}개")
-    
-    # 날짜 필터링
-    if start_date:
-        start_datetime = datetime.strptime(start_date, '%Y-%m-%d')
-        query = query.filter(Product.timestamp >= start_datetime)
-        print(f"시작일 필터링 후: {query.count()}개")
-    
-    if end_date:
-        end_datetime = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
-        query = query.filter(Product.timestamp < end_datetime)
-        print(f"종료일 필터링 후: {query.count()}개")
-    
-    results = query.order_by(Product.timestamp).all()
-    print(f"최종 조회된 데이터: {len(results)}개")
-    
-    # 측정값과 타임스탬프를 함께 반환
-    measurements_data = []
-    valid_count = 0
-    null_count = 0
-    
-    for measurement, timestamp in results:
-        if metric == "angle" and measurement.angle_value is not None:
-            measurements_data.append({
-                'value': measurement.angle_value,
-                'timestamp': timestamp,
-                'measurement_id': measurement.id,
-                'allowance': measurement.allowance
-            })
-            valid_count += 1
-        elif metric == "torque" and measurement.torque_value is not None:
-            measurements_data.append({
-                'value': measurement.torque_value,
-                'timestamp': timestamp,
-                'measurement_id': measurement.id,
-                'allowance': measurement.allowance
-            })
-            valid_count += 1
-        else:
-            null_count += 1
-    
-    print(f"{metric} 메트릭의 유효한 데이터: {valid_count}개, NULL 데이터: {null_count}개")
-    
-    return measurements_data
+
+def compute_backtest_sweep(params: BacktestSweepParameters, db: Session, timer: Optional[StageTimer] = None):
+    """파라미터 스윕을 실제로 수행합니다."""
+    timer = timer or StageTimer("sweep")
+    window_sizes = expand_sweep_values(params.window_sizes, as_int=True)
+    z_thresholds = expand_sweep_values(params.z_thresholds)
+    prediction_horizons = expand_sweep_values(params.prediction_horizons, as_int=True)
+
+    if not window_sizes or not z_thresholds or not prediction_horizons:
+        raise HTTPException(status_code=400, detail="Sweep parameters must not be empty")
+    if min(window_sizes) < 2 or min(prediction_horizons) < 1:
+        raise HTTPException(status_code=400, detail="window_size must be >= 2 and prediction_horizon >= 1")
+
+    combinations = len(window_sizes) * len(z_thresholds) * len(prediction_horizons)
+    if combinations > MAX_SWEEP_COMBINATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many combinations: {combinations} (max {MAX_SWEEP_COMBINATIONS})"
+        )
+
+    results = []
+    debug_info = []
+
+    # 모든 캠의 측정값을 단일 쿼리로 조회
+    measurement_columns = analysis_crud.get_measurement_columns(
+        db, params.cam_numbers, params.start_date, params.end_date, timer
+    )
+    with timer.stage("query"):
+        total_counts = (
+            analysis_crud.get_measurement_counts_by_cam(db, params.cam_numbers)
+            if params.include_diagnostics else None
+        )
+
+    for cam_number in params.cam_numbers:
+        for metric in params.metrics:
+            debug_entry = {
+                "cam_number": cam_number,
+                "metric": metric,
+                "data_count": 0,
+                "status": "processing"
+            }
+            if total_counts is not None:
+                debug_entry["total_cam_measurements"] = total_counts.get(cam_number, 0)
+                debug_entry["rows_in_range"] = len(measurement_columns[cam_number]["timestamp"])
+
+            try:
+                values, allowances = analysis_crud.metric_series(measurement_columns[cam_number], metric)
+                debug_entry["data_count"] = len(values)
+
+                with timer.stage("compute"):
+                    grid = backtest_engine.run_parameter_sweep(
+                        values,
+                        allowances,
+                        window_sizes,
+                        z_thresholds,
+                        prediction_horizons
+                    )
+
+                ranked = sorted(
+                    (g for g in grid if g["total_predictions"] > 0),
+                    key=lambda g: g["f1_score"],
+                    reverse=True
+                )
+
+                debug_entry["status"] = "success"
+                results.append({
+                    "cam_number": cam_number,
+                    "metric": metric,
+                    "data_count": len(values),
+                    "best": ranked[:params.top_n],
+                    "grid": grid
+                })
+
+            except Exception as e:
+                debug_entry["status"] = f"error: {str(e)}"
+                logger.warning("CAM %s, %s 스윕 중 오류 발생: %s", cam_number, metric, e)
+
+            debug_info.append(debug_entry)
+
+    return {
+        "results": results,
+        "debug_info": debug_info,
+        "parameter_grid": {
+            "window_sizes": window_sizes,
+            "z_thresholds": z_thresholds,
+            "prediction_horizons": prediction_horizons,
+            "total_combinations": combinations
+        },
+        "processing_info": {"timing_ms": timer.as_dict()}
+    }
+
+def validate_detector_params(params, warmup: int):
+    """검출기 종류와 파라미터를 검증합니다. zscore/none 은 검출기를 사용하지 않습니다."""
+    if params.detector in ("zscore", "none"):
+        return
+    try:
+        build_detector(params, warmup)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def build_detector(params, warmup: int) -> Optional[ControlChartDetector]:
+    """
+    파라미터의 detector 설정으로 새 EWMA/CUSUM 검출기를 만듭니다 (zscore/none 이면 None).
+    처음 warmup 개 값이 검출기의 기준 구간이 됩니다.
+    """
+    if params.detector in ("zscore", "none"):
+        return None
+    return create_detector(
+        params.detector,
+        warmup,
+        ewma_lambda=params.ewma_lambda,
+        ewma_limit=params.ewma_limit,
+        cusum_k=params.cusum_k,
+        cusum_h=params.cusum_h
+    )
+
+def build_t2_limit(params: ModelBacktestParameters) -> Optional[float]:
+    """다변량 모드이면 Hotelling T² 관리 한계를 반환합니다 (아니면 None). 잘못된 값이면 400 을 발생시킵니다."""
+    if not params.multivariate:
+        return None
+    try:
+        return hotelling_t2_limit(len(PHASE_ANGLE_COLUMNS), params.window_size, params.t2_alpha)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def multivariate_t2_alpha(params: ModelBacktestParameters) -> Optional[float]:
+    """PhaseAngleBacktestState 에 넘길 T² 유의수준 (다변량 모드가 아니면 None)"""
+    return params.t2_alpha if params.multivariate else None
 
 def perform_backtest_improved(measurements_data: List[Dict], window_size: int, z_threshold: float, prediction_horizon: int):
     """개선된 백테스팅 로직 - 실제 과거 데이터로 미래 예측"""
-    predictions = []
-    actuals = []
-    backtest_details = []
+    values = np.array([data['value'] for data in measurements_data], dtype=np.float64)
+    # allowance 가 없거나 None 이면 NaN -> 기본 허용 오차 사용
+    allowances = np.array([data.get('allowance') for data in measurements_data], dtype=np.float64)
+    return perform_backtest_arrays(values, allowances, window_size, z_threshold, prediction_horizon)
+
+def perform_backtest_arrays(
+    values: np.ndarray,
+    allowances: np.ndarray,
+    window_size: int,
+    z_threshold: float,
+    prediction_horizon: int,
+    detector: Optional[ControlChartDetector] = None
+):
+    """
+    perform_backtest_improved 의 배열 버전.
+    모든 시점의 윈도우 통계, Z-Score, 실제 불량 라벨을 행렬로 한 번에 계산합니다.
+    detector(EWMA/CUSUM)가 주어지면 미래 구간 각 값의 불량 예측을 Z-Score 대신 검출기 신호로 판정합니다.
+    """
+    windows = backtest_engine.backtest_windows(values, allowances, window_size, prediction_horizon)
+    z_scores = windows["z_scores"]
+    actual = windows["actual"]
+    detector_statistics = None
+    if detector is None:
+        predicted = z_scores > z_threshold
+    else:
+        detection = detector.update_many(values)
+        predicted = detection["signal"][windows["future_index"]]
+        detector_statistics = detection["statistic"][windows["future_index"]]
     
-    values = [data['value'] for data in measurements_data]
+    # 성능 지표 계산
+    metrics = calculate_performance_metrics(predicted.ravel(), actual.ravel())
     
-    for i in range(window_size, len(values) - prediction_horizon):
-        # 1. 과거 윈도우 데이터로 통계 계산 (시점 i-window_size ~ i-1)
-        window_data = values[i-window_size:i]
-        window_mean = mean(window_data)
-        window_std = stdev(window_data) if len(window_data) > 1 else 0
-        
-        # 2. 미래 데이터 예측 (시점 i ~ i+prediction_horizon-1)
-        future_data = values[i:i+prediction_horizon]
-        z_scores = []
-        predicted_defects = []
-        
-        for value in future_data:
-            z_score = abs((value - window_mean) / window_std) if window_std > 0 else 0
-            z_scores.append(z_score)
-            predicted_defects.append(z_score > z_threshold)
-        
-        # 3. 실제 불량 여부 판정 (더 정교한 로직 사용)
-        actual_defects = []
-        for j, data in enumerate(measurements_data[i:i+prediction_horizon]):
-            # 실제 불량 판정: allowance 기준 또는 공정 허용 범위 초과 여부
-            is_actual_defect = determine_actual_defect(data, window_mean, window_std)
-            actual_defects.append(is_actual_defect)
-        
-        # 4. 결과 저장
-        predictions.extend(predicted_defects)
-        actuals.extend(actual_defects)
-        
-        # 상세 정보 저장 (디버깅용)
-        if len(backtest_details) < 10:  # 처음 10개만 저장
-            backtest_details.append(BacktestDetail(
-                window_start=i-window_size,
-                window_end=i-1,
-                window_mean=window_mean,
-                window_std=window_std,
-                predicted_values=future_data,
-                actual_values=future_data,
-                predicted_defects=predicted_defects,
-                actual_defects=actual_defects,
-                z_scores=z_scores
-            ))
+    # 상세 정보 저장 (디버깅용, 처음 10개만 저장)
+    backtest_details = []
+    for k in range(min(10, len(windows["starts"]))):
+        i = int(windows["starts"][k])
+        future_data = values[windows["future_index"][k]].tolist()
+        backtest_details.append(BacktestDetail(
+            window_start=i-window_size,
+            window_end=i-1,
+            window_mean=float(windows["window_mean"][k]),
+            window_std=float(windows["window_std"][k]),
+            predicted_values=future_data,
+            actual_values=future_data,
+            predicted_defects=predicted[k].tolist(),
+            actual_defects=actual[k].tolist(),
+            z_scores=z_scores[k].tolist(),
+            detector_statistics=detector_statistics[k].tolist() if detector_statistics is not None else None
+        ))
     
-    # 성능 지표 계산
-    metrics = calculate_performance_metrics(predictions, actuals)
     metrics['details'] = [detail.dict() for detail in backtest_details]
     
     return metrics
 
-def determine_actual_defect(measurement_data: Dict, reference_mean: float, reference_std: float) -> bool:
-    """실제 불량 여부를 판정하는 로직"""
-    value = measurement_data['value']
-    allowance = measurement_data.get('allowance', 0.1)  # 기본 허용 오차
-    
-    # 방법 1: 허용 오차 기준
-    if abs(value - reference_mean) > allowance:
-        return True
-    
-    # 방법 2: 3-시그마 룰 기준 (통계적 이상치)
-    if reference_std > 0:
-        z_score = abs((value - reference_mean) / reference_std)
-        if z_score > 3.0:  # 3-시그마 이상
-            return True
-    
-    # 방법 3: 공정 허용 범위 기준 (예시)
-    # 실제로는 각 캠별, 메트릭별로 다른 기준 적용
-    if abs(value) > 0.2:  # 절대값 기준
-        return True
-    
-    return False
-
-def calculate_performance_metrics(predictions: List[bool], actuals: List[bool]):
+def calculate_performance_metrics(predictions: Union[List[bool], np.ndarray], actuals: Union[List[bool], np.ndarray]):
     """예측 성능 지표를 계산합니다."""
     if len(predictions) != len(actuals) or len(predictions) == 0:
         return {
@@ -303,37 +558,9 @@ def calculate_performance_metrics(predictions: List[bool], actuals: List[bool]):
             "true_positives": 0, "false_positives": 0, "true_negatives": 0, "false_negatives": 0
         }
     
-    tp = sum(1 for p, a in zip(predictions, actuals) if p and a)
-    fp = sum(1 for p, a in zip(predictions, actuals) if p and not a)
-    tn = sum(1 for p, a in zip(predictions, actuals) if not p and not a)
-    fn = sum(1 for p, a in zip(predictions, actuals) if not p and a)
-    
-    accuracy = (tp + tn) / len(predictions) if len(predictions) > 0 else 0
-    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-    f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-    
-    # 실제 불량률과 예측 불량률의 차이
-    predicted_defect_rate = sum(predictions) / len(predictions)
-    actual_defect_rate = sum(actuals) / len(actuals)
-    mae = abs(predicted_defect_rate - actual_defect_rate)
-    rmse = ((predicted_defect_rate - actual_defect_rate) ** 2) ** 0.5
-    
-    return {
-        "accuracy": accuracy,
-        "precision": precision,
-        "recall": recall,
-        "f1_score": f1_score,
-        "mae": mae,
-        "rmse": rmse,
-        "total_predictions": len(predictions),
-        "true_positives": tp,
-        "false_positives": fp,
-        "true_negatives": tn,
-        "false_negatives": fn,
-        "predicted_defect_rate": predicted_defect_rate,
-        "actual_defect_rate": actual_defect_rate
-    }
+    # 예측/실제 불량 배열 한 번의 bincount 로 혼동 행렬 계산
+    tp, fp, tn, fn = backtest_engine.confusion_counts(predictions, actuals)
+    return backtest_engine.metrics_from_counts(tp, fp, tn, fn)
 
 @router.get("/historical-analysis", summary="과거 분석 결과 조회")
 def get_historical_analysis(
@@ -440,28 +667,98 @@ def get_sample_data(
     }
 
 @router.post("/model-realtime", summary="모델별 실시간 백테스팅")
-def run_model_realtime_backtest(
+def run_model_realtime_backtest_endpoint(
     params: ModelBacktestParameters,
+    use_cache: bool = Query(True, description="결과 캐시 사용 여부"),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
     db: Session = Depends(get_db)
 ):
     """
     특정 모델의 데이터를 시간순으로 처리하여 실시간 백테스팅을 수행합니다.
-    6개 위상각 데이터를 동시에 분석하고 PPM 계산 결과를 시계열로 반환합니다.
+    같은 파라미터의 결과는 해당 모델의 새 데이터가 적재되기 전까지 캐시에서 반환됩니다.
+    """
+    timer = StageTimer("model-realtime")
+    return cached_response(
+        backtest_cache.make_key("model-realtime", params.dict()),
+        get_raw_data_watermark(db, params.model_name),
+        lambda: run_model_realtime_backtest(params, db, timer),
+        use_cache,
+        output_format,
+        "phase_angle_data",
+        timer
+    )
+
+PHASE_ANGLE_COLUMNS = ['d072', 'd077', 'd082', 'd087', 'd092', 'd097']
+
+def validate_model_backtest_params(params: ModelBacktestParameters):
+    """모델 백테스팅 파라미터를 검증합니다."""
+    if not params.model_name or params.model_name.strip() == "":
+        raise HTTPException(status_code=400, detail="Model name is required")
+    
+    if params.window_size < 10 or params.window_size > 1000:
+        raise HTTPException(status_code=400, detail="Window size must be between 10 and 1000")
+    
+    if params.max_records < 100 or params.max_records > 5000:
+        raise HTTPException(status_code=400, detail="Max records must be between 100 and 5000")
+    
+    validate_detector_params(params, params.window_size)
+    build_t2_limit(params)
+
+def fetch_model_raw_records(db: Session, params: ModelBacktestParameters, timer: Optional[StageTimer] = None):
     """
+    모델의 위상각 원본 데이터를 시간순으로 조회합니다.
+    timer 가 주어지면 쿼리 실행(query)과 행 수신(fetch) 시간을 나누어 기록합니다.
+    """
+    # Oracle용 쿼리 (ROWNUM 사용, 더 단순한 조건)
+    # 위상각: d072, d077, d082, d087, d092, d097
+    raw_data_query = """
+    SELECT * FROM (
+        SELECT id, d000, d001, d072, d077, d082, d087, d092, d097, create_time
+        FROM HANDY_ZSCORE_RAW_DATA 
+        WHERE d001 = :model_name 
+        AND d072 IS NOT NULL AND d077 IS NOT NULL 
+        AND d082 IS NOT NULL AND d087 IS NOT NULL 
+        AND d092 IS NOT NULL AND d097 IS NOT NULL
+        ORDER BY create_time ASC, id ASC
+    ) WHERE ROWNUM <= :max_records
+    """
+    
     try:
-        # 파라미터 검증
-        if not params.model_name or params.model_name.strip() == "":
-            raise HTTPException(status_code=400, detail="Model name is required")
+        # 샘플 데이터로 문제가 있는 값들을 확인 (DEBUG 레벨에서만 추가 쿼리 실행)
+        if logger.isEnabledFor(logging.DEBUG):
+            sample_query = """
+            SELECT d001, d072, d077, d082, d087, d092, d097
+            FROM HANDY_ZSCORE_RAW_DATA 
+            WHERE d001 = :model_name 
+            AND ROWNUM <= 10
+            """
+            
+            sample_records = db.execute(text(sample_query), {"model_name": params.model_name}).fetchall()
+            
+            logger.debug("Sample data for model '%s':", params.model_name)
+            for i, record in enumerate(sample_records):
+                logger.debug(
+                    "Record %d: d072='%s', d077='%s', d082='%s', d087='%s', d092='%s', d097='%s'",
+                    i + 1, record.d072, record.d077, record.d082, record.d087, record.d092, record.d097
+                )
+        
+        # 실제 데이터 쿼리 실행
+        with timed_stage(timer, "query"):
+            result = db.execute(text(raw_data_query), {
+                "model_name": params.model_name,
+                "max_records": params.max_records
+            })
         
-        if params.window_size < 10 or params.window_size > 1000:
-            raise HTTPException(status_code=400, detail="Window size must be between 10 and 1000")
+        with timed_stage(timer, "fetch"):
+            raw_records = result.fetchall()
+        logger.debug("Main query succeeded with %d records", len(raw_records))
         
-        if params.max_records < 100 or params.max_records > 5000:
-            raise HTTPException(status_code=400, detail="Max records must be between 100 and 5000")
+    except Exception as e:
+        db.rollback()
+        logger.warning("Database error details: %s", e)
         
-        # Oracle용 쿼리 (ROWNUM 사용, 더 단순한 조건)
-        # 위상각: d072, d077, d082, d087, d092, d097
-        raw_data_query = """
+        # 더 간단한 쿼리로 재시도
+        simple_query = """
         SELECT * FROM (
             SELECT id, d000, d001, d072, d077, d082, d087, d092, d097, create_time
             FROM HANDY_ZSCORE_RAW_DATA 
@@ -474,247 +771,239 @@ def run_model_realtime_backtest(
         """
         
         try:
-            # 먼저 샘플 데이터로 문제가 있는 값들을 확인
-            sample_query = """
-            SELECT d001, d072, d077, d082, d087, d092, d097
-            FROM HANDY_ZSCORE_RAW_DATA 
-            WHERE d001 = :model_name 
-            AND ROWNUM <= 10
-            """
-            
-            sample_result = db.execute(text(sample_query), {"model_name": params.model_name})
-            sample_records = sample_result.fetchall()
-            
-            print(f"Sample data for model '{params.model_name}':")
-            for i, record in enumerate(sample_records):
-                print(f"Record {i+1}: d072='{record.d072}', d077='{record.d077}', d082='{record.d082}', d087='{record.d087}', d092='{record.d092}', d097='{record.d097}'")
-            
-            # 실제 데이터 쿼리 실행
-            result = db.execute(text(raw_data_query), {
-                "model_name": params.model_name,
-                "max_records": params.max_records
-            })
-            
-            raw_records = result.fetchall()
-            print(f"Main query succeeded with {len(raw_records)} records")
-            
-        except Exception as e:
-            db.rollback()
-            print(f"Database error details: {str(e)}")
-            
-            # 더 간단한 쿼리로 재시도
-            simple_query = """
-            SELECT * FROM (
-                SELECT id, d000, d001, d072, d077, d082, d087, d092, d097, create_time
-                FROM HANDY_ZSCORE_RAW_DATA 
-                WHERE d001 = :model_name 
-                AND d072 IS NOT NULL AND d077 IS NOT NULL 
-                AND d082 IS NOT NULL AND d087 IS NOT NULL 
-                AND d092 IS NOT NULL AND d097 IS NOT NULL
-                ORDER BY create_time ASC, id ASC
-            ) WHERE ROWNUM <= :max_records
-            """
-            
-            try:
+            with timed_stage(timer, "query"):
                 result = db.execute(text(simple_query), {
                     "model_name": params.model_name,
                     "max_records": params.max_records
                 })
+            with timed_stage(timer, "fetch"):
                 raw_records = result.fetchall()
-                print(f"Simple query succeeded with {len(raw_records)} records")
-            except Exception as e2:
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Database query failed even with simple query: {str(e2)}"
-                )
-        
-        if len(raw_records) < params.window_size + params.prediction_horizon:
+            logger.info("Simple query succeeded with %d records", len(raw_records))
+        except Exception as e2:
             raise HTTPException(
-                status_code=400, 
-                detail=f"Insufficient data: need {params.window_size + params.prediction_horizon}, got {len(raw_records)}"
+                status_code=500, 
+                detail=f"Database query failed even with simple query: {str(e2)}"
             )
+    
+    if len(raw_records) < params.window_size + params.prediction_horizon:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Insufficient data: need {params.window_size + params.prediction_horizon}, got {len(raw_records)}"
+        )
+    
+    return raw_records
+
+def parse_phase_angle_value(col: str, value) -> float:
+    """원본 문자열 위상각 값을 숫자로 변환합니다. 변환할 수 없는 값은 0.0으로 처리합니다."""
+    try:
+        if value is None:
+            return 0.0
+        
+        # 문자열로 변환하고 공백 제거
+        str_value = str(value).strip()
         
-        # 6개 위상각별로 데이터 분리
-        angle_columns = ['d072', 'd077', 'd082', 'd087', 'd092', 'd097']
-        angle_data = {col: [] for col in angle_columns}
-        timestamp_data = []
-        barcode_data = []
+        # 빈 문자열이거나 null 문자열인 경우
+        if str_value == '' or str_value.upper() in ['NULL', 'NONE', 'N/A']:
+            return 0.0
+        
+        # 쉼표 제거 및 숫자 변환 시도
+        clean_value = str_value.replace(',', '').replace(' ', '')
         
         try:
-            for record in raw_records:
-                # 타임스탬프 검증
-                if hasattr(record, 'create_time') and record.create_time:
-                    timestamp_data.append(record.create_time)
-                else:
-                    timestamp_data.append(datetime.now())  # 기본값
-                
-                # 바코드 검증
-                if hasattr(record, 'd000') and record.d000:
-                    barcode_data.append(str(record.d000))
-                else:
-                    barcode_data.append(f"unknown_{len(barcode_data)}")
-                
-                # 각 위상각 데이터 처리
-                for col in angle_columns:
-                    try:
-                        value = getattr(record, col, None)
-                        if value is not None:
-                            # 문자열로 변환하고 공백 제거
-                            str_value = str(value).strip()
-                            
-                            # 빈 문자열이거나 null 문자열인 경우
-                            if str_value == '' or str_value.upper() in ['NULL', 'NONE', 'N/A']:
-                                angle_data[col].append(0.0)
-                                continue
-                            
-                            # 쉼표 제거 및 숫자 변환 시도
-                            clean_value = str_value.replace(',', '').replace(' ', '')
-                            
-                            # 추가 정리: 특수문자 제거
-                            # 더 간단한 숫자 검증 (Python에서 float 변환 시도)
-                            try:
-                                numeric_value = float(clean_value)
-                                
-                                # NaN, Infinity 체크
-                                if np.isnan(numeric_value) or np.isinf(numeric_value):
-                                    print(f"Warning: Invalid numeric value (NaN/Inf) for {col}, using 0.0")
-                                    angle_data[col].append(0.0)
-                                # 위상각 범위 확장 (-500~500도)
-                                elif -500 <= numeric_value <= 500:
-                                    angle_data[col].append(numeric_value)
-                                else:
-                                    print(f"Warning: Out of range value {numeric_value} for {col}, using clamped value")
-                                    # 범위를 벗어난 값은 클램핑
-                                    clamped_value = max(-500, min(500, numeric_value))
-                                    angle_data[col].append(clamped_value)
-                            except ValueError:
-                                print(f"Warning: Cannot convert '{clean_value}' to float for {col}, using 0.0")
-                                angle_data[col].append(0.0)
-                        else:
-                            angle_data[col].append(0.0)
-                    except (ValueError, TypeError, AttributeError) as e:
-                        print(f"Warning: Failed to convert {col} value '{value}': {e}, using 0.0")
-                        angle_data[col].append(0.0)
-                        
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Data processing failed: {str(e)}"
-            )
+            numeric_value = float(clean_value)
+        except ValueError:
+            logger.warning("Cannot convert '%s' to float for %s, using 0.0", clean_value, col)
+            return 0.0
         
-        # 실시간 백테스팅 수행
-        phase_angle_results = []
-        ppm_history = []  # PPM 기울기 계산용
+        # NaN, Infinity 체크
+        if np.isnan(numeric_value) or np.isinf(numeric_value):
+            logger.warning("Invalid numeric value (NaN/Inf) for %s, using 0.0", col)
+            return 0.0
+        
+        # 위상각 범위 확장 (-500~500도), 범위를 벗어난 값은 클램핑
+        if not -500 <= numeric_value <= 500:
+            logger.warning("Out of range value %s for %s, using clamped value", numeric_value, col)
+            return max(-500, min(500, numeric_value))
         
-        for i in range(params.window_size, min(len(raw_records), params.max_records)):
-            # 각 위상각별 통계 계산
-            angle_values = []
-            angle_dict = {}
+        return numeric_value
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning("Failed to convert %s value '%s': %s, using 0.0", col, value, e)
+        return 0.0
+
+def parse_phase_angle_records(raw_records):
+    """원본 레코드를 6개 위상각별 값 목록, 타임스탬프, 바코드로 분리합니다."""
+    angle_data = {col: [] for col in PHASE_ANGLE_COLUMNS}
+    timestamp_data = []
+    barcode_data = []
+    
+    try:
+        for record in raw_records:
+            # 타임스탬프 검증
+            if hasattr(record, 'create_time') and record.create_time:
+                timestamp_data.append(record.create_time)
+            else:
+                timestamp_data.append(datetime.now())  # 기본값
             
-            print(f"\nProcessing record {i}/{len(raw_records)}:")
+            # 바코드 검증
+            if hasattr(record, 'd000') and record.d000:
+                barcode_data.append(str(record.d000))
+            else:
+                barcode_data.append(f"unknown_{len(barcode_data)}")
             
-            for j, col in enumerate(angle_columns):
-                window_data = angle_data[col][i-params.window_size:i]
-                current_value = angle_data[col][i] if i < len(angle_data[col]) else None
-                
-                print(f"  {col}: window_size={len(window_data)}, current={current_value}")
-                
-                if len(window_data) > 0:
-                    # 모든 데이터를 사용 (0값도 포함)
-                    angle_values.extend(window_data)
-                    angle_dict[f'angle_{j+1}'] = current_value
-                else:
-                    angle_dict[f'angle_{j+1}'] = None
+            # 각 위상각 데이터 처리
+            for col in PHASE_ANGLE_COLUMNS:
+                angle_data[col].append(parse_phase_angle_value(col, getattr(record, col, None)))
                     
-            print(f"  Total angle values: {len(angle_values)}")
-            print(f"  Angle dict: {angle_dict}")
-            
-            if not angle_values:
-                continue
-                
-            # 전체 위상각 데이터의 통계 계산
-            mean_val = np.mean(angle_values) if angle_values else 0.0
-            std_val = np.std(angle_values, ddof=1) if len(angle_values) > 1 else 0.0
-            
-            # PPM 계산 (상한/하한 규격: ±0.25)
-            ppm = calculate_predicted_ppm_value(angle_values, usl=0.25, lsl=-0.25)
-            
-            # PPM 기울기 계산 (최근 10개 데이터 기준)
-            ppm_history.append(ppm)
-            ppm_slope = None
-            if len(ppm_history) >= 10:
-                recent_ppm = ppm_history[-10:]
-                ppm_slope = calculate_ppm_slope_value(recent_ppm)
-            
-            # 품질 상태 판정
-            try:
-                quality_status, defect_prob = determine_quality_status(ppm, ppm_slope)
-            except Exception as e:
-                print(f"Warning: Quality status determination failed: {e}")
-                quality_status, defect_prob = "UNKNOWN", 0.0
-            
-            # 결과 저장
-            phase_angle_data = PhaseAngleData(
-                timestamp=timestamp_data[i],
-                barcode=barcode_data[i],
-                angle_1=angle_dict.get('angle_1'),
-                angle_2=angle_dict.get('angle_2'),
-                angle_3=angle_dict.get('angle_3'),
-                angle_4=angle_dict.get('angle_4'),
-                angle_5=angle_dict.get('angle_5'),
-                angle_6=angle_dict.get('angle_6'),
-                mean_value=round(mean_val, 6),
-                std_dev=round(std_val, 6),
-                predicted_ppm=round(ppm, 2),
-                ppm_slope=round(ppm_slope, 4) if ppm_slope is not None else None,
-                quality_status=quality_status,
-                defect_probability=round(defect_prob, 4)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Data processing failed: {str(e)}"
+        )
+    
+    return angle_data, timestamp_data, barcode_data
+
+def iter_phase_angle_points(angle_data, timestamp_data, barcode_data, params: ModelBacktestParameters):
+    """
+    위상각 데이터를 시간순으로 처리하며 시점별 PhaseAngleData 를 하나씩 생성합니다.
+    전체 결과 목록을 메모리에 만들지 않으므로 스트리밍 응답에서 그대로 사용할 수 있습니다.
+    """
+    total_records = len(timestamp_data)
+    ppm_history = []  # PPM 기울기 계산용
+    debug = logger.isEnabledFor(logging.DEBUG)
+    
+    # 직전 window_size 행의 6개 위상각(0값 포함)을 모두 합친 이동 윈도우 통계
+    window_stats = SlidingWindowStats(params.window_size * len(PHASE_ANGLE_COLUMNS))
+    # 변화 감지 검출기는 행별 위상각 평균을 감시하며, 처음 window_size 행이 기준 구간
+    detector = build_detector(params, params.window_size)
+    # 다변량 모드: 직전 window_size 행의 평균 벡터/공분산 행렬 (행 추가/제거 시 rank-one 갱신)
+    t2_limit = build_t2_limit(params)
+    row_covariance = RollingCovariance(len(PHASE_ANGLE_COLUMNS), params.window_size) if t2_limit is not None else None
+    for i in range(min(params.window_size, total_records)):
+        for col in PHASE_ANGLE_COLUMNS:
+            window_stats.push(angle_data[col][i])
+        if detector is not None:
+            detector.update(row_angle_mean(angle_data, i))
+        if row_covariance is not None:
+            row_covariance.push(row_angles(angle_data, i))
+    
+    for i in range(params.window_size, min(total_records, params.max_records)):
+        # 각 위상각별 현재 값
+        angle_dict = {f'angle_{j+1}': angle_data[col][i] for j, col in enumerate(PHASE_ANGLE_COLUMNS)}
+        
+        if debug:
+            logger.debug(
+                "Processing record %d/%d: total angle values=%d, angles=%s",
+                i, total_records, window_stats.count, angle_dict
             )
-            
-            phase_angle_results.append(phase_angle_data)
         
-        # 성능 지표 계산 (예외처리 포함)
+        # 전체 위상각 데이터의 통계 계산
+        mean_val = window_stats.mean
+        std_val = window_stats.std(ddof=1)
+        
+        # PPM 계산 (상한/하한 규격: ±0.25)
+        ppm = predicted_ppm_from_stats(mean_val, std_val, window_stats.count, usl=0.25, lsl=-0.25)
+        
+        # 현재 행의 변화 감지 (검출기 상태 O(1) 갱신)
+        drift_statistic, drift_signal = (
+            detector.update(row_angle_mean(angle_data, i)) if detector is not None else (None, None)
+        )
+        
+        # 현재 행의 Hotelling T² (직전 window_size 행 기준)
+        t2_statistic, t2_signal = None, None
+        if row_covariance is not None:
+            row = row_angles(angle_data, i)
+            t2_statistic = row_covariance.t2(row)
+            t2_signal = t2_statistic is not None and t2_statistic > t2_limit
+            row_covariance.push(row)
+        
+        # 다음 시점을 위해 현재 행을 윈도우에 추가
+        for col in PHASE_ANGLE_COLUMNS:
+            window_stats.push(angle_data[col][i])
+        
+        # PPM 기울기 계산 (최근 10개 데이터 기준)
+        ppm_history.append(ppm)
+        ppm_history = ppm_history[-10:]
+        ppm_slope = None
+        if len(ppm_history) >= 10:
+            ppm_slope = calculate_ppm_slope_value(ppm_history)
+        
+        # 품질 상태 판정
         try:
-            if not phase_angle_results:
-                raise HTTPException(
-                    status_code=400,
-                    detail="No valid data points processed. Check data quality and parameters."
-                )
-            
-            ppm_values = [p.predicted_ppm for p in phase_angle_results if p.predicted_ppm is not None]
-            slope_values = [p.ppm_slope for p in phase_angle_results if p.ppm_slope is not None]
-            
-            performance_metrics = {
-                "total_data_points": len(phase_angle_results),
-                "avg_ppm": float(np.mean(ppm_values)) if ppm_values else 0.0,
-                "max_ppm": float(max(ppm_values)) if ppm_values else 0.0,
-                "min_ppm": float(min(ppm_values)) if ppm_values else 0.0,
-                "avg_slope": float(np.mean(slope_values)) if slope_values else 0.0
-            }
+            quality_status, defect_prob = determine_quality_status(ppm, ppm_slope, drift_signal, t2_signal)
         except Exception as e:
-            print(f"Warning: Failed to calculate performance metrics: {e}")
-            performance_metrics = {
-                "total_data_points": len(phase_angle_results),
-                "avg_ppm": 0.0,
-                "max_ppm": 0.0,
-                "min_ppm": 0.0,
-                "avg_slope": 0.0
-            }
+            logger.warning("Quality status determination failed: %s", e)
+            quality_status, defect_prob = "UNKNOWN", 0.0
         
-        processing_info = {
-            "window_size": params.window_size,
-            "z_threshold": params.z_threshold,
-            "prediction_horizon": params.prediction_horizon,
-            "phase_angles_monitored": 6,
-            "data_processing_rate": f"{len(phase_angle_results)}/{len(raw_records)} records"
-        }
+        yield PhaseAngleData(
+            timestamp=timestamp_data[i],
+            barcode=barcode_data[i],
+            angle_1=angle_dict.get('angle_1'),
+            angle_2=angle_dict.get('angle_2'),
+            angle_3=angle_dict.get('angle_3'),
+            angle_4=angle_dict.get('angle_4'),
+            angle_5=angle_dict.get('angle_5'),
+            angle_6=angle_dict.get('angle_6'),
+            mean_value=round(mean_val, 6),
+            std_dev=round(std_val, 6),
+            predicted_ppm=round(ppm, 2),
+            ppm_slope=round(ppm_slope, 4) if ppm_slope is not None else None,
+            quality_status=quality_status,
+            defect_probability=round(defect_prob, 4),
+            drift_statistic=round(drift_statistic, 4) if drift_statistic is not None else None,
+            drift_signal=drift_signal,
+            t2_statistic=round(t2_statistic, 4) if t2_statistic is not None else None,
+            t2_signal=t2_signal
+        )
+
+def row_angles(angle_data, i: int) -> List[float]:
+    """i 번째 행의 6개 위상각 벡터"""
+    return [angle_data[col][i] for col in PHASE_ANGLE_COLUMNS]
+
+def row_angle_mean(angle_data, i: int) -> float:
+    """i 번째 행의 6개 위상각 평균 (PhaseAngleBacktestState 의 angles.mean(axis=1) 과 같은 값)"""
+    return float(np.mean([angle_data[col][i] for col in PHASE_ANGLE_COLUMNS]))
+
+def build_model_processing_info(params: ModelBacktestParameters, processed_records: int, total_records: int):
+    return {
+        "window_size": params.window_size,
+        "z_threshold": params.z_threshold,
+        "prediction_horizon": params.prediction_horizon,
+        "phase_angles_monitored": 6,
+        "data_processing_rate": f"{processed_records}/{total_records} records",
+        "detector": params.detector,
+        "multivariate": params.multivariate,
+        "t2_limit": round(build_t2_limit(params), 4) if params.multivariate else None
+    }
+
+def run_model_realtime_backtest(params: ModelBacktestParameters, db: Session, timer: Optional[StageTimer] = None):
+    """
+    특정 모델의 데이터를 시간순으로 처리하여 실시간 백테스팅을 수행합니다.
+    6개 위상각 데이터를 동시에 분석하고 PPM 계산 결과를 시계열로 반환합니다.
+    processing_info.timing_ms 에 단계별 소요 시간을 담습니다.
+    """
+    timer = timer or StageTimer("model-realtime")
+    try:
+        validate_model_backtest_params(params)
+        raw_records = fetch_model_raw_records(db, params, timer)
+        with timer.stage("parse"):
+            angle_data, timestamp_data, barcode_data = parse_phase_angle_records(raw_records)
+        
+        # 실시간 백테스팅 수행
+        with timer.stage("compute"):
+            metrics = PhaseAngleMetricsAccumulator()
+            phase_angle_results = []
+            for point in iter_phase_angle_points(angle_data, timestamp_data, barcode_data, params):
+                metrics.add(point)
+                phase_angle_results.append(point)
         
+        processing_info = build_model_processing_info(params, len(phase_angle_results), len(raw_records))
+        processing_info["timing_ms"] = timer.as_dict()
         return ModelBacktestResult(
             model_name=params.model_name,
             total_records=len(raw_records),
             processed_records=len(phase_angle_results),
             phase_angle_data=phase_angle_results,
-            performance_metrics=performance_metrics,
+            performance_metrics=metrics.as_dict(),
             processing_info=processing_info
         )
         
@@ -723,29 +1012,584 @@ def run_model_realtime_backtest(
             raise e
         raise HTTPException(status_code=500, detail=f"Model backtest failed: {str(e)}")
 
+@router.post("/model-realtime/stream", summary="모델별 실시간 백테스팅 (NDJSON 스트리밍)")
+def stream_model_realtime_backtest(
+    params: ModelBacktestParameters,
+    chunk_size: int = Query(100, ge=1, le=5000, description="한 줄에 담을 데이터 포인트 수"),
+    db: Session = Depends(get_db)
+):
+    """
+    모델별 실시간 백테스팅 결과를 계산되는 대로 NDJSON 으로 전송합니다.
+
+    - {"type": "points", "data": [...]}: chunk_size 개씩 계산된 PhaseAngleData
+    - {"type": "summary", ...}: 마지막 줄, 성능 지표와 처리 정보
+    - {"type": "error", "detail": ...}: 스트리밍 도중 오류가 발생한 경우
+    summary 의 processing_info.timing_ms 는 클라이언트 수신 대기 시간을 제외한 단계별 소요 시간입니다.
+    """
+    timer = StageTimer("model-realtime-stream")
+    validate_model_backtest_params(params)
+    raw_records = fetch_model_raw_records(db, params, timer)
+    total_records = len(raw_records)
+    with timer.stage("parse"):
+        angle_data, timestamp_data, barcode_data = parse_phase_angle_records(raw_records)
+    del raw_records
+
+    def generate():
+        metrics = PhaseAngleMetricsAccumulator()
+        points = iter_phase_angle_points(angle_data, timestamp_data, barcode_data, params)
+        outcome = "streamed"
+        try:
+            while True:
+                with timer.stage("compute"):
+                    chunk = list(islice(points, chunk_size))
+                    for point in chunk:
+                        metrics.add(point)
+                if not chunk:
+                    break
+                with timer.stage("serialize"):
+                    line = ndjson_line({"type": "points", "data": chunk})
+                yield line
+
+            processing_info = build_model_processing_info(params, metrics.count, total_records)
+            processing_info["timing_ms"] = timer.as_dict()
+            yield ndjson_line({
+                "type": "summary",
+                "model_name": params.model_name,
+                "total_records": total_records,
+                "processed_records": metrics.count,
+                "performance_metrics": metrics.as_dict(),
+                "processing_info": processing_info
+            })
+        except Exception as e:
+            outcome = "error"
+            yield ndjson_line({"type": "error", "detail": f"Model backtest failed: {str(e)}"})
+        finally:
+            timer.finish(outcome)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/model-realtime/chunked", summary="모델별 청크 단위 백테스팅 (대용량 이력)")
+def stream_chunked_model_backtest(params: ChunkedModelBacktestParameters):
+    """
+    모델의 전체 이력을 서버 측 커서로 시간순 청크 단위로 읽으며 백테스팅을 수행합니다.
+    청크 사이에는 롤링 윈도우 상태만 유지하므로 수백만 행도 일정한 메모리로 처리합니다.
+    결과는 /model-realtime/stream 과 같은 NDJSON 형식으로 전송됩니다.
+    """
+    if not params.model_name or params.model_name.strip() == "":
+        raise HTTPException(status_code=400, detail="Model name is required")
+    if params.window_size < 10 or params.window_size > 1000:
+        raise HTTPException(status_code=400, detail="Window size must be between 10 and 1000")
+    if params.chunk_rows < 100 or params.chunk_rows > 100000:
+        raise HTTPException(status_code=400, detail="Chunk rows must be between 100 and 100000")
+    if params.downsample_every < 1:
+        raise HTTPException(status_code=400, detail="downsample_every must be >= 1")
+    validate_detector_params(params, params.window_size)
+    build_t2_limit(params)
+
+    query = """
+    SELECT id, d000, d072, d077, d082, d087, d092, d097, create_time
+    FROM HANDY_ZSCORE_RAW_DATA 
+    WHERE d001 = :model_name 
+    AND d072 IS NOT NULL AND d077 IS NOT NULL 
+    AND d082 IS NOT NULL AND d087 IS NOT NULL 
+    AND d092 IS NOT NULL AND d097 IS NOT NULL
+    """
+    query_params: Dict[str, Any] = {"model_name": params.model_name}
+    if params.start_date:
+        query += " AND create_time >= :start_date"
+        query_params["start_date"] = datetime.strptime(params.start_date, '%Y-%m-%d')
+    if params.end_date:
+        query += " AND create_time < :end_date"
+        query_params["end_date"] = datetime.strptime(params.end_date, '%Y-%m-%d') + timedelta(days=1)
+    query += " ORDER BY create_time ASC, id ASC"
+    if params.max_records:
+        query = f"SELECT * FROM ({query}) WHERE ROWNUM <= :max_records"
+        query_params["max_records"] = params.max_records
+
+    def generate():
+        # 스트리밍 응답은 요청 의존성 종료 후에도 계속되므로 별도 세션을 사용
+        db = SessionLocal()
+        timer = StageTimer("model-realtime-chunked")
+        state = PhaseAngleBacktestState(
+            params.window_size,
+            num_columns=len(PHASE_ANGLE_COLUMNS),
+            detector=build_detector(params, params.window_size),
+            t2_alpha=multivariate_t2_alpha(params)
+        )
+        metrics = PhaseAngleMetricsAccumulator()
+        emitted = 0
+        outcome = "streamed"
+        try:
+            with timer.stage("query"):
+                result = db.execute(
+                    text(query).execution_options(stream_results=True, yield_per=params.chunk_rows),
+                    query_params
+                )
+                partitions = result.partitions(params.chunk_rows)
+            while True:
+                with timer.stage("fetch"):
+                    rows = next(partitions, None)
+                if rows is None:
+                    break
+                chunk_start = state.rows_seen
+                with timer.stage("parse"):
+                    angles = np.column_stack([
+                        parse_angle_column([getattr(row, col) for row in rows]) for col in PHASE_ANGLE_COLUMNS
+                    ])
+                with timer.stage("compute"):
+                    stats_chunk = state.process_chunk(angles)
+                    metrics.add_batch(
+                        np.round(stats_chunk["ppm"], 2),
+                        np.round(stats_chunk["ppm_slope"], 4),
+                        stats_chunk.get("drift_signal"),
+                        stats_chunk.get("t2_signal")
+                    )
+
+                if not params.include_series:
+                    continue
+
+                with timer.stage("serialize"):
+                    points = build_chunk_points(
+                        rows, angles, stats_chunk, chunk_start, params.window_size, params.downsample_every
+                    )
+                    line = ndjson_line({"type": "points", "data": points}) if points else None
+                if line is not None:
+                    emitted += len(points)
+                    yield line
+
+            if state.rows_seen < params.window_size + params.prediction_horizon:
+                outcome = "insufficient_data"
+                yield ndjson_line({
+                    "type": "error",
+                    "detail": f"Insufficient data: need {params.window_size + params.prediction_horizon}, got {state.rows_seen}"
+                })
+                return
+
+            processing_info = build_model_processing_info(params, metrics.count, state.rows_seen)
+            processing_info.update({
+                "chunk_rows": params.chunk_rows,
+                "downsample_every": params.downsample_every,
+                "emitted_points": emitted,
+                "timing_ms": timer.as_dict()
+            })
+            yield ndjson_line({
+                "type": "summary",
+                "model_name": params.model_name,
+                "total_records": state.rows_seen,
+                "processed_records": metrics.count,
+                "performance_metrics": metrics.as_dict(),
+                "processing_info": processing_info
+            })
+        except Exception as e:
+            outcome = "error"
+            yield ndjson_line({"type": "error", "detail": f"Chunked model backtest failed: {str(e)}"})
+        finally:
+            timer.finish(outcome)
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+def build_chunk_points(rows, angles: np.ndarray, stats_chunk: Dict[str, np.ndarray], chunk_start: int, window_size: int, downsample_every: int = 1):
+    """PhaseAngleBacktestState.process_chunk 결과를 PhaseAngleData 목록으로 변환합니다."""
+    ppm = np.round(stats_chunk["ppm"], 2)
+    slope = np.round(stats_chunk["ppm_slope"], 4)
+    drift_statistic = stats_chunk.get("drift_statistic")
+    drift_signal = stats_chunk.get("drift_signal")
+    t2_statistic = stats_chunk.get("t2_statistic")
+    t2_signal = stats_chunk.get("t2_signal")
+    points = []
+    for k, row_idx in enumerate(stats_chunk["row_index"]):
+        if (chunk_start + row_idx - window_size) % downsample_every != 0:
+            continue
+        row = rows[row_idx]
+        point_slope = None if np.isnan(slope[k]) else float(slope[k])
+        point_drift = bool(drift_signal[k]) if drift_signal is not None else None
+        point_t2 = bool(t2_signal[k]) if t2_signal is not None else None
+        quality_status, defect_prob = determine_quality_status(
+            float(stats_chunk["ppm"][k]), point_slope, point_drift, point_t2
+        )
+        points.append(PhaseAngleData(
+            timestamp=row.create_time or datetime.now(),
+            barcode=str(row.d000) if row.d000 else f"unknown_{chunk_start + row_idx}",
+            **{f"angle_{j+1}": float(angles[row_idx, j]) for j in range(len(PHASE_ANGLE_COLUMNS))},
+            mean_value=round(float(stats_chunk["mean"][k]), 6),
+            std_dev=round(float(stats_chunk["std"][k]), 6),
+            predicted_ppm=float(ppm[k]),
+            ppm_slope=point_slope,
+            quality_status=quality_status,
+            defect_probability=round(defect_prob, 4),
+            drift_statistic=round(float(drift_statistic[k]), 4) if drift_statistic is not None else None,
+            drift_signal=point_drift,
+            t2_statistic=round(float(t2_statistic[k]), 4) if t2_statistic is not None else None,
+            t2_signal=point_t2
+        ))
+    return points
+
+class IncrementalModelBacktestParameters(ModelBacktestParameters):
+    """증분 모델 백테스팅 파라미터"""
+    reset: bool = False  # True 이면 저장된 상태를 버리고 처음부터 다시 계산
+    chunk_rows: int = 10000  # 새 데이터를 DB 커서에서 한 번에 가져올 행 수
+
+@router.post("/model-realtime/incremental", response_model=ModelBacktestResult, summary="모델별 증분 백테스팅")
+def run_incremental_model_backtest(
+    params: IncrementalModelBacktestParameters,
+    db: Session = Depends(get_db)
+):
+    """
+    (모델, 파라미터) 별로 저장된 백테스팅 상태를 이어받아 마지막 처리 ID 이후의 새 데이터만 계산합니다.
+
+    롤링 윈도우 버퍼, PPM 기울기 이력, 누적 지표, 워터마크를 저장해 두므로 갱신 비용은 새 데이터 양에 비례합니다.
+    결과 시계열은 최근 max_records 개 포인트를 반환합니다.
+    """
+    validate_model_backtest_params(params)
+    if params.chunk_rows < 100 or params.chunk_rows > 100000:
+        raise HTTPException(status_code=400, detail="Chunk rows must be between 100 and 100000")
+
+    timer = StageTimer("model-realtime-incremental")
+    detector_key = {}
+    if params.detector != "none":
+        # 검출기 상태도 저장되므로 검출기 설정이 다르면 별도 상태로 관리
+        detector_key = {
+            "detector": params.detector,
+            "ewma_lambda": params.ewma_lambda,
+            "ewma_limit": params.ewma_limit,
+            "cusum_k": params.cusum_k,
+            "cusum_h": params.cusum_h
+        }
+    if params.multivariate:
+        detector_key.update(multivariate=True, t2_alpha=params.t2_alpha)
+    key = backtest_state_store.make_key(
+        model_name=params.model_name,
+        window_size=params.window_size,
+        z_threshold=params.z_threshold,
+        prediction_horizon=params.prediction_horizon,
+        **detector_key
+    )
+
+    with backtest_state_store.key_lock(key):
+        state = None if params.reset else backtest_state_store.get(key)
+        if state is None:
+            state = IncrementalBacktestState(
+                params.window_size,
+                params.max_records,
+                len(PHASE_ANGLE_COLUMNS),
+                build_detector(params, params.window_size),
+                multivariate_t2_alpha(params)
+            )
+        state.resize_series(params.max_records)
+
+        query = """
+        SELECT id, d000, d072, d077, d082, d087, d092, d097, create_time
+        FROM HANDY_ZSCORE_RAW_DATA 
+        WHERE d001 = :model_name 
+        AND d072 IS NOT NULL AND d077 IS NOT NULL 
+        AND d082 IS NOT NULL AND d087 IS NOT NULL 
+        AND d092 IS NOT NULL AND d097 IS NOT NULL
+        """
+        query_params: Dict[str, Any] = {"model_name": params.model_name}
+        if state.last_id is not None:
+            query += " AND id > :last_id"
+            query_params["last_id"] = state.last_id
+        # 워터마크가 id 이므로 id 순서로 처리해야 create_time 이 id 와 어긋난 행을 건너뛰거나 두 번 처리하지 않음
+        query += " ORDER BY id ASC"
+
+        new_records = 0
+        try:
+            with timer.stage("query"):
+                result = db.execute(
+                    text(query).execution_options(stream_results=True, yield_per=params.chunk_rows),
+                    query_params
+                )
+                partitions = result.partitions(params.chunk_rows)
+            while True:
+                with timer.stage("fetch"):
+                    rows = next(partitions, None)
+                if rows is None:
+                    break
+                chunk_start = state.angle_state.rows_seen
+                with timer.stage("parse"):
+                    angles = np.column_stack([
+                        parse_angle_column([getattr(row, col) for row in rows]) for col in PHASE_ANGLE_COLUMNS
+                    ])
+                with timer.stage("compute"):
+                    stats_chunk = state.angle_state.process_chunk(angles)
+                    state.metrics.add_batch(
+                        np.round(stats_chunk["ppm"], 2),
+                        np.round(stats_chunk["ppm_slope"], 4),
+                        stats_chunk.get("drift_signal"),
+                        stats_chunk.get("t2_signal")
+                    )
+                    state.series.extend(
+                        point.dict() for point in build_chunk_points(rows, angles, stats_chunk, chunk_start, params.window_size)
+                    )
+
+                chunk_max_id = max(row.id for row in rows)
+                state.last_id = chunk_max_id if state.last_id is None else max(state.last_id, chunk_max_id)
+                new_records += len(rows)
+                state.total_records += len(rows)
+        except Exception as e:
+            db.rollback()
+            # 처리 도중 실패한 상태는 저장하지 않고, 다음 요청에서 저장본부터 다시 시작
+            backtest_state_store.forget(key)
+            timer.finish("error")
+            raise HTTPException(status_code=500, detail=f"Incremental model backtest failed: {str(e)}")
+
+        backtest_state_store.save(key, state)
+
+    if state.total_records < params.window_size + params.prediction_horizon:
+        timer.finish("insufficient_data")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient data: need {params.window_size + params.prediction_horizon}, got {state.total_records}"
+        )
+
+    processing_info = build_model_processing_info(params, state.metrics.count, state.total_records)
+    processing_info.update({
+        "incremental": True,
+        "new_records": new_records,
+        "last_processed_id": state.last_id,
+        "timing_ms": timer.as_dict()
+    })
+    timer.finish()
+
+    return ModelBacktestResult(
+        model_name=params.model_name,
+        total_records=state.total_records,
+        processed_records=state.metrics.count,
+        phase_angle_data=list(state.series),
+        performance_metrics=state.metrics.as_dict(),
+        processing_info=processing_info
+    )
+
+class BatchModelBacktestParameters(BaseModel):
+    """여러 모델 일괄 백테스팅 파라미터"""
+    model_names: Union[List[str], str] = "all"  # 모델명 목록 또는 "all" (전체 모델)
+    window_size: int = 50
+    z_threshold: float = 2.0
+    prediction_horizon: int = 10
+    max_records: int = 1000  # 모델별 최대 처리할 레코드 수
+    include_series: bool = False  # True 이면 모델별 시계열(phase_angle_data)도 반환
+
+class ModelBacktestSummary(BaseModel):
+    """일괄 백테스팅의 모델별 결과"""
+    model_name: str
+    status: str  # success, insufficient_data, error
+    detail: Optional[str] = None
+    total_records: int = 0
+    processed_records: int = 0
+    latest_quality_status: Optional[str] = None
+    performance_metrics: Dict[str, float] = {}
+    phase_angle_data: Optional[List[PhaseAngleData]] = None
+
+MAX_BATCH_MODELS = 200
+
+# 모델별 계산을 병렬로 수행할 스레드 수
+BATCH_BACKTEST_WORKERS = int(os.getenv("BACKTEST_BATCH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+@router.post("/model-realtime/batch", summary="여러 모델 일괄 실시간 백테스팅")
+def run_batch_model_backtest_endpoint(
+    params: BatchModelBacktestParameters,
+    use_cache: bool = Query(True, description="결과 캐시 사용 여부"),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
+    db: Session = Depends(get_db)
+):
+    """
+    여러 모델(또는 전체 모델)의 실시간 백테스팅을 한 번에 수행합니다.
+
+    모든 모델의 최근 max_records 개 위상각 데이터를 모델별로 파티션된 단일 쿼리로 조회하고,
+    모델별 시계열 계산은 병렬로 수행합니다. 기본적으로 모델별 요약만 반환하며
+    include_series=true 이면 모델별 시계열도 함께 반환합니다.
+    """
+    model_names = resolve_batch_model_names(params)
+    timer = StageTimer("model-realtime-batch")
+    return cached_response(
+        backtest_cache.make_key("model-realtime-batch", {**params.dict(), "model_names": model_names}),
+        get_batch_raw_data_watermark(db, model_names),
+        lambda: run_batch_model_backtest(params, model_names, db, timer),
+        use_cache,
+        output_format,
+        "models",
+        timer
+    )
+
+def resolve_batch_model_names(params: BatchModelBacktestParameters) -> Optional[List[str]]:
+    """일괄 백테스팅 대상 모델 목록을 검증합니다. "all" 이면 None 을 반환합니다."""
+    if params.window_size < 10 or params.window_size > 1000:
+        raise HTTPException(status_code=400, detail="Window size must be between 10 and 1000")
+    if params.max_records < 100 or params.max_records > 5000:
+        raise HTTPException(status_code=400, detail="Max records must be between 100 and 5000")
+
+    if isinstance(params.model_names, str):
+        if params.model_names.strip().lower() != "all":
+            raise HTTPException(status_code=400, detail='model_names must be a list of models or "all"')
+        return None
+
+    model_names = sorted({name.strip() for name in params.model_names if name and name.strip()})
+    if not model_names:
+        raise HTTPException(status_code=400, detail="At least one model name is required")
+    if len(model_names) > MAX_BATCH_MODELS:
+        raise HTTPException(status_code=400, detail=f"Too many models: {len(model_names)} (max {MAX_BATCH_MODELS})")
+    return model_names
+
+def get_batch_raw_data_watermark(db: Session, model_names: Optional[List[str]]):
+    """대상 모델들의 원본 데이터 최대 ID (캐시 무효화용)"""
+    query = db.query(func.max(HandyRawData.id))
+    if model_names is not None:
+        query = query.filter(HandyRawData.d001.in_(model_names))
+    return query.scalar()
+
+def fetch_batch_model_records(db: Session, model_names: Optional[List[str]], max_records: int, timer: Optional[StageTimer] = None):
+    """
+    대상 모델들의 위상각 원본 데이터를 모델별 최대 max_records 개씩 단일 쿼리로 조회합니다.
+    결과는 모델명, 시간순으로 정렬되어 있습니다.
+    """
+    model_filter = "AND d001 IN :model_names" if model_names is not None else "AND d001 IS NOT NULL"
+    query = text(f"""
+    SELECT id, d000, d001, d072, d077, d082, d087, d092, d097, create_time FROM (
+        SELECT id, d000, d001, d072, d077, d082, d087, d092, d097, create_time,
+               ROW_NUMBER() OVER (PARTITION BY d001 ORDER BY create_time ASC, id ASC) AS rn
+        FROM HANDY_ZSCORE_RAW_DATA 
+        WHERE d072 IS NOT NULL AND d077 IS NOT NULL 
+        AND d082 IS NOT NULL AND d087 IS NOT NULL 
+        AND d092 IS NOT NULL AND d097 IS NOT NULL
+        {model_filter}
+    ) WHERE rn <= :max_records
+    ORDER BY d001, rn
+    """)
+    query_params: Dict[str, Any] = {"max_records": max_records}
+    if model_names is not None:
+        query = query.bindparams(bindparam("model_names", expanding=True))
+        query_params["model_names"] = model_names
+
+    try:
+        with timed_stage(timer, "query"):
+            result = db.execute(query, query_params)
+        with timed_stage(timer, "fetch"):
+            return result.fetchall()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+
+def compute_model_summary(model_name: str, rows, params: BatchModelBacktestParameters) -> ModelBacktestSummary:
+    """한 모델의 조회 결과로 시계열을 계산하고 요약합니다. /model-realtime 과 같은 결과를 배열 단위로 계산합니다."""
+    required = params.window_size + params.prediction_horizon
+    if len(rows) < required:
+        return ModelBacktestSummary(
+            model_name=model_name,
+            status="insufficient_data",
+            detail=f"Insufficient data: need {required}, got {len(rows)}",
+            total_records=len(rows)
+        )
+
+    try:
+        angles = np.column_stack([
+            parse_angle_column([getattr(row, col) for row in rows]) for col in PHASE_ANGLE_COLUMNS
+        ])
+        state = PhaseAngleBacktestState(params.window_size, num_columns=len(PHASE_ANGLE_COLUMNS))
+        stats_chunk = state.process_chunk(angles)
+
+        metrics = PhaseAngleMetricsAccumulator()
+        metrics.add_batch(np.round(stats_chunk["ppm"], 2), np.round(stats_chunk["ppm_slope"], 4))
+
+        latest_quality_status = None
+        if len(stats_chunk["ppm"]):
+            latest_slope = stats_chunk["ppm_slope"][-1]
+            latest_quality_status, _ = determine_quality_status(
+                float(stats_chunk["ppm"][-1]), None if np.isnan(latest_slope) else float(np.round(latest_slope, 4))
+            )
+
+        return ModelBacktestSummary(
+            model_name=model_name,
+            status="success",
+            total_records=len(rows),
+            processed_records=metrics.count,
+            latest_quality_status=latest_quality_status,
+            performance_metrics=metrics.as_dict(),
+            phase_angle_data=(
+                build_chunk_points(rows, angles, stats_chunk, 0, params.window_size)
+                if params.include_series else None
+            )
+        )
+    except Exception as e:
+        return ModelBacktestSummary(
+            model_name=model_name,
+            status="error",
+            detail=f"Model backtest failed: {str(e)}",
+            total_records=len(rows)
+        )
+
+def run_batch_model_backtest(
+    params: BatchModelBacktestParameters,
+    model_names: Optional[List[str]],
+    db: Session,
+    timer: Optional[StageTimer] = None
+):
+    """
+    대상 모델들의 데이터를 한 번에 조회하고 모델별 백테스팅을 병렬로 수행합니다.
+    모델별 위상각 변환과 계산은 병렬로 함께 수행되므로 그 경과 시간은 compute 단계로 기록됩니다.
+    """
+    timer = timer or StageTimer("model-realtime-batch")
+    raw_records = fetch_batch_model_records(db, model_names, params.max_records, timer)
+    with timer.stage("parse"):
+        records_by_model = {name: list(rows) for name, rows in groupby(raw_records, key=lambda row: row.d001)}
+    del raw_records
+
+    # 요청한 모델 중 데이터가 없는 모델도 결과에 포함
+    for name in model_names or []:
+        records_by_model.setdefault(name, [])
+
+    model_items = sorted(records_by_model.items())
+    with timer.stage("compute"):
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_BACKTEST_WORKERS, len(model_items)))) as executor:
+            summaries = list(executor.map(lambda item: compute_model_summary(item[0], item[1], params), model_items))
+
+    return {
+        "total_models": len(summaries),
+        "successful_models": sum(1 for summary in summaries if summary.status == "success"),
+        "models": summaries,
+        "processing_info": {
+            "window_size": params.window_size,
+            "z_threshold": params.z_threshold,
+            "prediction_horizon": params.prediction_horizon,
+            "max_records_per_model": params.max_records,
+            "phase_angles_monitored": len(PHASE_ANGLE_COLUMNS),
+            "total_records": sum(summary.total_records for summary in summaries),
+            "timing_ms": timer.as_dict()
+        }
+    }
+
+def ndjson_line(record: Dict[str, Any]) -> bytes:
+    """레코드를 NDJSON 한 줄로 직렬화합니다."""
+    return json.dumps(jsonable_encoder(record), ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
 def calculate_predicted_ppm_value(measurements, usl=0.25, lsl=-0.25):
     """PPM 계산 함수 (예외처리 강화)"""
     try:
         # 입력값 검증
-        if not measurements or len(measurements) < 2:
+        if measurements is None or len(measurements) < 2:
             return 0.0
         
-        # 유효한 숫자값들만 필터링
+        # 유효한 숫자값들만 사용하여 통계 계산 (NaN/Inf, 숫자가 아닌 값 제외)
         valid_measurements = []
         for m in measurements:
             try:
-                val = float(m)
-                if not (np.isnan(val) or np.isinf(val)):
-                    valid_measurements.append(val)
+                valid_measurements.append(float(m))
             except (ValueError, TypeError):
                 continue
+        count, mean_val, std_val = finite_mean_std(valid_measurements, ddof=1)
         
-        if len(valid_measurements) < 2:
-            return 0.0
+        return predicted_ppm_from_stats(mean_val, std_val, count, usl, lsl)
         
-        # 통계 계산
-        mean_val = np.mean(valid_measurements)
-        std_val = np.std(valid_measurements, ddof=1)
+    except Exception as e:
+        logger.warning("PPM calculation error: %s", e)
+        return 0.0
+
+def predicted_ppm_from_stats(mean_val: float, std_val: float, count: int, usl=0.25, lsl=-0.25):
+    """평균/표준편차로부터 규격(USL/LSL) 이탈 확률을 PPM 으로 계산합니다."""
+    try:
+        if count < 2:
+            return 0.0
         
         # 표준편차가 0이거나 매우 작은 경우
         if std_val == 0 or std_val < 1e-10:
@@ -785,10 +1629,15 @@ def calculate_predicted_ppm_value(measurements, usl=0.25, lsl=-0.25):
         return min(ppm, 1_000_000)  # 최대값 제한
         
     except Exception as e:
-        print(f"Warning: PPM calculation error: {e}")
+        logger.warning("PPM calculation error: %s", e)
         return 0.0
 
-def determine_quality_status(ppm: float, slope: Optional[float] = None):
+def determine_quality_status(
+    ppm: float,
+    slope: Optional[float] = None,
+    drift_signal: Optional[bool] = None,
+    t2_signal: Optional[bool] = None
+):
     """
     PPM과 기울기를 기반으로 품질 상태를 판정합니다.
     
@@ -797,7 +1646,8 @@ def determine_quality_status(ppm: float, slope: Optional[float] = None):
     - WARNING: 500000 <= PPM < 1500000 (0.05% ~ 0.15%)
     - CRITICAL: PPM >= 1500000 (0.15% 이상)
     
-    추가로 기울기가 양수이고 큰 경우 경고 수준을 높입니다.
+    추가로 기울기가 양수이고 큰 경우 경고 수준을 높이며,
+    변화 감지 검출기(EWMA/CUSUM) 또는 다변량 T² 가 신호를 낸 경우 OK 를 WARNING 으로 높입니다.
     """
     try:
         # 현실적인 PPM 기반 판정 (더 높은 임계값 사용)
@@ -815,6 +1665,10 @@ def determine_quality_status(ppm: float, slope: Optional[float] = None):
             elif status == "WARNING":
                 status = "CRITICAL"
         
+        # 변화 감지 신호 (PPM 이 오르기 전에 평균 이동을 먼저 감지)
+        if (drift_signal or t2_signal) and status == "OK":
+            status = "WARNING"
+        
         # 불량 확률 계산 (새로운 임계값에 맞춘 현실적인 로지스틱 함수)
         # PPM 값에 따른 확률 계산 - 더 점진적인 증가
         if ppm < 100000:  # 0.01% 미만
@@ -836,7 +1690,7 @@ def determine_quality_status(ppm: float, slope: Optional[float] = None):
         return status, defect_prob
         
     except Exception as e:
-        print(f"Warning: Quality status determination failed: {e}")
+        logger.warning("Quality status determination failed: %s", e)
         return "UNKNOWN", 0.0
 
 def calculate_ppm_slope_value(ppm_history):
@@ -872,7 +1726,7 @@ def calculate_ppm_slope_value(ppm_history):
         try:
             slope, _ = np.polyfit(x, y, 1)
         except (np.linalg.LinAlgError, ValueError) as e:
-            print(f"Warning: Polyfit failed: {e}")
+            logger.warning("Polyfit failed: %s", e)
             return 0.0
         
         # 기울기 값 검증
@@ -885,5 +1739,5 @@ def calculate_ppm_slope_value(ppm_history):
         return float(slope)
         
     except Exception as e:
-        print(f"Warning: PPM slope calculation error: {e}")
+        logger.warning("PPM slope calculation error: %s", e)
         return 0.0 
\ No newline at end of file
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from ..core.database import get_db
 from ..models.handy_raw import HandyRawData, HandyColumnMapper
 from ..models.analysis import Product, CamMeasurement
+from ..services import wire_format
 
 router = APIRouter(
     prefix="/raw-data",
@@ -124,6 +125,7 @@ def get_raw_data_list(
 def get_mapped_raw_data(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
     db: Session = Depends(get_db)
 ):
     """매핑된 컬럼 이름으로 로우 데이터를 조회합니다."""
@@ -162,11 +164,14 @@ def get_mapped_raw_data(
         
         items.append(mapped_data)
     
-    return {
+    response = {
         "total": total,
         "items": items,
         "column_mapping": mapper_dict  # 프론트엔드에서 컬럼 정의에 사용할 수 있도록
     }
+    if output_format != "json":
+        return wire_format.encoded_response(response, output_format, "items")
+    return response
 
 @router.get("/infinite-scroll", response_model=InfiniteScrollResponse, summary="무한스크롤용 매핑된 로우 데이터 조회")
 def get_infinite_scroll_data(
@@ -174,6 +179,7 @@ def get_infinite_scroll_data(
     limit: int = Query(50, ge=10, le=200, description="가져올 데이터 개수"),
     direction: str = Query("forward", regex="^(forward|backward)$", description="스크롤 방향"),
     start_row: Optional[int] = Query(None, description="AG Grid 호환: 시작 행 번호"),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
     db: Session = Depends(get_db)
 ):
     """
@@ -258,7 +264,7 @@ def get_infinite_scroll_data(
         next_cursor = items[-1]["id"] if has_more else None
         prev_cursor = items[0]["id"]
     
-    return InfiniteScrollResponse(
+    response = InfiniteScrollResponse(
         items=items,
         next_cursor=next_cursor,
         prev_cursor=prev_cursor,
@@ -266,6 +272,9 @@ def get_infinite_scroll_data(
         total_count=total_count,
         column_mapping=mapper_dict
     )
+    if output_format != "json":
+        return wire_format.encoded_response(response, output_format, "items")
+    return response
 
 @router.get("/processed", summary="가공된 데이터 목록 조회")
 def get_processed_data_list(
@@ -661,6 +670,7 @@ def get_model_data(
     limit: int = Query(100, le=1000),
     date_from: Optional[str] = Query(None, description="시작 날짜 (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="종료 날짜 (YYYY-MM-DD)"),
+    output_format: str = Query("json", alias="format", regex=wire_format.FORMAT_PATTERN, description="응답 포맷 (json, columnar, msgpack, arrow)"),
     db: Session = Depends(get_db)
 ):
     """특정 모델의 데이터를 조회합니다."""
@@ -729,12 +739,15 @@ def get_model_data(
                 
             items.append(item)
         
-        return {
+        response = {
             "total": total,
             "items": items,
             "model_name": model_name,
             "column_mapping": model_mapping.column_mappings
         }
+        if output_format != "json":
+            return wire_format.encoded_response(response, output_format, "items")
+        return response
         
     except Exception as e:
         if isinstance(e, HTTPException):
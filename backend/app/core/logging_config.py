@@ -0,0 +1,25 @@
+import logging
+import os
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# 애플리케이션 패키지 로거 이름 (실행 방식에 따라 "app" 또는 "backend.app")
+APP_LOGGER_NAME = __name__.rsplit(".", 2)[0]
+
+
+def configure_logging():
+    """
+    LOG_LEVEL 환경 변수(DEBUG, INFO, WARNING, ERROR, 기본값 INFO)로 애플리케이션 로그 레벨을 설정합니다.
+    레코드 단위 상세 로그는 DEBUG 레벨에서만 출력됩니다.
+    """
+    level_name = os.getenv("LOG_LEVEL", "INFO").upper()
+    level = getattr(logging, level_name, logging.INFO)
+
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    app_logger.setLevel(level)
+    if not app_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        app_logger.addHandler(handler)
+        # uvicorn 루트 로거에 중복 출력하지 않음
+        app_logger.propagate = False
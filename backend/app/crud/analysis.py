@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from .. import models
 from ..schemas import analysis as schemas_analysis
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import numpy as np
+
+from ..services.stage_timing import timed_stage
 
 def get_product_by_barcode(db: Session, barcode: str):
     """
@@ -81,6 +84,50 @@ def get_analysis_history(
         for result in results
     ]
 
+def bulk_insert_distribution_analysis(db: Session, records: List[Dict[str, Any]]) -> int:
+    """
+    실시간 분석 결과를 HANDY_DISTR_ANALYSIS 에 한 번에 저장하고 커밋합니다.
+    records 는 analyzed_at, cam_number, metric_type, mean, std_dev, predicted_ppm, ppm_slope 키를 가진 딕셔너리 목록입니다.
+    """
+    if not records:
+        return 0
+    db.bulk_insert_mappings(models.analysis.DistributionAnalysis, records)
+    db.commit()
+    return len(records)
+
+def bulk_insert_alarms(db: Session, records: List[Dict[str, Any]]) -> int:
+    """실시간 알람을 HANDY_ALARMS 에 한 번에 저장하고 커밋합니다."""
+    if not records:
+        return 0
+    db.bulk_insert_mappings(models.analysis.Alarm, records)
+    db.commit()
+    return len(records)
+
+def get_recent_alarms(db: Session, cam_number: Optional[int] = None, limit: int = 100):
+    """
+    최근 알람을 최신순으로 조회합니다.
+    """
+    query = db.query(models.analysis.Alarm)
+    if cam_number is not None:
+        query = query.filter(models.analysis.Alarm.cam_number == cam_number)
+    results = query.order_by(models.analysis.Alarm.created_at.desc()).limit(limit).all()
+    return [
+        {
+            "id": result.id,
+            "alarm_type": result.alarm_type,
+            "level": result.level,
+            "message": result.message,
+            "model_name": result.model_name,
+            "cam_number": result.cam_number,
+            "metric": result.metric_type,
+            "value": result.value,
+            "threshold": result.threshold,
+            "measurement_id": result.measurement_id,
+            "created_at": result.created_at.isoformat()
+        }
+        for result in results
+    ]
+
 def get_process_distribution(
     db: Session,
     metric: str = "angle"
@@ -114,4 +161,209 @@ def get_process_distribution(
             "std_dev": result.std_dev
         }
         for result in results
-    ] 
\ No newline at end of file
+    ] 
+
+def get_measurement_columns(
+    db: Session,
+    cam_numbers: List[int],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    timer=None
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    요청된 모든 캠의 측정값을 단일 쿼리로 조회하여 캠별 numpy 배열로 반환합니다.
+
+    필요한 컬럼(cam_number, timestamp, angle_value, torque_value, allowance)만 조회하며,
+    ORM 객체를 만들지 않습니다. 각 캠의 배열은 timestamp 순으로 정렬되며 NULL 은 NaN 으로 변환됩니다.
+    timer(StageTimer)가 주어지면 쿼리 실행(query), 행 수신(fetch), 배열 변환(parse) 시간을 기록합니다.
+    """
+    CamMeasurement = models.analysis.CamMeasurement
+    Product = models.analysis.Product
+
+    query = db.query(
+        CamMeasurement.cam_number,
+        Product.timestamp,
+        CamMeasurement.angle_value,
+        CamMeasurement.torque_value,
+        CamMeasurement.allowance
+    ).join(
+        Product, CamMeasurement.product_id == Product.id
+    ).filter(
+        CamMeasurement.cam_number.in_(cam_numbers)
+    )
+
+    if start_date:
+        query = query.filter(Product.timestamp >= datetime.strptime(start_date, '%Y-%m-%d'))
+    if end_date:
+        query = query.filter(Product.timestamp < datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+
+    with timed_stage(timer, "query"):
+        result = db.execute(query.order_by(CamMeasurement.cam_number, Product.timestamp, CamMeasurement.id).statement)
+    with timed_stage(timer, "fetch"):
+        rows = result.all()
+
+    columns = {cam_number: _empty_measurement_columns() for cam_number in cam_numbers}
+    if not rows:
+        return columns
+
+    with timed_stage(timer, "parse"):
+        cams, timestamps, angles, torques, allowances = zip(*rows)
+        cams = np.asarray(cams, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+        angles = np.asarray(angles, dtype=np.float64)
+        torques = np.asarray(torques, dtype=np.float64)
+        allowances = np.asarray(allowances, dtype=np.float64)
+
+    # cam_number 순으로 정렬되어 있으므로 경계 위치로 분할
+    unique_cams, starts = np.unique(cams, return_index=True)
+    ends = list(starts[1:]) + [len(cams)]
+    for cam_number, start, end in zip(unique_cams, starts, ends):
+        columns[int(cam_number)] = {
+            "timestamp": timestamps[start:end],
+            "angle": angles[start:end],
+            "torque": torques[start:end],
+            "allowance": allowances[start:end]
+        }
+    return columns
+
+def _empty_measurement_columns() -> Dict[str, np.ndarray]:
+    return {
+        "timestamp": np.empty(0, dtype="datetime64[us]"),
+        "angle": np.empty(0),
+        "torque": np.empty(0),
+        "allowance": np.empty(0)
+    }
+
+def get_measurement_counts_by_cam(db: Session, cam_numbers: List[int]) -> Dict[int, int]:
+    """진단용: 캠별 전체 측정 데이터 개수를 단일 GROUP BY 쿼리로 조회합니다."""
+    from sqlalchemy import func
+
+    CamMeasurement = models.analysis.CamMeasurement
+    rows = db.query(CamMeasurement.cam_number, func.count(CamMeasurement.id)).filter(
+        CamMeasurement.cam_number.in_(cam_numbers)
+    ).group_by(CamMeasurement.cam_number).all()
+    return {cam_number: count for cam_number, count in rows}
+
+def metric_series(cam_columns: Dict[str, np.ndarray], metric: str):
+    """캠 컬럼 배열에서 지정한 메트릭의 유효한(NULL 이 아닌) 값과 해당 allowance 를 반환합니다."""
+    if metric not in ("angle", "torque"):
+        raise ValueError(f"Unknown metric: {metric}")
+    values = cam_columns[metric]
+    valid = ~np.isnan(values)
+    return values[valid], cam_columns["allowance"][valid]
+
+# 메트릭 이름과 CamMeasurement 컬럼 이름 매핑
+METRIC_COLUMNS = {"angle": "angle_value", "torque": "torque_value"}
+
+def _measurement_rows_query(db: Session):
+    CamMeasurement = models.analysis.CamMeasurement
+    Product = models.analysis.Product
+    return db.query(
+        CamMeasurement.id,
+        Product.model_name,
+        CamMeasurement.cam_number,
+        Product.timestamp,
+        CamMeasurement.angle_value,
+        CamMeasurement.torque_value,
+        CamMeasurement.allowance,
+        Product.line_info
+    ).join(
+        Product, CamMeasurement.product_id == Product.id
+    )
+
+def get_latest_measurement_rows(db: Session, per_cam: int):
+    """
+    (모델, 캠) 별 최근 per_cam 개 측정값을 단일 쿼리로 조회합니다 (캐시 초기 적재용).
+    결과는 모델, 캠, 측정 ID 순으로 정렬됩니다.
+    """
+    from sqlalchemy import func
+
+    CamMeasurement = models.analysis.CamMeasurement
+    Product = models.analysis.Product
+
+    ranked = _measurement_rows_query(db).add_columns(
+        func.row_number().over(
+            partition_by=(Product.model_name, CamMeasurement.cam_number),
+            order_by=CamMeasurement.id.desc()
+        ).label("rn")
+    ).subquery()
+
+    return db.query(
+        ranked.c.id, ranked.c.model_name, ranked.c.cam_number, ranked.c.timestamp,
+        ranked.c.angle_value, ranked.c.torque_value, ranked.c.allowance, ranked.c.line_info
+    ).filter(
+        ranked.c.rn <= per_cam
+    ).order_by(ranked.c.model_name, ranked.c.cam_number, ranked.c.id).all()
+
+def get_measurement_rows_after(db: Session, last_id: Optional[int], limit: Optional[int] = None):
+    """측정 ID 가 last_id 보다 큰(새로 적재된) 측정값을 ID 순으로 조회합니다. limit 를 지정하면 앞에서부터 limit 개만 조회합니다."""
+    CamMeasurement = models.analysis.CamMeasurement
+    query = _measurement_rows_query(db)
+    if last_id is not None:
+        query = query.filter(CamMeasurement.id > last_id)
+    query = query.order_by(CamMeasurement.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def get_max_measurement_id(db: Session) -> Optional[int]:
+    from sqlalchemy import func
+    return db.query(func.max(models.analysis.CamMeasurement.id)).scalar()
+
+def get_recent_measurements(
+    db: Session,
+    model_name: str,
+    cam_number: int,
+    metric: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    모델/캠/메트릭의 측정값(NULL 제외)을 조회합니다. limit 를 지정하면 구간 내 최근 limit 개만 반환합니다.
+    반환 배열(id, timestamp, value, allowance)은 측정 ID 순으로 정렬됩니다.
+    """
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    CamMeasurement = models.analysis.CamMeasurement
+    Product = models.analysis.Product
+    value_column = getattr(CamMeasurement, METRIC_COLUMNS[metric])
+
+    query = db.query(
+        CamMeasurement.id, Product.timestamp, value_column, CamMeasurement.allowance
+    ).join(
+        Product, CamMeasurement.product_id == Product.id
+    ).filter(
+        Product.model_name == model_name,
+        CamMeasurement.cam_number == cam_number,
+        value_column.isnot(None)
+    )
+    if start is not None:
+        query = query.filter(Product.timestamp >= start)
+    if end is not None:
+        query = query.filter(Product.timestamp < end)
+
+    if limit is not None:
+        rows = query.order_by(CamMeasurement.id.desc()).limit(limit).all()[::-1]
+    else:
+        rows = query.order_by(CamMeasurement.id).all()
+
+    if not rows:
+        return empty_readings()
+
+    ids, timestamps, values, allowances = zip(*rows)
+    return {
+        "id": np.asarray(ids, dtype=np.int64),
+        "timestamp": np.asarray(timestamps, dtype="datetime64[us]"),
+        "value": np.asarray(values, dtype=np.float64),
+        "allowance": np.asarray(allowances, dtype=np.float64)
+    }
+
+def empty_readings() -> Dict[str, np.ndarray]:
+    return {
+        "id": np.empty(0, dtype=np.int64),
+        "timestamp": np.empty(0, dtype="datetime64[us]"),
+        "value": np.empty(0),
+        "allowance": np.empty(0)
+    }
@@ -1,61 +1,221 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.database import engine
+from .core.logging_config import configure_logging
 from .models import analysis # 우리가 생성한 모델 파일
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from .core.database import get_db
+from .core.database import get_db, SessionLocal
 from .services import transformation as transformation_service
 from .crud import raw_data as raw_data_crud # raw_data crud 필요
+from .services.recent_readings import recent_readings_cache
+from .services.live_analysis import live_analyzer
+from .services.live_checkpoint import live_checkpoint
+from .services.live_bus import CONTROL_TOPIC, UPDATES_TOPIC, live_role
+from .services.live_fanout import PendingFrame, live_fanout
+from .services.live_alarms import ALARM_EVENT, live_alarm_engine, live_alarm_writer, live_recent_alarms
+from .services.live_history import live_history_writer
+from .services.live_metrics import live_loop_lag, live_tick_timings
+from .services.live_frames import (
+    FRAME_EVENT, RESYNC_EVENT, SNAPSHOT_EVENT, encode_frame, frame_formats_available, snapshot_message
+)
+from .services.live_subscriptions import live_subscriptions, parse_room, series_rooms
 from .api import data as data_router # 데이터 라우터 추가
 from .api import analysis as analysis_router # 분석 라우터 추가
 from .api import backtest as backtest_router # 백테스팅 라우터 추가
 from .api import raw_data as raw_data_router # 로우 데이터 라우터 추가
 import socketio
 import asyncio
-from datetime import datetime, timedelta
-import random
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs
+import logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# 실시간 분석 주기 (초)
+LIVE_ANALYSIS_INTERVAL_SECONDS = float(os.getenv("LIVE_ANALYSIS_INTERVAL_SECONDS", "5"))
+
+# 실시간 분석 주기 계산 전용 스레드 (주기는 순서대로 실행되며, 기본 스레드 풀의 다른 작업과 경쟁하지 않음)
+live_tick_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-tick")
+
+def run_live_tick(rooms):
+    """
+    한 주기의 계산을 모두 수행합니다: 새 측정값 분석, 알람 평가, 저장 버퍼 적재, room 별 프레임 생성과 인코딩, 상태 체크포인트 저장.
+    DB 조회와 numpy/scipy 계산이 이벤트 루프를 막지 않도록 live_tick_executor 에서 실행하며,
+    이벤트 루프는 반환된 결과를 버스와 클라이언트 전송 큐에 넣기만 합니다.
+    """
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if not live_analyzer.warmed:
+            # 체크포인트가 있으면 상태를 복원하여 워터마크 이후 측정값만 반영 (없으면 poll 이 최근 이력으로 적재)
+            live_checkpoint.restore(db, live_analyzer, live_alarm_engine)
+        updates = live_analyzer.poll(db, rooms)
+    finally:
+        db.close()
+    polled = time.perf_counter()
+    # 알람은 같은 주기 안에 평가 (시계열/규칙별 연속 위반 횟수만 갱신)
+    alarms = live_alarm_engine.evaluate(updates)
+    # HANDY_DISTR_ANALYSIS / HANDY_ALARMS 저장은 버퍼에 넣기만 하고 백그라운드 스레드가 일괄 저장
+    # (이력은 시계열별 결과가 아니라 새 측정값이 들어온 (캠, 메트릭) 별 요약 한 행씩)
+    if live_history_writer.enabled:
+        live_history_writer.add(live_analyzer.cam_summaries())
+    live_alarm_writer.add(alarms)
+    evaluated = time.perf_counter()
+    frames = build_analysis_frames(updates)
+    live_tick_timings.record("poll", polled - start)
+    live_tick_timings.record("alarms", evaluated - polled)
+    live_tick_timings.record("frames", time.perf_counter() - evaluated)
+    # 분석 상태와 알람 연속 위반 횟수는 같은 시점(워터마크) 기준으로 주기적으로 파일에 저장
+    if live_checkpoint.maybe_save(live_analyzer, live_alarm_engine):
+        live_tick_timings.record("checkpoint", live_checkpoint.last_save_seconds)
+    return updates, alarms, frames
+
+async def start_producing():
+    """이 워커가 프로듀서가 되면 버스 브로커(Unix 소켓)와 snapshot 요청 처리 태스크를 시작합니다."""
+    logger.info("실시간 분석 프로듀서 시작: %s (%s)", live_role.worker_id, live_role.role)
+    if live_role.bus is None:
+        return
+    if hasattr(live_role.bus, "start_broker"):
+        await live_role.bus.start_broker()
+    asyncio.create_task(serve_snapshot_requests())
+
+async def serve_snapshot_requests():
+    """새로 시작한 릴레이 워커가 요청하면 모든 시계열의 최신 분석 결과를 보냅니다."""
+    requests = await live_role.bus.subscribe(CONTROL_TOPIC)
+    while True:
+        request = await requests.get()
+        if request.get("kind") == "hello":
+            await live_role.bus.publish(
+                UPDATES_TOPIC,
+                {"kind": "snapshot", "producer": live_role.worker_id, "updates": live_analyzer.latest()}
+            )
 
 # 실시간 분석 데이터를 생성하고 전송하는 백그라운드 태스크
 async def generate_realtime_analysis():
-    """주기적으로 실시간 분석 데이터를 생성하고 클라이언트에게 전송"""
+    """주기적으로 새 측정값을 분석하고, 값이 바뀐 시계열의 결과만 클라이언트에게 전송 (프로듀서 워커만)"""
+    producing = False
     while True:
         try:
-            # 캠별 실시간 분석 데이터 생성 (시뮬레이션)
-            for cam_number in range(1, 10):  # 캠 1-9
-                for metric in ["angle", "torque"]:
-                    # 실제로는 데이터베이스에서 최신 데이터를 분석
-                    analysis_data = {
-                        "analyzed_at": datetime.now().isoformat(),
-                        "cam_number": cam_number,
-                        "metric": metric,
-                        "predicted_ppm": round(random.uniform(100, 600), 2),
-                        "mean": round(random.uniform(-0.1, 0.1), 4),
-                        "std_dev": round(random.uniform(0.03, 0.08), 4),
-                        "ppm_slope": round(random.uniform(-5, 5), 2)
-                    }
-                    
-                    # 웹소켓으로 실시간 데이터 전송
-                    await sio.emit("analysis_updated", analysis_data)
+            if not live_role.try_produce():
+                # 릴레이 워커: 프로듀서가 종료되면 auto 역할이 이어받을 수 있도록 주기마다 다시 시도
+                await asyncio.sleep(LIVE_ANALYSIS_INTERVAL_SECONDS)
+                continue
+            if not producing:
+                producing = True
+                await start_producing()
+
+            # 버스로 다른 워커에 나눠 주거나 알람 규칙이 있으면 구독과 관계없이 새 측정값이 있는 모든 시계열을 분석
+            # (구독하지 않은 시계열도 알람을 평가해야 하므로, 구독 room 은 프레임 생성/전송에만 적용).
+            # 이력 저장은 윈도우 통계만 쓰는 캠별 요약이므로 구독 필터와 관계없음
+            rooms = None if live_role.bus is not None or live_alarm_engine.rules else live_subscriptions.active_rooms()
+            start = time.perf_counter()
+            # 계산은 전용 스레드에서 하고 이벤트 루프는 결과 전송만 담당
+            updates, alarms, frames = await asyncio.get_running_loop().run_in_executor(
+                live_tick_executor, run_live_tick, rooms
+            )
+            emitting = time.perf_counter()
+            live_recent_alarms.extend(alarms)
+            if live_role.bus is not None and updates:
+                await live_role.bus.publish(
+                    UPDATES_TOPIC, {"kind": "updates", "producer": live_role.worker_id, "updates": updates}
+                )
+            if live_role.bus is not None and alarms:
+                await live_role.bus.publish(
+                    UPDATES_TOPIC, {"kind": "alarms", "producer": live_role.worker_id, "alarms": alarms}
+                )
+            # 구독 room 별로 주기당 프레임 하나에 변경된 필드만 구독자별 전송 큐에 넣음 (전송은 기다리지 않음)
+            enqueue_analysis_frames(frames)
+            await broadcast_alarms(alarms)
+            live_tick_timings.record("emit", time.perf_counter() - emitting)
+            live_tick_timings.record("total", time.perf_counter() - start)
             
-            # 5초 간격으로 실행
-            await asyncio.sleep(5)
+            await asyncio.sleep(LIVE_ANALYSIS_INTERVAL_SECONDS)
             
         except Exception as e:
-            print(f"실시간 분석 데이터 생성 중 오류: {e}")
-            await asyncio.sleep(10)  # 오류 시 10초 대기
+            logger.error("실시간 분석 데이터 생성 중 오류: %s", e)
+            await asyncio.sleep(LIVE_ANALYSIS_INTERVAL_SECONDS * 2)  # 오류 시 두 배 대기
+
+async def relay_live_updates():
+    """버스로 받은 프로듀서의 분석 결과를 이 워커에 연결된 클라이언트에게 전송합니다 (프로듀서 자신의 메시지는 제외)."""
+    updates_queue = await live_role.bus.subscribe(UPDATES_TOPIC)
+    hello_sent = False
+    while True:
+        try:
+            if not hello_sent and await live_role.bus.wait_connected(LIVE_ANALYSIS_INTERVAL_SECONDS):
+                await live_role.bus.publish(CONTROL_TOPIC, {"kind": "hello", "worker": live_role.worker_id})
+                hello_sent = True
+            try:
+                message = await asyncio.wait_for(updates_queue.get(), LIVE_ANALYSIS_INTERVAL_SECONDS * 2)
+            except asyncio.TimeoutError:
+                # 아직 snapshot 을 받지 못했으면 (프로듀서가 늦게 시작한 경우) 다시 요청
+                hello_sent = hello_sent and len(live_role.relay) > 0
+                continue
+            if message.get("producer") == live_role.worker_id or live_role.producing:
+                continue
+            if message.get("kind") == "alarms":
+                live_recent_alarms.extend(message["alarms"])
+                await broadcast_alarms(message["alarms"])
+                continue
+            live_role.relay.apply(message["updates"])
+            frames = await asyncio.get_running_loop().run_in_executor(
+                live_tick_executor, build_analysis_frames, message["updates"]
+            )
+            enqueue_analysis_frames(frames)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("실시간 분석 릴레이 중 오류: %s", e)
+            await asyncio.sleep(LIVE_ANALYSIS_INTERVAL_SECONDS)
+
+def warm_recent_readings_cache():
+    """최근 측정값 캐시를 DB 에서 채웁니다. 실패해도 조회 시 DB 로 대체되므로 서비스는 계속 동작합니다."""
+    db = SessionLocal()
+    try:
+        loaded = recent_readings_cache.warm(db)
+        logger.info("최근 측정값 캐시 적재 완료: %s건", loaded)
+    except Exception as e:
+        logger.warning("최근 측정값 캐시 적재 실패: %s", e)
+    finally:
+        db.close()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """애플리케이션 생명주기 관리"""
     # 시작 시 실행
-    print("실시간 분석 데이터 전송 서비스 시작...")
+    logger.info("실시간 분석 데이터 전송 서비스 시작... (역할: %s)", live_role.role)
+    relay_task = None
+    if live_role.bus is not None:
+        await live_role.bus.start()
+        relay_task = asyncio.create_task(relay_live_updates())
+    live_history_writer.start(SessionLocal)
+    live_alarm_writer.start(SessionLocal)
+    lag_task = asyncio.create_task(live_loop_lag.run())
     task = asyncio.create_task(generate_realtime_analysis())
+    # 최근 측정값 캐시는 시작을 지연시키지 않도록 별도 스레드에서 적재
+    warm_task = asyncio.create_task(asyncio.to_thread(warm_recent_readings_cache))
     yield
     # 종료 시 실행
     task.cancel()
-    print("실시간 분석 데이터 전송 서비스 종료...")
+    warm_task.cancel()
+    lag_task.cancel()
+    if relay_task is not None:
+        relay_task.cancel()
+        await live_role.bus.close()
+    # 진행 중인 주기가 끝나 저장 버퍼에 결과를 넣을 때까지 기다린 뒤 남은 분석 결과 저장 (DB 쓰기는 이벤트 루프 밖에서)
+    await asyncio.to_thread(live_tick_executor.shutdown)
+    live_analyzer.close()
+    # 다음 시작 시 워터마크 이후 측정값만 반영하도록 마지막 상태 저장 (프로듀서였던 워커만 해당)
+    await asyncio.to_thread(live_checkpoint.save, live_analyzer, live_alarm_engine)
+    await asyncio.to_thread(live_history_writer.stop)
+    await asyncio.to_thread(live_alarm_writer.stop)
+    live_role.lock.release()
+    logger.info("실시간 분석 데이터 전송 서비스 종료...")
 
 # 애플리케이션 시작 시 DB에 필요한 테이블들을 생성합니다.
 # 우리가 정의한 Product, CamMeasurement, DistributionAnalysis 테이블이 생성됩니다.
@@ -86,6 +246,16 @@ sio = socketio.AsyncServer(
 # FastAPI와 Socket.IO 결합
 socket_app = socketio.ASGIApp(sio, app)
 
+async def send_frame(sid, payload, timeout):
+    """프레임을 보내고 클라이언트 응답(ack)을 기다립니다. 시간 안에 응답하지 않으면 False."""
+    try:
+        await sio.call(FRAME_EVENT, payload, to=sid, timeout=timeout)
+        return True
+    except socketio.exceptions.TimeoutError:
+        return False
+
+live_fanout.bind(send_frame, sio.disconnect)
+
 # API 라우터 등록
 app.include_router(data_router.router)
 app.include_router(analysis_router.router)
@@ -95,17 +265,100 @@ app.include_router(raw_data_router.router)
 # Socket.IO 이벤트 핸들러
 @sio.event
 async def connect(sid, environ):
-    print(f"클라이언트 연결됨: {sid}")
-    await sio.emit("connected", {"message": "웹소켓 연결 성공"}, room=sid)
+    # 연결 URL 의 format 쿼리 파라미터로 프레임 포맷 선택 (예: /socket.io/?format=msgpack)
+    requested = parse_qs(environ.get("QUERY_STRING", "")).get("format", ["json"])[0]
+    fmt = requested if requested in frame_formats_available() else "json"
+    live_subscriptions.add_client(sid, fmt)
+    live_fanout.add_client(sid, fmt)
+    logger.info("클라이언트 연결됨: %s (프레임 포맷: %s)", sid, fmt)
+    await sio.emit(
+        "connected",
+        {"message": "웹소켓 연결 성공", "frame_event": FRAME_EVENT, "frame_format": fmt},
+        room=sid
+    )
+    # 다시 연결한 화면이 다음 주기나 DB 조회를 기다리지 않도록 메모리의 최신 분석 상태를 바로 전송
+    snapshot = snapshot_message(live_role.latest(None, live_analyzer), list(live_recent_alarms))
+    await sio.emit(SNAPSHOT_EVENT, encode_frame(snapshot, fmt), room=sid)
 
 @sio.event
 async def disconnect(sid):
-    print(f"클라이언트 연결 해제됨: {sid}")
+    live_subscriptions.remove_client(sid)
+    live_fanout.remove_client(sid)
+    logger.info("클라이언트 연결 해제됨: %s", sid)
+
+@sio.event
+async def subscribe(sid, data):
+    """
+    모델/라인/캠 room 구독: {"model": "M1"}, {"line": "L1"}, {"cam": 3} 또는 {"room": "cam:3"}.
+    구독 즉시 해당 room 의 전체 값을 담은 키 프레임을 보내며, 이후 프레임은 이 값 기준의 델타입니다.
+    """
+    try:
+        room = parse_room(data)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    encoder, created = live_subscriptions.subscribe(sid, room)
+    # 새 room 은 메모리의 마지막 분석 결과를 기준 값으로 시작 (DB 조회 없음)
+    frame = encoder.reset(live_role.latest([room], live_analyzer)) if created else encoder.snapshot_frame()
+    live_fanout.enqueue(sid, room, PendingFrame({**frame, "room": room}, encoder))
+    logger.info("구독: %s -> %s", sid, room)
+    return {"ok": True, "room": room}
+
+@sio.event
+async def unsubscribe(sid, data):
+    try:
+        room = parse_room(data)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    live_subscriptions.unsubscribe(sid, room)
+    live_fanout.discard(sid, room)
+    return {"ok": True, "room": room}
+
+@sio.on(RESYNC_EVENT)
+async def analysis_resync(sid, data=None):
+    """프레임 seq 가 끊긴 클라이언트에게 room 의 전체 값을 담은 키 프레임을 보냅니다 (room 미지정 시 구독 중인 모든 room)."""
+    subscribed = live_subscriptions.client_rooms(sid)
+    requested = data.get("room") if isinstance(data, dict) else None
+    for room in ([requested] if requested in subscribed else subscribed):
+        encoder = live_subscriptions.encoder(room)
+        if encoder is not None:
+            live_fanout.enqueue(sid, room, PendingFrame({**encoder.snapshot_frame(), "room": room}, encoder))
 
 # 실시간 분석 결과 전송 함수
-async def broadcast_analysis_update(analysis_data):
-    """실시간 분석 결과를 모든 연결된 클라이언트에게 전송"""
-    await sio.emit("analysis_updated", analysis_data)
+def build_analysis_frames(updates) -> List[Tuple[str, PendingFrame]]:
+    """
+    한 주기의 분석 결과를 구독 room 별 델타 프레임으로 묶고, 구독자가 쓰는 포맷으로 미리 인코딩합니다.
+    같은 프레임을 받는 구독자끼리는 포맷별 인코딩 결과를 공유합니다. 이벤트 루프 밖(live_tick_executor)에서 호출합니다.
+    """
+    room_updates: Dict[str, List[dict]] = {}
+    for update in updates:
+        for room in series_rooms(update["model_name"], update.get("line_info"), update["cam_number"]):
+            room_updates.setdefault(room, []).append(update)
+
+    frames = []
+    for room in live_subscriptions.active_rooms():
+        encoder = live_subscriptions.encoder(room)
+        if encoder is None:
+            continue
+        frame = encoder.next_frame(room_updates.get(room, []))
+        if frame is None:
+            continue
+        frame["room"] = room
+        item = PendingFrame(frame, encoder)
+        for fmt in {live_subscriptions.client_format(sid) for sid in live_subscriptions.room_clients(room)}:
+            item.payload(fmt)
+        frames.append((room, item))
+    return frames
+
+def enqueue_analysis_frames(frames):
+    """room 프레임을 현재 구독자별 전송 큐에 넣습니다 (이벤트 루프에서 호출, 전송은 기다리지 않음)."""
+    for room, item in frames:
+        for sid in live_subscriptions.room_clients(room):
+            live_fanout.enqueue(sid, room, item)
+
+async def broadcast_alarms(alarms):
+    """이번 주기에 발생한 알람을 연결된 모든 클라이언트에게 한 번에 전송"""
+    if alarms:
+        await sio.emit(ALARM_EVENT, {"alarms": alarms})
 
 @app.get("/", tags=["Root"])
 def read_root():
@@ -148,6 +401,13 @@ def process_raw_data_range(
         else:
             skipped_count += 1
 
+    # 새로 적재한 측정값을 최근 측정값 캐시에 반영
+    if processed_count > 0:
+        try:
+            recent_readings_cache.refresh(db)
+        except Exception as e:
+            logger.warning("최근 측정값 캐시 갱신 실패: %s", e)
+
     return {
         "message": "Processing complete",
         "total_rows_fetched": len(raw_data_rows),
@@ -66,4 +66,21 @@ class DistributionAnalysis(Base):
     predicted_ppm = Column(Float)
     ppm_slope = Column(Float)
 
-    create_time = Column(DateTime, server_default=func.now()) 
\ No newline at end of file
+    create_time = Column(DateTime, server_default=func.now()) 
+
+
+class Alarm(Base):
+    # db/models.py 의 Alarm 과 같은 구성에 실시간 분석 시계열 정보를 추가한 알람 이력
+    __tablename__ = "HANDY_ALARMS"
+
+    id = Column(Integer, Sequence("HANDY_ALARMS_SEQ"), primary_key=True)
+    alarm_type = Column(String(50), nullable=False)  # ppm, ppm_slope
+    level = Column(String(20), nullable=False)  # CAUTION(주의), WARNING(경고)
+    message = Column(String(255))
+    model_name = Column(String(510))
+    cam_number = Column(Integer)
+    metric_type = Column(String(100))
+    value = Column(Float)  # 알람을 발생시킨 값
+    threshold = Column(Float)
+    measurement_id = Column(Integer)  # 알람 시점의 마지막 측정값 ID
+    created_at = Column(DateTime, nullable=False)
@@ -0,0 +1,217 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .streaming_stats import PrefixSums
+
+# 실제 불량 판정 기준 (label_actual_defects): 허용 오차 기본값, 시그마 배수, 절대값 한계
+DEFAULT_ALLOWANCE = 0.1
+ACTUAL_SIGMA_LIMIT = 3.0
+ABSOLUTE_LIMIT = 0.2
+
+# 표준편차가 이 값보다 작으면 0으로 간주 (calculate_predicted_ppm_value 와 동일)
+STD_EPSILON = 1e-10
+
+
+def rolling_window_stats(values: np.ndarray, window_size: int, prefix: Optional[PrefixSums] = None):
+    """
+    누적합(prefix sum)으로 모든 시점의 직전 window_size 개 데이터 평균/표본표준편차를 계산합니다.
+
+    반환되는 배열의 k 번째 값은 values[k:k+window_size] 구간의 통계이며,
+    즉 시점 i = k + window_size 에서 사용할 과거 윈도우 통계입니다.
+    prefix 로 같은 values 의 PrefixSums 를 넘기면 누적합을 다시 계산하지 않습니다.
+    """
+    mean, std = (prefix or PrefixSums(values)).mean_std(window_size, ddof=1)
+    std[std < STD_EPSILON] = 0.0
+    return mean, std
+
+
+def label_actual_defects(
+    values: np.ndarray,
+    allowances: np.ndarray,
+    reference_mean: np.ndarray,
+    reference_std: np.ndarray,
+) -> np.ndarray:
+    """
+    측정값별 실제 불량 여부를 판정합니다. 다음 중 하나라도 해당하면 불량입니다.
+
+    - 기준 평균과의 차이가 허용 오차(allowance) 초과
+    - 기준 평균/표준편차 대비 |z| 가 ACTUAL_SIGMA_LIMIT(3) 초과 (표준편차가 0 이면 적용하지 않음)
+    - 측정값의 절대값이 ABSOLUTE_LIMIT(0.2) 초과
+    allowance 가 NaN 인 경우 기본 허용 오차(DEFAULT_ALLOWANCE, 0.1)를 사용합니다.
+    """
+    deviation = np.abs(values - reference_mean)
+    allowances = np.where(np.isnan(allowances), DEFAULT_ALLOWANCE, allowances)
+
+    defects = deviation > allowances
+    safe_std = np.where(reference_std > 0, reference_std, 1.0)
+    defects |= (reference_std > 0) & (deviation / safe_std > ACTUAL_SIGMA_LIMIT)
+    defects |= np.abs(values) > ABSOLUTE_LIMIT
+    return defects
+
+
+def z_score_matrix(values: np.ndarray, window_mean: np.ndarray, window_std: np.ndarray, future_index: np.ndarray):
+    """윈도우 통계 기준으로 미래 구간(future_index) 값들의 |Z| 행렬을 계산합니다. std=0 이면 Z=0."""
+    future_values = values[future_index]
+    safe_std = np.where(window_std > 0, window_std, 1.0)[:, None]
+    z_scores = np.abs(future_values - window_mean[:, None]) / safe_std
+    z_scores[window_std == 0] = 0.0
+    return z_scores
+
+
+def backtest_windows(
+    values: np.ndarray,
+    allowances: np.ndarray,
+    window_size: int,
+    prediction_horizon: int,
+    window_stats: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    perform_backtest_improved 의 모든 시점(window_size <= i < n - prediction_horizon)을 한 번에 계산합니다.
+
+    반환 딕셔너리:
+    - starts: 시점 i 배열
+    - window_mean / window_std: 시점별 직전 window_size 개 데이터 통계 (window_size=1 이면 직전 값, 0)
+    - future_index: (시점 수, prediction_horizon) 미래 구간 인덱스
+    - z_scores / actual: 미래 구간의 |Z| 행렬과 실제 불량 라벨 행렬
+    window_stats 로 rolling_window_stats 결과를 넘기면 여러 예측 구간에서 재사용합니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    allowances = np.asarray(allowances, dtype=np.float64)
+    num_windows = max(len(values) - prediction_horizon - window_size, 0)
+
+    starts = np.arange(window_size, window_size + num_windows)
+    future_index = starts[:, None] + np.arange(prediction_horizon)
+
+    if window_size > 1:
+        window_mean, window_std = window_stats if window_stats is not None else rolling_window_stats(values, window_size)
+        window_mean, window_std = window_mean[:num_windows], window_std[:num_windows]
+    else:
+        window_mean, window_std = values[starts - 1], np.zeros(num_windows)
+
+    z_scores = z_score_matrix(values, window_mean, window_std, future_index)
+    actual = label_actual_defects(
+        values[future_index], allowances[future_index], window_mean[:, None], window_std[:, None]
+    )
+    return {
+        "starts": starts,
+        "window_mean": window_mean,
+        "window_std": window_std,
+        "future_index": future_index,
+        "z_scores": z_scores,
+        "actual": actual,
+    }
+
+
+def confusion_counts(predictions: np.ndarray, actuals: np.ndarray):
+    """예측/실제 불량 배열로부터 (tp, fp, tn, fn) 을 bincount 한 번으로 계산합니다."""
+    predictions = np.asarray(predictions, dtype=bool).ravel()
+    actuals = np.asarray(actuals, dtype=bool).ravel()
+    # 0: tn, 1: fn, 2: fp, 3: tp
+    counts = np.bincount(predictions.astype(np.intp) * 2 + actuals, minlength=4)
+    tn, fn, fp, tp = (int(c) for c in counts)
+    return tp, fp, tn, fn
+
+
+def metrics_from_counts(tp: int, fp: int, tn: int, fn: int) -> Dict[str, float]:
+    """혼동 행렬 개수로부터 calculate_performance_metrics 와 동일한 형식의 지표를 계산합니다."""
+    total = tp + fp + tn + fn
+    if total == 0:
+        return {
+            "accuracy": 0.0, "precision": 0.0, "recall": 0.0, "f1_score": 0.0,
+            "mae": 0.0, "rmse": 0.0, "total_predictions": 0,
+            "true_positives": 0, "false_positives": 0, "true_negatives": 0, "false_negatives": 0
+        }
+
+    accuracy = (tp + tn) / total
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+    f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+
+    predicted_defect_rate = (tp + fp) / total
+    actual_defect_rate = (tp + fn) / total
+    mae = abs(predicted_defect_rate - actual_defect_rate)
+
+    return {
+        "accuracy": accuracy,
+        "precision": precision,
+        "recall": recall,
+        "f1_score": f1_score,
+        "mae": mae,
+        "rmse": mae,
+        "total_predictions": total,
+        "true_positives": tp,
+        "false_positives": fp,
+        "true_negatives": tn,
+        "false_negatives": fn,
+        "predicted_defect_rate": predicted_defect_rate,
+        "actual_defect_rate": actual_defect_rate
+    }
+
+
+def run_parameter_sweep(
+    values: Sequence[float],
+    allowances: Optional[Sequence[Optional[float]]],
+    window_sizes: List[int],
+    z_thresholds: List[float],
+    prediction_horizons: List[int],
+) -> List[Dict[str, float]]:
+    """
+    한 번 조회한 시계열에 대해 (window_size, prediction_horizon, z_threshold) 모든 조합의 성능을 계산합니다.
+
+    - 누적합/제곱 누적합은 스윕 전체에서 한 번만 계산하고, 윈도우 크기별 통계는 그 차분으로 구합니다.
+    - (window_size, prediction_horizon) 별 Z-Score 행렬과 실제 불량 라벨은 한 번만 만들고,
+      모든 임계값을 같은 행렬에 대해 평가합니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if allowances is None:
+        allowances = np.full(n, np.nan)
+    else:
+        allowances = np.asarray(allowances, dtype=np.float64)  # None -> NaN
+
+    thresholds = np.asarray(sorted(set(z_thresholds)), dtype=np.float64)
+    grid = []
+    # 누적합은 모든 윈도우 크기가 공유하고, 윈도우 통계는 윈도우 크기별로 한 번만 계산하여 모든 예측 구간에서 공유
+    prefix = PrefixSums(values)
+
+    for window_size in sorted(set(window_sizes)):
+        window_stats = rolling_window_stats(values, window_size, prefix)
+
+        for horizon in sorted(set(prediction_horizons)):
+            if n - horizon - window_size <= 0:
+                for threshold in thresholds:
+                    grid.append({
+                        "window_size": window_size,
+                        "z_threshold": float(threshold),
+                        "prediction_horizon": horizon,
+                        **metrics_from_counts(0, 0, 0, 0)
+                    })
+                continue
+
+            windows = backtest_windows(values, allowances, window_size, horizon, window_stats)
+            z_scores = windows["z_scores"].ravel()
+            actual = windows["actual"].ravel()
+
+            total = actual.size
+            actual_positive = int(actual.sum())
+
+            # Z-Score 정렬 후 searchsorted 로 모든 임계값의 예측 양성 개수를 한 번에 계산
+            order = np.argsort(z_scores, kind="stable")
+            sorted_z = z_scores[order]
+            positives_cumsum = np.concatenate(([0], np.cumsum(actual[order])))
+            cut = np.searchsorted(sorted_z, thresholds, side="right")
+
+            for threshold, idx in zip(thresholds, cut):
+                predicted_positive = total - idx
+                tp = int(actual_positive - positives_cumsum[idx])
+                fp = int(predicted_positive - tp)
+                fn = actual_positive - tp
+                tn = total - tp - fp - fn
+                grid.append({
+                    "window_size": window_size,
+                    "z_threshold": float(threshold),
+                    "prediction_horizon": horizon,
+                    **metrics_from_counts(tp, fp, tn, fn)
+                })
+
+    return grid
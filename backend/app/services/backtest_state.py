@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .detectors import ControlChartDetector, restore_detector
+from .phase_angle_backtest import PhaseAngleBacktestState, PhaseAngleMetricsAccumulator
+
+logger = logging.getLogger(__name__)
+
+# 저장 파일 형식 버전 (형식이 바뀌면 이전 파일은 읽지 않고 처음부터 다시 계산)
+STATE_FORMAT_VERSION = 1
+
+class IncrementalBacktestState:
+    """
+    (모델, 파라미터) 별 증분 백테스팅 상태.
+
+    - angle_state: 롤링 윈도우 버퍼와 PPM 기울기용 최근 PPM (변화 감지 검출기, 다변량 모드 설정 포함)
+    - metrics: 지금까지 처리한 시점의 요약 지표 누적값
+    - series: 최근 max_points 개의 결과 포인트 (직렬화 가능한 딕셔너리)
+    - last_id: 마지막으로 처리한 HANDY_ZSCORE_RAW_DATA.id (워터마크)
+    """
+
+    def __init__(
+        self,
+        window_size: int,
+        max_points: int,
+        num_columns: int = 6,
+        detector: Optional[ControlChartDetector] = None,
+        t2_alpha: Optional[float] = None
+    ):
+        self.angle_state = PhaseAngleBacktestState(
+            window_size, num_columns=num_columns, detector=detector, t2_alpha=t2_alpha
+        )
+        self.metrics = PhaseAngleMetricsAccumulator()
+        self.series: deque = deque(maxlen=max_points)
+        self.last_id: Optional[int] = None
+        self.total_records = 0
+
+    def resize_series(self, max_points: int):
+        if self.series.maxlen != max_points:
+            self.series = deque(self.series, maxlen=max_points)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        파일 저장용 배열. 윈도우 버퍼/PPM 이력/T² 기준 오프셋은 numpy 배열로, 나머지 설정과 누적값은
+        "header" JSON 문자열로, 결과 시계열은 "series" JSON 문자열로 저장합니다 (pickle 없이 읽을 수 있음).
+        """
+        angle_state = self.angle_state
+        header = {
+            "version": STATE_FORMAT_VERSION,
+            "window_size": angle_state.window_size,
+            "num_columns": angle_state.num_columns,
+            "usl": angle_state.usl,
+            "lsl": angle_state.lsl,
+            "t2_limit": angle_state.t2_limit,
+            "offset": angle_state.offset,
+            "rows_seen": angle_state.rows_seen,
+            "detector": angle_state.detector.export_state() if angle_state.detector is not None else None,
+            "metrics": vars(self.metrics),
+            "max_points": self.series.maxlen,
+            "last_id": self.last_id,
+            "total_records": self.total_records
+        }
+        arrays = {
+            "header": np.array(json.dumps(header, default=_json_default)),
+            "series": np.array(json.dumps(list(self.series), default=_json_default)),
+            "window_rows": angle_state.window_rows,
+            "ppm_tail": angle_state.ppm_tail
+        }
+        if angle_state.t2_offset is not None:
+            arrays["t2_offset"] = angle_state.t2_offset
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "IncrementalBacktestState":
+        """to_arrays() 결과로 상태를 복원합니다. 형식이 맞지 않으면 ValueError/KeyError 를 발생시킵니다."""
+        header = json.loads(str(arrays["header"]))
+        if header["version"] != STATE_FORMAT_VERSION:
+            raise ValueError(f"unsupported backtest state version {header['version']}")
+        detector = restore_detector(header["detector"]) if header["detector"] is not None else None
+
+        state = cls(header["window_size"], header["max_points"], header["num_columns"], detector)
+        angle_state = state.angle_state
+        angle_state.usl = header["usl"]
+        angle_state.lsl = header["lsl"]
+        angle_state.t2_limit = header["t2_limit"]
+        angle_state.t2_offset = arrays["t2_offset"] if "t2_offset" in arrays else None
+        angle_state.offset = header["offset"]
+        angle_state.rows_seen = header["rows_seen"]
+        angle_state.window_rows = arrays["window_rows"].reshape(-1, header["num_columns"])
+        angle_state.ppm_tail = arrays["ppm_tail"]
+        for field, value in header["metrics"].items():
+            setattr(state.metrics, field, value)
+        for point in json.loads(str(arrays["series"])):
+            point["timestamp"] = datetime.fromisoformat(point["timestamp"])
+            state.series.append(point)
+        state.last_id = header["last_id"]
+        state.total_records = header["total_records"]
+        return state
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class BacktestStateStore:
+    """
+    증분 백테스팅 상태 저장소.
+
+    최근 사용한 상태는 메모리에 보관하고(LRU), 변경된 상태는 state_dir 에 npz 파일로 저장하여
+    프로세스가 재시작되어도 워터마크 이후 데이터만 처리할 수 있도록 합니다.
+    파일은 allow_pickle=False 로 읽으므로 파일이 변조되어도 코드가 실행되지 않습니다.
+    """
+
+    def __init__(self, state_dir: Optional[str], max_in_memory: int = 32):
+        self.state_dir = state_dir
+        self.max_in_memory = max_in_memory
+        self._states: "OrderedDict[str, IncrementalBacktestState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+    def key_lock(self, key: str) -> threading.Lock:
+        """같은 키에 대한 동시 갱신을 막기 위한 락을 반환합니다."""
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.state_dir:
+            return None
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.state_dir, f"backtest_{digest}.npz")
+
+    def get(self, key: str) -> Optional[IncrementalBacktestState]:
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states.move_to_end(key)
+                return state
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    state = IncrementalBacktestState.from_arrays({name: data[name] for name in data.files})
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Failed to load backtest state %s: %s", path, e)
+                return None
+            self._remember(key, state)
+            return state
+        return None
+
+    def save(self, key: str, state: IncrementalBacktestState):
+        self._remember(key, state)
+
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **state.to_arrays())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to save backtest state %s: %s", path, e)
+
+    def forget(self, key: str):
+        """메모리에 있는 상태만 버립니다. 다음 조회 시 파일 저장본을 다시 읽습니다."""
+        with self._lock:
+            self._states.pop(key, None)
+
+    def _remember(self, key: str, state: IncrementalBacktestState):
+        with self._lock:
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_in_memory:
+                self._states.popitem(last=False)
+
+
+# 애플리케이션 전역 증분 백테스팅 상태 저장소 (BACKTEST_STATE_DIR 를 빈 값으로 두면 메모리에만 보관)
+backtest_state_store = BacktestStateStore(os.getenv("BACKTEST_STATE_DIR", "data/backtest_state"))
@@ -0,0 +1,278 @@
+"""
+스트리밍 변화 감지 검출기 (EWMA, CUSUM 관리도).
+
+고정 윈도우 Z-Score 는 매 시점 윈도우 전체의 통계가 필요하지만, 관리도 검출기는 시계열당 O(1) 상태만 유지합니다.
+처음 warmup 개 값으로 기준 평균/표준편차(Phase I)를 정한 뒤, 이후 값을 기준값으로 표준화하여 감시합니다.
+
+- EWMADetector: 지수가중 이동 평균이 시점별 관리 한계(L 시그마)를 벗어나면 신호
+- CUSUMDetector: 상측/하측 누적합 중 큰 값이 결정 구간 h 를 넘으면 신호 (신호 후에도 초기화하지 않음)
+
+update() 는 값 하나를 O(1) 로 처리하고, update_many() 는 update() 를 반복한 것과 같은 결과를
+(부동소수점 오차 범위에서) 배열 단위로 계산합니다. 통계량은 항상 0 이상이며 임계값과 직접 비교합니다.
+기준 구간은 streaming_stats.RunningStats, EWMA 는 streaming_stats.EWMStats 로 누적합니다.
+export_state()/restore_detector() 로 설정과 상태를 JSON 으로 저장 가능한 값으로 내보내고 복원합니다.
+"""
+import math
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from .streaming_stats import EWMStats, RunningStats
+
+# 기준 표준편차가 이 값보다 작으면 표준화하지 않음 (backtest_engine.STD_EPSILON 과 동일)
+STD_EPSILON = 1e-10
+
+DETECTOR_KINDS = ("ewma", "cusum")
+
+
+def _is_finite(value) -> bool:
+    try:
+        return math.isfinite(value)
+    except TypeError:
+        return False
+
+
+class ControlChartDetector(ABC):
+    """
+    관리도 검출기 공통 로직: 기준 구간 수집, 표준화, 신호 집계.
+    하위 클래스는 표준화된 값에 대한 _step(), _step_many() 와 threshold 를 구현합니다.
+    """
+
+    kind = ""
+    # 하위 클래스의 생성자 파라미터와 표준화 이후 상태 필드 (export_state/restore_detector 에서 사용)
+    _param_fields: Tuple[str, ...] = ()
+    _chart_fields: Tuple[str, ...] = ()
+
+    def __init__(self, warmup: int):
+        if warmup < 2:
+            raise ValueError("warmup must be >= 2")
+        self.warmup = warmup
+        self._baseline = RunningStats()
+        self.mean: Optional[float] = None
+        self.std: Optional[float] = None
+        self.count = 0  # 기준 구간 이후 처리한 값 수
+        self.signals = 0
+
+    @property
+    @abstractmethod
+    def threshold(self) -> float:
+        """통계량이 이 값을 넘으면 신호"""
+
+    @property
+    def ready(self) -> bool:
+        """기준 평균/표준편차가 확정되었는지 여부"""
+        return self.mean is not None
+
+    def _freeze_baseline(self):
+        self.mean = self._baseline.mean
+        self.std = self._baseline.std(ddof=1)
+        self._baseline = RunningStats()
+
+    def update(self, value: float) -> Tuple[float, bool]:
+        """
+        값 하나를 처리하고 (통계량, 신호 여부) 를 반환합니다.
+        기준 구간의 값이거나 NaN/Inf 이면 (NaN, False) 이며 상태는 바뀌지 않습니다.
+        """
+        if not _is_finite(value):
+            return math.nan, False
+        if not self.ready:
+            self._baseline.push(float(value))
+            if self._baseline.count >= self.warmup:
+                self._freeze_baseline()
+            return math.nan, False
+
+        self.count += 1
+        if self.std < STD_EPSILON:
+            # 기준 구간에 변동이 없으면 표준화할 수 없으므로 감시하지 않음 (Z-Score 의 std=0 처리와 동일)
+            return 0.0, False
+        statistic = self._step((float(value) - self.mean) / self.std)
+        signal = statistic > self.threshold
+        self.signals += int(signal)
+        return statistic, signal
+
+    def update_many(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """값 배열을 순서대로 처리하고 시점별 "statistic"(기준 구간/NaN 은 NaN), "signal" 배열을 반환합니다."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        statistic = np.full(len(values), np.nan)
+        signal = np.zeros(len(values), dtype=bool)
+
+        finite_index = np.flatnonzero(np.isfinite(values))
+        position = 0
+        if not self.ready and len(finite_index):
+            position = min(self.warmup - self._baseline.count, len(finite_index))
+            self._baseline.push_many(values[finite_index[:position]])
+            if self._baseline.count >= self.warmup:
+                self._freeze_baseline()
+
+        rest = finite_index[position:]
+        if len(rest) == 0:
+            return {"statistic": statistic, "signal": signal}
+
+        self.count += len(rest)
+        if self.std < STD_EPSILON:
+            statistic[rest] = 0.0
+            return {"statistic": statistic, "signal": signal}
+
+        statistic[rest] = self._step_many((values[rest] - self.mean) / self.std)
+        signal[rest] = statistic[rest] > self.threshold
+        self.signals += int(signal.sum())
+        return {"statistic": statistic, "signal": signal}
+
+    @abstractmethod
+    def _step(self, standardized: float) -> float:
+        """표준화된 값 하나로 상태를 갱신하고 통계량을 반환합니다."""
+
+    @abstractmethod
+    def _step_many(self, standardized: np.ndarray) -> np.ndarray:
+        """표준화된 값 배열로 상태를 갱신하고 시점별 통계량을 반환합니다 (_step 을 반복한 것과 같은 결과)."""
+
+    def export_state(self) -> Dict[str, Any]:
+        """설정과 현재 상태 (JSON 으로 저장 가능한 값). "baseline" 은 아직 확정되지 않은 기준 구간의 누적값입니다."""
+        return {
+            "kind": self.kind,
+            "warmup": self.warmup,
+            "params": {field: getattr(self, field) for field in self._param_fields},
+            "chart": {field: getattr(self, field) for field in self._chart_fields},
+            "mean": self.mean,
+            "std": self.std,
+            "count": self.count,
+            "signals": self.signals,
+            "baseline": {"count": self._baseline.count, "mean": self._baseline.mean, "m2": self._baseline.m2}
+        }
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "detector": self.kind,
+            "baseline_mean": self.mean,
+            "baseline_std": self.std,
+            "monitored_points": self.count,
+            "signals": self.signals
+        }
+
+
+class EWMADetector(ControlChartDetector):
+    """
+    EWMA 관리도: z_t = λ·y_t + (1-λ)·z_{t-1} (y 는 표준화된 값, z_0 = 0).
+    통계량은 |z_t| / σ_t 이며 σ_t = sqrt(λ/(2-λ)·(1-(1-λ)^{2t})) 입니다. 통계량이 limit(L) 을 넘으면 신호입니다.
+    λ 가 작을수록 작은 평균 이동을 더 일찍 감지합니다.
+    """
+
+    kind = "ewma"
+    _param_fields = ("lam", "limit")
+    _chart_fields = ("ewma",)
+
+    def __init__(self, warmup: int, lam: float = 0.2, limit: float = 3.0):
+        super().__init__(warmup)
+        if not 0 < lam <= 1:
+            raise ValueError("ewma_lambda must be in (0, 1]")
+        if limit <= 0:
+            raise ValueError("ewma_limit must be positive")
+        self.lam = lam
+        self.limit = limit
+        self._ewm = EWMStats(alpha=lam, initial_mean=0.0)
+
+    @property
+    def ewma(self) -> float:
+        return self._ewm.mean
+
+    @ewma.setter
+    def ewma(self, value: float):
+        self._ewm.mean = value
+
+    @property
+    def threshold(self) -> float:
+        return self.limit
+
+    def _step(self, standardized: float) -> float:
+        decay = 1 - self.lam
+        # 측정값마다 호출되므로 EWMStats.push 대신 평균만 직접 갱신 (표준화된 값은 항상 유한하고 분산은 쓰지 않음)
+        ewm = self._ewm
+        ewm.mean += self.lam * (standardized - ewm.mean)
+        ewm.count += 1
+        sigma = math.sqrt(self.lam / (2 - self.lam) * (1 - decay ** (2 * self.count)))
+        return abs(self._ewm.mean) / sigma
+
+    def _step_many(self, standardized: np.ndarray) -> np.ndarray:
+        decay = 1 - self.lam
+        ewma, _ = self._ewm.push_many(standardized)
+        t = np.arange(self.count - len(standardized) + 1, self.count + 1)
+        sigma = np.sqrt(self.lam / (2 - self.lam) * (1 - decay ** (2 * t)))
+        return np.abs(ewma) / sigma
+
+
+class CUSUMDetector(ControlChartDetector):
+    """
+    표 형식 CUSUM 관리도: C+_t = max(0, C+_{t-1} + y_t - k), C-_t = max(0, C-_{t-1} - y_t - k).
+    통계량은 max(C+, C-) 이며 h 를 넘으면 신호입니다. k 는 감지할 이동 크기(시그마)의 절반이 일반적입니다.
+    """
+
+    kind = "cusum"
+    _param_fields = ("k", "h")
+    _chart_fields = ("upper", "lower")
+
+    def __init__(self, warmup: int, k: float = 0.5, h: float = 5.0):
+        super().__init__(warmup)
+        if k < 0:
+            raise ValueError("cusum_k must be >= 0")
+        if h <= 0:
+            raise ValueError("cusum_h must be positive")
+        self.k = k
+        self.h = h
+        self.upper = 0.0
+        self.lower = 0.0
+
+    @property
+    def threshold(self) -> float:
+        return self.h
+
+    def _step(self, standardized: float) -> float:
+        self.upper = max(0.0, self.upper + standardized - self.k)
+        self.lower = max(0.0, self.lower - standardized - self.k)
+        return max(self.upper, self.lower)
+
+    @staticmethod
+    def _lindley(increments: np.ndarray, initial: float) -> np.ndarray:
+        """C_t = max(0, C_{t-1} + x_t) 를 누적합으로 계산: C_t = S_t - min(-C_0, min_{j<=t} S_j)"""
+        cumulative = np.cumsum(increments)
+        return cumulative - np.minimum(np.minimum.accumulate(cumulative), -initial)
+
+    def _step_many(self, standardized: np.ndarray) -> np.ndarray:
+        upper = self._lindley(standardized - self.k, self.upper)
+        lower = self._lindley(-standardized - self.k, self.lower)
+        self.upper = float(upper[-1])
+        self.lower = float(lower[-1])
+        return np.maximum(upper, lower)
+
+
+def create_detector(
+    kind: str,
+    warmup: int,
+    ewma_lambda: float = 0.2,
+    ewma_limit: float = 3.0,
+    cusum_k: float = 0.5,
+    cusum_h: float = 5.0
+) -> ControlChartDetector:
+    """검출기 종류와 파라미터로 검출기를 생성합니다. 잘못된 값이면 ValueError 를 발생시킵니다."""
+    if kind == "ewma":
+        return EWMADetector(warmup, lam=ewma_lambda, limit=ewma_limit)
+    if kind == "cusum":
+        return CUSUMDetector(warmup, k=cusum_k, h=cusum_h)
+    raise ValueError(f"Unknown detector: {kind} (expected one of {', '.join(DETECTOR_KINDS)})")
+
+
+def restore_detector(state: Dict[str, Any]) -> ControlChartDetector:
+    """export_state() 결과로 검출기를 다시 만듭니다. 잘못된 값이면 ValueError 를 발생시킵니다."""
+    detector_class = {"ewma": EWMADetector, "cusum": CUSUMDetector}.get(state["kind"])
+    if detector_class is None:
+        raise ValueError(f"Unknown detector: {state['kind']} (expected one of {', '.join(DETECTOR_KINDS)})")
+    detector = detector_class(int(state["warmup"]), **state["params"])
+    for field, value in state["chart"].items():
+        setattr(detector, field, float(value))
+    detector.mean = None if state["mean"] is None else float(state["mean"])
+    detector.std = None if state["std"] is None else float(state["std"])
+    detector.count = int(state["count"])
+    detector.signals = int(state["signals"])
+    detector._baseline.count = int(state["baseline"]["count"])
+    detector._baseline.mean = float(state["baseline"]["mean"])
+    detector._baseline.m2 = float(state["baseline"]["m2"])
+    return detector
@@ -0,0 +1,210 @@
+"""
+실시간 분석 결과에 붙는 알람 규칙 엔진.
+
+prediction_model.md 의 두 알람을 시계열별로 평가합니다.
+- ppm:       예상 불량률(PPM)이 임계값 초과 -> CAUTION(주의)
+- ppm_slope: 불량률 기울기가 임계값 초과   -> WARNING(경고)
+
+규칙마다 시계열별 연속 위반 횟수만 기억하므로 분석 결과 하나당 O(규칙 수) 로 평가합니다.
+consecutive 번 연속 위반하면 알람을 한 번 발생시키고, 값이 임계값 이하로 돌아오면 다시 발생할 수 있는 상태가 됩니다.
+발생한 알람은 같은 주기에 Socket.IO 로 전송하고, HANDY_ALARMS 에는 live_alarm_writer 가 일괄 저장합니다.
+연속 위반 횟수와 발생 중인 알람은 실시간 분석 상태와 함께 체크포인트에 저장되어 재시작 후에도 이어집니다.
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+
+from ..crud import analysis as analysis_crud
+from .live_frames import series_id
+from .live_history import BatchedWriter
+
+ALARM_EVENT = "live_alarms"
+# 메시지 컬럼 길이 (HANDY_ALARMS.message)
+MESSAGE_MAX_LENGTH = 255
+
+
+class AlarmRule:
+    """분석 결과의 field 값이 threshold 를 consecutive 번 연속 넘으면 level 알람을 발생시키는 규칙"""
+
+    def __init__(self, alarm_type: str, field: str, threshold: float, level: str, consecutive: int, label: str, unit: str = ""):
+        self.alarm_type = alarm_type
+        self.field = field
+        self.threshold = threshold
+        self.level = level
+        self.consecutive = max(consecutive, 1)
+        self.label = label
+        self.unit = unit
+
+    def violated(self, update: Dict[str, Any]) -> bool:
+        value = update.get(self.field)
+        return value is not None and value > self.threshold
+
+    def message(self, update: Dict[str, Any], streak: int) -> str:
+        text = (
+            f"{update['model_name']} CAM{update['cam_number']} {update['metric']} {self.label} "
+            f"{update[self.field]:.1f}{self.unit}, 임계값 {self.threshold:g}{self.unit} {streak}회 연속 초과"
+        )
+        return text[:MESSAGE_MAX_LENGTH]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "alarm_type": self.alarm_type,
+            "field": self.field,
+            "threshold": self.threshold,
+            "level": self.level,
+            "consecutive": self.consecutive
+        }
+
+
+class AlarmEngine:
+    """시계열/규칙별 연속 위반 횟수와 발생 중인 알람을 메모리에 보관합니다."""
+
+    def __init__(self, rules: List[AlarmRule]):
+        self.rules = rules
+        self._lock = threading.Lock()
+        self._streaks: Dict[Tuple[str, str], int] = {}
+        self._active: Set[Tuple[str, str]] = set()
+        self.evaluated = 0
+        self.raised = 0
+        self.cleared = 0
+
+    def evaluate(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """이번 주기의 분석 결과를 평가하고 새로 발생한 알람 목록을 반환합니다."""
+        alarms = []
+        with self._lock:
+            for update in updates:
+                key = series_id(update)
+                self.evaluated += 1
+                for rule in self.rules:
+                    state = (key, rule.alarm_type)
+                    if not rule.violated(update):
+                        self._streaks.pop(state, None)
+                        if state in self._active:
+                            self._active.discard(state)
+                            self.cleared += 1
+                        continue
+                    streak = self._streaks.get(state, 0) + 1
+                    self._streaks[state] = streak
+                    if streak >= rule.consecutive and state not in self._active:
+                        self._active.add(state)
+                        self.raised += 1
+                        alarms.append(self._alarm(rule, update, streak))
+        return alarms
+
+    @staticmethod
+    def _alarm(rule: AlarmRule, update: Dict[str, Any], streak: int) -> Dict[str, Any]:
+        return {
+            "alarm_type": rule.alarm_type,
+            "level": rule.level,
+            "message": rule.message(update, streak),
+            "model_name": update["model_name"],
+            "line_info": update.get("line_info"),
+            "cam_number": update["cam_number"],
+            "metric": update["metric"],
+            "value": update[rule.field],
+            "threshold": rule.threshold,
+            "consecutive": streak,
+            "measurement_id": update.get("last_measurement_id"),
+            "created_at": update["analyzed_at"]
+        }
+
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """체크포인트용 (시계열, 규칙) 별 연속 위반 횟수와 발생 중인 알람 배열"""
+        with self._lock:
+            streaks = list(self._streaks.items())
+            active = sorted(self._active)
+        return {
+            "alarm_streak_series": np.array([key for (key, _), _ in streaks], dtype=str),
+            "alarm_streak_type": np.array([alarm_type for (_, alarm_type), _ in streaks], dtype=str),
+            "alarm_streak_count": np.array([streak for _, streak in streaks], dtype=np.int64),
+            "alarm_active_series": np.array([key for key, _ in active], dtype=str),
+            "alarm_active_type": np.array([alarm_type for _, alarm_type in active], dtype=str)
+        }
+
+    def restore_state(self, arrays: Dict[str, np.ndarray]):
+        """export_state() 의 배열로 복원합니다. 현재 규칙에 없는 알람 종류는 버립니다."""
+        alarm_types = {rule.alarm_type for rule in self.rules}
+        streaks = {
+            (str(key), str(alarm_type)): int(streak)
+            for key, alarm_type, streak in zip(
+                arrays["alarm_streak_series"], arrays["alarm_streak_type"], arrays["alarm_streak_count"]
+            )
+            if alarm_type in alarm_types
+        }
+        active = {
+            (str(key), str(alarm_type))
+            for key, alarm_type in zip(arrays["alarm_active_series"], arrays["alarm_active_type"])
+            if alarm_type in alarm_types
+        }
+        with self._lock:
+            self._streaks = streaks
+            self._active = active
+
+    def active(self) -> List[Dict[str, str]]:
+        """현재 발생 중인(아직 임계값 이하로 돌아오지 않은) 알람"""
+        with self._lock:
+            return [{"series": key, "alarm_type": alarm_type} for key, alarm_type in sorted(self._active)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rules": [rule.as_dict() for rule in self.rules],
+                "evaluated": self.evaluated,
+                "raised": self.raised,
+                "cleared": self.cleared,
+                "active": len(self._active)
+            }
+
+
+def alarm_record(alarm: Dict[str, Any]) -> Dict[str, Any]:
+    """알람 메시지를 HANDY_ALARMS 행으로 변환합니다."""
+    return {
+        "alarm_type": alarm["alarm_type"],
+        "level": alarm["level"],
+        "message": alarm["message"],
+        "model_name": alarm["model_name"],
+        "cam_number": alarm["cam_number"],
+        "metric_type": alarm["metric"],
+        "value": alarm["value"],
+        "threshold": alarm["threshold"],
+        "measurement_id": alarm["measurement_id"],
+        "created_at": datetime.fromisoformat(alarm["created_at"])
+    }
+
+
+LIVE_ALARM_CONSECUTIVE = int(os.getenv("LIVE_ALARM_CONSECUTIVE", "3"))
+
+# 임계값을 비워 두면 해당 규칙을 사용하지 않음
+LIVE_ALARM_PPM_THRESHOLD = os.getenv("LIVE_ALARM_PPM_THRESHOLD", "1000")
+LIVE_ALARM_SLOPE_THRESHOLD = os.getenv("LIVE_ALARM_SLOPE_THRESHOLD", "500")
+
+live_alarm_rules: List[AlarmRule] = []
+if LIVE_ALARM_PPM_THRESHOLD:
+    live_alarm_rules.append(AlarmRule(
+        "ppm", "predicted_ppm", float(LIVE_ALARM_PPM_THRESHOLD), "CAUTION",
+        LIVE_ALARM_CONSECUTIVE, "예상 불량률", " PPM"
+    ))
+if LIVE_ALARM_SLOPE_THRESHOLD:
+    # 기울기는 rolling_ppm_slope 에서 ±1000 으로 잘리므로 임계값은 1000 보다 작아야 함
+    live_alarm_rules.append(AlarmRule(
+        "ppm_slope", "ppm_slope", float(LIVE_ALARM_SLOPE_THRESHOLD), "WARNING",
+        LIVE_ALARM_CONSECUTIVE, "불량률 기울기"
+    ))
+
+# 애플리케이션 전역 알람 엔진과 저장기
+live_alarm_engine = AlarmEngine(live_alarm_rules)
+
+# 최근 발생한 알람 (연결 직후 snapshot 으로 전송, 릴레이 워커는 버스로 받은 알람을 보관)
+live_recent_alarms: deque = deque(maxlen=int(os.getenv("LIVE_SNAPSHOT_ALARMS", "50")))
+
+live_alarm_writer = BatchedWriter(
+    "alarms",
+    analysis_crud.bulk_insert_alarms,
+    alarm_record,
+    flush_interval=float(os.getenv("LIVE_ALARM_FLUSH_SECONDS", "2")),
+    batch_size=100,
+)
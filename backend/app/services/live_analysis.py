@@ -0,0 +1,511 @@
+"""
+실시간 분석 엔진 (Socket.IO analysis_batch 피드).
+
+HANDY_CAM_MEASUREMENTS 를 측정 ID 워터마크 기준으로 주기적으로 조회하여, 새로 적재된 측정값만
+(모델, 캠, 메트릭) 별 이동 윈도우 통계에 반영합니다. 매 주기 비용은 전체 이력이 아니라 새 측정값 수에 비례합니다.
+
+- 시작 시 (모델, 캠) 별 최근 window 개 측정값으로 윈도우를 채우고 워터마크를 현재 최대 ID 로 설정
+- poll(): 워터마크 이후 측정값(최대 max_rows_per_tick 개)을 반영하고, 값이 바뀐 시계열의 분석 결과만 반환
+- PPM 은 윈도우 평균/표준편차와 규격(USL/LSL)으로, 기울기는 최근 PPM_SLOPE_POINTS 번의 PPM 으로 계산
+- 구독 room 이 주어지면 윈도우 갱신만 모든 시계열에 하고, PPM/기울기 계산과 결과 생성은 구독 중인 시계열만 수행
+  (구독자가 없는 동안 쌓인 측정값은 구독이 시작된 다음 주기에 한 번에 반영)
+- PPM/기울기는 시계열마다 따로 계산하지 않고 묶어서 한 번에 계산하며, 시계열이 많으면 workers 개 스레드로 나눠 계산
+- latest() 는 주기가 끝날 때 교체되는 결과 사본을 읽으므로 분석 중에도 기다리지 않음 (이벤트 루프에서 호출해도 안전)
+- detector(ewma/cusum) 를 지정하면 시계열마다 관리도 검출기를 두고 새 측정값을 넣어, 결과에 마지막 통계량(drift_statistic)과
+  마지막 분석 이후 신호 발생 여부(drift_signal)를 포함 (처음 detector_warmup 개 측정값이 기준 구간)
+- export_state()/restore_state(): 윈도우, PPM 이력, 검출기 상태, 워터마크를 numpy 배열로 내보내고 복원 (live_checkpoint 가 파일로 저장)
+- cam_summaries(): 마지막 호출 이후 새 측정값이 들어온 (캠, 메트릭) 별로 모든 모델의 윈도우를 합친 요약 (live_history 가 저장)
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..crud import analysis as analysis_crud
+from .detectors import ControlChartDetector, create_detector, restore_detector
+from .phase_angle_backtest import DEFAULT_LSL, DEFAULT_USL, PPM_SLOPE_POINTS, ppm_from_stats, rolling_ppm_slope
+from .live_metrics import StageTimings
+from .live_subscriptions import series_rooms
+from .streaming_stats import RunningStats, SlidingWindowStats
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[str, int, str]  # (모델, 캠 번호, 메트릭)
+CamKey = Tuple[int, str]  # (캠 번호, 메트릭)
+
+# 스레드 하나가 맡는 최소 시계열 수 (이보다 적으면 나누지 않고 한 번에 계산)
+MIN_SHARD_SERIES = 1000
+
+
+class LiveSeriesState:
+    """시계열 하나의 실시간 분석 상태: 최근 window 개 측정값 윈도우, PPM 기울기용 최근 PPM, 변화 감지 검출기(선택)"""
+
+    def __init__(self, window: int, detector: Optional[ControlChartDetector] = None):
+        self.window = SlidingWindowStats(window)
+        self.ppm_history: deque = deque(maxlen=PPM_SLOPE_POINTS)
+        self.detector = detector
+        self.drift_statistic: Optional[float] = None  # 검출기의 마지막 통계량 (기준 구간 동안은 None)
+        self.pending_drift_signals = 0  # 마지막 분석 이후 발생한 검출기 신호 수
+        self.last_id: Optional[int] = None
+        self.last_measured_at: Optional[datetime] = None
+        self.line_info: Optional[str] = None
+        self.pending_samples = 0  # 마지막 분석 이후 윈도우에 추가된 측정값 수
+        self.latest: Optional[Dict[str, Any]] = None
+
+    def add(self, ids: np.ndarray, timestamps: List[Optional[datetime]], values: np.ndarray, line_info: Optional[str]):
+        self.window.push_many(values)
+        if self.detector is not None:
+            self._update_detector(values)
+        self.last_id = int(ids[-1])
+        self.last_measured_at = timestamps[-1]
+        self.line_info = line_info or self.line_info
+        self.pending_samples += len(ids)
+
+    def _update_detector(self, values: np.ndarray):
+        if len(values) == 1:
+            # 주기마다 측정값이 하나씩 들어오는 경우가 대부분이므로 배열 처리 없이 갱신
+            statistic, signal = self.detector.update(float(values[0]))
+            statistics = [statistic] if not math.isnan(statistic) else []
+            signals = int(signal)
+        else:
+            drift = self.detector.update_many(values)
+            statistics = drift["statistic"][~np.isnan(drift["statistic"])]
+            signals = int(drift["signal"].sum())
+        if len(statistics):
+            self.drift_statistic = float(statistics[-1])
+        self.pending_drift_signals += signals
+
+    def rooms(self, key: SeriesKey) -> Tuple[str, ...]:
+        return series_rooms(key[0], self.line_info, key[1])
+
+    def finish(self, key: SeriesKey, mean: float, std: float, ppm: float, slope: Optional[float]) -> Dict[str, Any]:
+        """계산한 통계로 분석 결과 메시지를 만들고 마지막 결과로 기록합니다."""
+        model_name, cam_number, metric = key
+        self.latest = {
+            "analyzed_at": datetime.now().isoformat(),
+            "model_name": model_name,
+            "line_info": self.line_info,
+            "cam_number": cam_number,
+            "metric": metric,
+            "predicted_ppm": round(ppm, 2),
+            "mean": round(mean, 4),
+            "std_dev": round(std, 4),
+            "ppm_slope": round(slope, 2) if slope is not None else None,
+            "drift_statistic": round(self.drift_statistic, 4) if self.drift_statistic is not None else None,
+            "drift_signal": self.pending_drift_signals > 0 if self.detector is not None else None,
+            "sample_count": self.window.count,
+            "new_samples": self.pending_samples,
+            "last_measurement_id": self.last_id,
+            "last_measured_at": self.last_measured_at.isoformat() if self.last_measured_at else None
+        }
+        self.pending_samples = 0
+        self.pending_drift_signals = 0
+        return self.latest
+
+
+def analyze_series(items: List[Tuple[SeriesKey, LiveSeriesState]], usl: float, lsl: float) -> List[Dict[str, Any]]:
+    """
+    여러 시계열을 한 번에 분석합니다. PPM 은 ppm_from_stats 한 번으로, 기울기는 rolling_ppm_slope 한 번으로 계산하며
+    결과는 시계열마다 따로 계산한 것과 같습니다.
+    """
+    if not items:
+        return []
+    counts = np.array([state.window.count for _, state in items])
+    means = np.array([float(state.window.mean) for _, state in items])
+    stds = np.array([state.window.std(ddof=1) for _, state in items], dtype=np.float64)
+    ppms = ppm_from_stats(means, stds, usl, lsl)
+    ppms[counts < 2] = 0.0
+
+    slopes: List[Optional[float]] = [None] * len(items)
+    full = []
+    for index, (_, state) in enumerate(items):
+        state.ppm_history.append(float(ppms[index]))
+        if len(state.ppm_history) == PPM_SLOPE_POINTS:
+            full.append(index)
+    if full:
+        # 시계열별 최근 PPM 을 이어 붙이면 PPM_SLOPE_POINTS 칸 간격의 윈도우가 각 시계열의 기울기 구간
+        joined = np.concatenate([np.asarray(items[index][1].ppm_history) for index in full])
+        for index, slope in zip(full, rolling_ppm_slope(joined)[::PPM_SLOPE_POINTS]):
+            slopes[index] = float(slope)
+
+    return [
+        state.finish(key, float(means[index]), float(stds[index]), float(ppms[index]), slopes[index])
+        for index, (key, state) in enumerate(items)
+    ]
+
+
+class LiveAnalyzer:
+    """
+    (모델, 캠, 메트릭) 별 실시간 분석 상태 모음.
+
+    poll() 은 DB 세션을 받아 동기적으로 동작하므로 이벤트 루프에서는 스레드로 실행해야 합니다.
+    분석할 시계열이 MIN_SHARD_SERIES 의 두 배 이상이면 workers 개 스레드로 나눠 계산합니다.
+    detector 가 ewma/cusum 이면 시계열마다 create_detector(detector, detector_warmup, **detector_params) 검출기를 둡니다.
+    """
+
+    def __init__(
+        self,
+        window: int = 500,
+        usl: float = DEFAULT_USL,
+        lsl: float = DEFAULT_LSL,
+        max_rows_per_tick: int = 50000,
+        workers: int = 1,
+        detector: Optional[str] = None,
+        detector_warmup: int = 100,
+        detector_params: Optional[Dict[str, float]] = None
+    ):
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        self.detector_kind = detector if detector not in (None, "", "none") else None
+        self.detector_warmup = detector_warmup
+        self.detector_params = dict(detector_params or {})
+        # 잘못된 검출기 설정은 시작 시 ValueError
+        self._create_detector()
+        self.window = window
+        self.usl = usl
+        self.lsl = lsl
+        self.max_rows_per_tick = max_rows_per_tick
+        self.workers = max(workers, 1)
+        self.series: Dict[SeriesKey, LiveSeriesState] = {}
+        # (캠, 메트릭) 별 시계열 목록, 마지막 cam_summaries() 이후 새 측정값이 들어온 (캠, 메트릭), 요약 PPM 이력(기울기용)
+        self._cam_series: Dict[CamKey, List[SeriesKey]] = {}
+        self._touched_cams: set = set()
+        self._cam_ppm: Dict[CamKey, deque] = {}
+        self.watermark: Optional[int] = None
+        self.warmed = False
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 시계열별 마지막 분석 결과 사본 (주기가 끝날 때 통째로 교체하므로 락 없이 읽음)
+        self._published: Dict[SeriesKey, Dict[str, Any]] = {}
+        self.timings = StageTimings()
+        self.ticks = 0
+        self.rows_processed = 0
+        self.last_tick_rows = 0
+        self.last_tick_seconds = 0.0
+
+    def warm(self, db) -> int:
+        """(모델, 캠) 별 최근 window 개 측정값으로 윈도우를 채우고, 적재한 행 수를 반환합니다."""
+        max_id = analysis_crud.get_max_measurement_id(db)
+        rows = analysis_crud.get_latest_measurement_rows(db, self.window)
+        with self._lock:
+            self.series = {}
+            self._cam_series = {}
+            self._cam_ppm = {}
+            self._apply_rows(rows)
+            for state in self.series.values():
+                state.pending_samples = 0
+                state.pending_drift_signals = 0
+            # 이후 주기의 기울기 계산을 위해 초기 윈도우의 PPM 을 첫 이력으로 기록 (적재한 이력은 요약으로 저장하지 않음)
+            self._analyze(list(self.series.items()))
+            self._summarize_cams(sorted(self._cam_series))
+            self._touched_cams = set()
+            self._published = {key: state.latest for key, state in self.series.items()}
+            ids = [int(row.id) for row in rows] + ([int(max_id)] if max_id is not None else [])
+            self.watermark = max(ids) if ids else None
+            self.warmed = True
+        logger.info("실시간 분석 상태 적재 완료: 시계열 %s개, 측정값 %s건", len(self.series), len(rows))
+        return len(rows)
+
+    def export_state(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        체크포인트용 상태 배열. 시계열 i 의 윈도우는 window_values[i, :window_count[i]] (오래된 순서),
+        PPM 이력은 ppm_history[i, :ppm_count[i]], 검출기 상태는 JSON 문자열 "detector" 의 i 번째 값입니다.
+        (캠, 메트릭) 요약의 PPM 이력은 cam_ppm_history[j, :cam_ppm_count[j]] 입니다.
+        아직 상태를 적재하지 않았으면 None.
+        """
+        with self._lock:
+            if not self.warmed or self.watermark is None:
+                return None
+            items = list(self.series.items())
+            window_values = np.full((len(items), self.window), np.nan)
+            ppm_history = np.full((len(items), PPM_SLOPE_POINTS), np.nan)
+            for row, (_, state) in enumerate(items):
+                values = state.window.values()
+                window_values[row, :len(values)] = values
+                ppm_history[row, :len(state.ppm_history)] = list(state.ppm_history)
+            cam_items = sorted(self._cam_ppm.items())
+            cam_ppm_history = np.full((len(cam_items), PPM_SLOPE_POINTS), np.nan)
+            for row, (_, history) in enumerate(cam_items):
+                cam_ppm_history[row, :len(history)] = list(history)
+            return {
+                "watermark": np.int64(self.watermark),
+                "window": np.int64(self.window),
+                "limits": np.array([self.usl, self.lsl, PPM_SLOPE_POINTS], dtype=np.float64),
+                "model_name": np.array([key[0] for key, _ in items], dtype=str),
+                "cam_number": np.array([key[1] for key, _ in items], dtype=np.int64),
+                "metric": np.array([key[2] for key, _ in items], dtype=str),
+                "line_info": np.array([state.line_info or "" for _, state in items], dtype=str),
+                "window_count": np.array([state.window.count for _, state in items], dtype=np.int64),
+                "window_values": window_values,
+                "ppm_count": np.array([len(state.ppm_history) for _, state in items], dtype=np.int64),
+                "ppm_history": ppm_history,
+                "last_id": np.array([-1 if state.last_id is None else state.last_id for _, state in items], dtype=np.int64),
+                "last_measured_at": np.array([state.last_measured_at for _, state in items], dtype="datetime64[us]"),
+                "pending_samples": np.array([state.pending_samples for _, state in items], dtype=np.int64),
+                "latest": np.array(json.dumps([state.latest for _, state in items], ensure_ascii=False)),
+                "detector_config": np.array(json.dumps(self._detector_config())),
+                "detector": np.array(json.dumps([self._export_detector(state) for _, state in items])),
+                "cam_ppm_cam": np.array([key[0] for key, _ in cam_items], dtype=np.int64),
+                "cam_ppm_metric": np.array([key[1] for key, _ in cam_items], dtype=str),
+                "cam_ppm_count": np.array([len(history) for _, history in cam_items], dtype=np.int64),
+                "cam_ppm_history": cam_ppm_history
+            }
+
+    def restore_state(self, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        export_state() 의 배열로 상태를 복원하고 복원한 시계열 수를 반환합니다. 이후 poll() 은 워터마크 이후 측정값만 반영합니다.
+        윈도우 크기나 규격, 검출기 설정이 현재 설정과 다르면 ValueError 를 발생시키며 상태는 바뀌지 않습니다.
+        """
+        if int(arrays["window"]) != self.window:
+            raise ValueError(f"checkpoint window {int(arrays['window'])} != {self.window}")
+        if tuple(arrays["limits"]) != (self.usl, self.lsl, PPM_SLOPE_POINTS):
+            raise ValueError(f"checkpoint limits {tuple(arrays['limits'])} != {(self.usl, self.lsl, PPM_SLOPE_POINTS)}")
+        detector_config = json.loads(str(arrays["detector_config"]))
+        if detector_config != self._detector_config():
+            raise ValueError(f"checkpoint detector {detector_config} != {self._detector_config()}")
+
+        latest = json.loads(str(arrays["latest"]))
+        detectors = json.loads(str(arrays["detector"]))
+        series: Dict[SeriesKey, LiveSeriesState] = {}
+        for row, model_name in enumerate(arrays["model_name"]):
+            key = (str(model_name), int(arrays["cam_number"][row]), str(arrays["metric"][row]))
+            state = series[key] = LiveSeriesState(self.window)
+            if detectors[row] is not None:
+                state.detector = restore_detector(detectors[row]["state"])
+                state.drift_statistic = detectors[row]["statistic"]
+                state.pending_drift_signals = int(detectors[row]["pending_signals"])
+            state.window.load(arrays["window_values"][row, :arrays["window_count"][row]])
+            state.ppm_history.extend(float(ppm) for ppm in arrays["ppm_history"][row, :arrays["ppm_count"][row]])
+            last_id = int(arrays["last_id"][row])
+            state.last_id = last_id if last_id >= 0 else None
+            state.last_measured_at = arrays["last_measured_at"][row].item()
+            state.line_info = str(arrays["line_info"][row]) or None
+            state.pending_samples = int(arrays["pending_samples"][row])
+            state.latest = latest[row]
+        cam_series: Dict[CamKey, List[SeriesKey]] = {}
+        for key in series:
+            cam_series.setdefault((key[1], key[2]), []).append(key)
+        cam_ppm: Dict[CamKey, deque] = {}
+        for row, cam_number in enumerate(arrays["cam_ppm_cam"]):
+            history = cam_ppm[(int(cam_number), str(arrays["cam_ppm_metric"][row]))] = deque(maxlen=PPM_SLOPE_POINTS)
+            history.extend(float(ppm) for ppm in arrays["cam_ppm_history"][row, :arrays["cam_ppm_count"][row]])
+
+        with self._lock:
+            self.series = series
+            self._cam_series = cam_series
+            self._touched_cams = set()
+            self._cam_ppm = cam_ppm
+            self._published = {key: state.latest for key, state in series.items() if state.latest is not None}
+            self.watermark = int(arrays["watermark"])
+            self.warmed = True
+        return len(series)
+
+    def poll(self, db, rooms: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
+        """
+        워터마크 이후의 새 측정값을 반영하고, 값이 바뀐 시계열의 분석 결과 목록을 반환합니다.
+        rooms 가 주어지면 해당 room 에 속한 시계열만 분석합니다 (None 이면 모든 시계열).
+        """
+        if not self.warmed:
+            self.warm(db)
+            return self.latest(rooms)
+
+        start = time.perf_counter()
+        rows = analysis_crud.get_measurement_rows_after(db, self.watermark, limit=self.max_rows_per_tick)
+        fetched = time.perf_counter()
+        with self._lock:
+            self._apply_rows(rows)
+            applied = time.perf_counter()
+            items = [
+                (key, state) for key, state in self.series.items()
+                if state.pending_samples and self._watched(key, state, rooms)
+            ]
+            updates = self._analyze(items)
+            if updates:
+                self._published = {**self._published, **{key: state.latest for key, state in items}}
+            if rows:
+                self.watermark = max(int(row.id) for row in rows)
+            self.ticks += 1
+            self.rows_processed += len(rows)
+            self.last_tick_rows = len(rows)
+            self.last_tick_seconds = time.perf_counter() - start
+        self.timings.record("fetch", fetched - start)
+        self.timings.record("apply", applied - fetched)
+        self.timings.record("compute", start + self.last_tick_seconds - applied)
+        if len(rows) >= self.max_rows_per_tick:
+            logger.info("실시간 분석: 새 측정값이 %s건 이상이어서 다음 주기에 이어서 처리합니다", self.max_rows_per_tick)
+        return updates
+
+    def cam_summaries(self) -> List[Dict[str, Any]]:
+        """
+        마지막 호출(또는 상태 적재/복원) 이후 새 측정값이 들어온 (캠, 메트릭) 별 요약 목록 (HANDY_DISTR_ANALYSIS 한 행씩).
+        평균/표준편차는 캠의 모든 모델 윈도우를 합친 값, PPM 은 모델별 PPM 의 측정값 수 가중 평균(합친 분포의 불량률)이며
+        기울기는 (캠, 메트릭) 별 최근 PPM_SLOPE_POINTS 번의 요약 PPM 으로 계산합니다.
+        윈도우 통계만 사용하므로 poll() 의 구독 room 과 관계없이 모든 캠을 요약합니다.
+        """
+        with self._lock:
+            touched = sorted(self._touched_cams)
+            self._touched_cams = set()
+            return self._summarize_cams(touched)
+
+    def _summarize_cams(self, cam_keys: List[CamKey]) -> List[Dict[str, Any]]:
+        analyzed_at = datetime.now().isoformat()
+        summaries = []
+        for cam_key in cam_keys:
+            windows = [self.series[key].window for key in self._cam_series.get(cam_key, ())]
+            windows = [window for window in windows if window.count >= 2]
+            if not windows:
+                continue
+            pooled = RunningStats()
+            for window in windows:
+                pooled.merge(window)
+            counts = np.array([window.count for window in windows], dtype=np.float64)
+            ppms = ppm_from_stats(
+                np.array([window.mean for window in windows]), np.array([window.std(ddof=1) for window in windows]),
+                self.usl, self.lsl
+            )
+            ppm = float((counts * ppms).sum() / counts.sum())
+
+            history = self._cam_ppm.setdefault(cam_key, deque(maxlen=PPM_SLOPE_POINTS))
+            history.append(ppm)
+            slope = float(rolling_ppm_slope(np.asarray(history))[0]) if len(history) == PPM_SLOPE_POINTS else None
+            summaries.append({
+                "analyzed_at": analyzed_at,
+                "cam_number": cam_key[0],
+                "metric": cam_key[1],
+                "mean": round(float(pooled.mean), 4),
+                "std_dev": round(pooled.std(ddof=1), 4),
+                "predicted_ppm": round(ppm, 2),
+                "ppm_slope": round(slope, 2) if slope is not None else None,
+                "sample_count": pooled.count
+            })
+        return summaries
+
+    def _analyze(self, items: List[Tuple[SeriesKey, LiveSeriesState]]) -> List[Dict[str, Any]]:
+        """시계열을 workers 개 묶음으로 나눠 분석합니다 (시계열마다 한 묶음에만 속하므로 상태를 동시에 바꾸지 않음)."""
+        shards = min(self.workers, len(items) // MIN_SHARD_SERIES)
+        if shards <= 1:
+            return analyze_series(items, self.usl, self.lsl)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="live-analysis")
+        size = math.ceil(len(items) / shards)
+        futures = [
+            self._executor.submit(analyze_series, items[offset:offset + size], self.usl, self.lsl)
+            for offset in range(0, len(items), size)
+        ]
+        return [update for future in futures for update in future.result()]
+
+    def _create_detector(self) -> Optional[ControlChartDetector]:
+        if self.detector_kind is None:
+            return None
+        return create_detector(self.detector_kind, self.detector_warmup, **self.detector_params)
+
+    def _detector_config(self) -> Optional[Dict[str, Any]]:
+        if self.detector_kind is None:
+            return None
+        return {"kind": self.detector_kind, "warmup": self.detector_warmup, "params": self.detector_params}
+
+    @staticmethod
+    def _export_detector(state: LiveSeriesState) -> Optional[Dict[str, Any]]:
+        if state.detector is None:
+            return None
+        return {
+            "state": state.detector.export_state(),
+            "statistic": state.drift_statistic,
+            "pending_signals": state.pending_drift_signals
+        }
+
+    def close(self):
+        """분석 스레드 풀을 종료합니다."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @staticmethod
+    def _watched(key: SeriesKey, state: LiveSeriesState, rooms: Optional[Collection[str]]) -> bool:
+        return rooms is None or any(room in rooms for room in state.rooms(key))
+
+    def _apply_rows(self, rows):
+        """
+        (id, model_name, cam_number, timestamp, angle, torque, allowance, line_info) 행을 시계열별로 묶어
+        윈도우에 추가합니다. NULL 측정값은 건너뜁니다.
+        """
+        if not rows:
+            return
+        ids, models, cams, timestamps, angles, torques, _, lines = zip(*rows)
+        ids = np.asarray(ids, dtype=np.int64)
+        metric_values = {
+            "angle": np.asarray(angles, dtype=np.float64),
+            "torque": np.asarray(torques, dtype=np.float64)
+        }
+
+        groups: Dict[Tuple[str, int], list] = {}
+        for index, group_key in enumerate(zip((model or "" for model in models), cams)):
+            groups.setdefault((group_key[0], int(group_key[1])), []).append(index)
+
+        for (model_name, cam_number), index in groups.items():
+            index = np.asarray(index)
+            for metric, values in metric_values.items():
+                selected = index[~np.isnan(values[index])]
+                if len(selected) == 0:
+                    continue
+                key = (model_name, cam_number, metric)
+                state = self.series.get(key)
+                if state is None:
+                    state = self.series[key] = LiveSeriesState(self.window, self._create_detector())
+                    self._cam_series.setdefault((cam_number, metric), []).append(key)
+                state.add(ids[selected], [timestamps[k] for k in selected], values[selected], lines[selected[-1]])
+                self._touched_cams.add((cam_number, metric))
+
+    def latest(self, rooms: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
+        """시계열별 마지막 분석 결과 (rooms 가 주어지면 해당 room 에 속한 시계열만). 분석 중에도 기다리지 않습니다."""
+        published = self._published
+        return [
+            update for update in published.values()
+            if rooms is None or any(
+                room in rooms for room in series_rooms(update["model_name"], update["line_info"], update["cam_number"])
+            )
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "series": len(self.series),
+                "window": self.window,
+                "watermark": self.watermark,
+                "warmed": self.warmed,
+                "ticks": self.ticks,
+                "rows_processed": self.rows_processed,
+                "last_tick_rows": self.last_tick_rows,
+                "pending_series": sum(1 for state in self.series.values() if state.pending_samples),
+                "last_tick_ms": round(self.last_tick_seconds * 1000, 3),
+                "workers": self.workers,
+                "detector": self.detector_kind,
+                "drift_signals": sum(state.detector.signals for state in self.series.values() if state.detector is not None),
+                "timings": self.timings.stats()
+            }
+
+
+# 애플리케이션 전역 실시간 분석 상태
+live_analyzer = LiveAnalyzer(
+    window=int(os.getenv("LIVE_ANALYSIS_WINDOW", "500")),
+    usl=float(os.getenv("LIVE_ANALYSIS_USL", str(DEFAULT_USL))),
+    lsl=float(os.getenv("LIVE_ANALYSIS_LSL", str(DEFAULT_LSL))),
+    max_rows_per_tick=int(os.getenv("LIVE_ANALYSIS_MAX_ROWS_PER_TICK", "50000")),
+    workers=int(os.getenv("LIVE_ANALYSIS_WORKERS", str(min(8, os.cpu_count() or 1)))),
+    detector=os.getenv("LIVE_DETECTOR", "none"),
+    detector_warmup=int(os.getenv("LIVE_DETECTOR_WARMUP", "100")),
+    detector_params={
+        "ewma_lambda": float(os.getenv("LIVE_DETECTOR_EWMA_LAMBDA", "0.2")),
+        "ewma_limit": float(os.getenv("LIVE_DETECTOR_EWMA_LIMIT", "3.0")),
+        "cusum_k": float(os.getenv("LIVE_DETECTOR_CUSUM_K", "0.5")),
+        "cusum_h": float(os.getenv("LIVE_DETECTOR_CUSUM_H", "5.0")),
+    },
+)
@@ -0,0 +1,473 @@
+"""
+여러 API 워커에 실시간 분석 결과를 나눠 주는 메시지 버스.
+
+uvicorn 워커를 여러 개 띄우면 워커마다 분석 루프가 돌게 되므로, 분석(프로듀서)은 한 워커에서만 수행하고
+나머지 워커(릴레이)는 버스로 받은 분석 결과를 자신에게 연결된 클라이언트에게 전송합니다.
+
+- UPDATES_TOPIC: 프로듀서 -> 릴레이. {"kind": "updates" | "snapshot", "producer": id, "updates": [...]}
+- CONTROL_TOPIC: 릴레이 -> 프로듀서. {"kind": "hello"} 를 받으면 프로듀서는 전체 최신 값을 snapshot 으로 보냄
+
+버스 주소(LIVE_BUS_URL):
+- memory://                   같은 프로세스 안에서만 동작 (테스트용)
+- unix:///tmp/zscore-live.sock 프로듀서 워커가 Unix 소켓 브로커를 띄우고 같은 호스트의 워커들이 접속
+- redis://host:6379/0         Redis pub/sub (redis 패키지 필요)
+
+워커 역할(LIVE_ROLE):
+- standalone (기본) 버스 없이 단일 프로세스로 동작 (구독 중인 시계열만 분석)
+- auto               같은 호스트의 워커끼리 파일 락(ProducerLock)으로 프로듀서를 선출. 락을 가진 워커가 종료되면 다른 워커가 이어받음
+- producer / relay   역할을 직접 지정 (여러 호스트에 걸쳐 배포할 때)
+"""
+import asyncio
+import json
+import logging
+import os
+import platform
+from collections import defaultdict
+from typing import Any, Collection, Dict, List, Optional, Set
+
+from .live_frames import series_id
+from .live_subscriptions import series_rooms
+
+# 선택적 의존성: 설치되어 있지 않으면 redis:// 버스 생성 시 ValueError
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+UPDATES_TOPIC = "zscore.live.updates"
+CONTROL_TOPIC = "zscore.live.control"
+# 구독자 하나가 처리하지 못하고 쌓아 둘 수 있는 메시지 수 (넘으면 오래된 메시지부터 버림)
+SUBSCRIBER_QUEUE_SIZE = 256
+# Unix 소켓 메시지(JSON 한 줄) 최대 크기. 전체 시계열 snapshot 도 들어가도록 넉넉하게 설정
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+def _put_latest(queue: asyncio.Queue, message: Dict[str, Any]) -> bool:
+    """큐가 가득 차면 가장 오래된 메시지를 버리고 넣습니다. 버린 메시지가 있으면 True."""
+    dropped = False
+    if queue.full():
+        queue.get_nowait()
+        dropped = True
+    queue.put_nowait(message)
+    return dropped
+
+
+class InProcessBus:
+    """같은 프로세스 안의 구독자에게만 전달하는 버스 (테스트와 단일 프로세스 실행용)"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+        self.published = 0
+        self.dropped = 0
+
+    async def start(self):
+        pass
+
+    async def wait_connected(self, timeout: float) -> bool:
+        return True
+
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        self.published += 1
+        for queue in self._subscribers.get(topic, ()):
+            self.dropped += _put_latest(queue, message)
+
+    async def subscribe(self, topic: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[topic].append(queue)
+        return queue
+
+    async def close(self):
+        self._subscribers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "published": self.published, "dropped": self.dropped}
+
+
+class UnixSocketBroker:
+    """
+    Unix 소켓 pub/sub 브로커. 한 줄에 JSON 하나씩 주고받습니다.
+    클라이언트 -> 브로커: {"op": "sub", "topic": ...} / {"op": "pub", "topic": ..., "data": ...}
+    브로커 -> 클라이언트: {"topic": ..., "data": ...}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._topics: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.forwarded = 0
+        self.dropped = 0
+
+    async def start(self):
+        if os.path.exists(self.path):
+            # 종료된 이전 프로듀서가 남긴 소켓 파일
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=MAX_MESSAGE_BYTES)
+        logger.info("실시간 분석 버스 브로커 시작: %s", self.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        outbox: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        sender = asyncio.create_task(self._send_loop(outbox, writer))
+        topics: Set[str] = set()
+        try:
+            async for line in reader:
+                request = json.loads(line)
+                if request.get("op") == "sub":
+                    topics.add(request["topic"])
+                    self._topics[request["topic"]].add(outbox)
+                elif request.get("op") == "pub":
+                    line = json.dumps({"topic": request["topic"], "data": request["data"]}).encode("utf-8") + b"\n"
+                    for queue in self._topics.get(request["topic"], ()):
+                        self.forwarded += 1
+                        self.dropped += _put_latest(queue, line)
+        except (ConnectionError, ValueError) as e:
+            logger.debug("실시간 분석 버스 연결 종료: %s", e)
+        finally:
+            for topic in topics:
+                self._topics[topic].discard(outbox)
+            sender.cancel()
+            writer.close()
+
+    @staticmethod
+    async def _send_loop(outbox: asyncio.Queue, writer: asyncio.StreamWriter):
+        # 느린 구독자가 다른 구독자에게 전달하는 것을 막지 않도록 연결마다 따로 전송
+        while True:
+            writer.write(await outbox.get())
+            await writer.drain()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class UnixSocketBus:
+    """UnixSocketBroker 에 접속하는 버스 클라이언트. 연결이 끊기면 다시 접속하여 구독을 복구합니다."""
+
+    def __init__(self, path: str, reconnect_seconds: float = 1.0):
+        self.path = path
+        self.reconnect_seconds = reconnect_seconds
+        self.broker: Optional[UnixSocketBroker] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    async def start_broker(self):
+        """이 프로세스가 프로듀서가 되면 브로커를 띄웁니다."""
+        if self.broker is None:
+            self.broker = UnixSocketBroker(self.path)
+            await self.broker.start()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_BYTES)
+            except (ConnectionError, FileNotFoundError):
+                await asyncio.sleep(self.reconnect_seconds)
+                continue
+            self._writer = writer
+            for topic in self._subscribers:
+                self._write({"op": "sub", "topic": topic})
+            self._connected.set()
+            try:
+                async for line in reader:
+                    message = json.loads(line)
+                    for queue in self._subscribers.get(message["topic"], ()):
+                        self.dropped += _put_latest(queue, message["data"])
+            except (ConnectionError, ValueError) as e:
+                logger.debug("실시간 분석 버스 연결 끊김: %s", e)
+            self._connected.clear()
+            self._writer = None
+            self.reconnects += 1
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def _write(self, request: Dict[str, Any]):
+        self._writer.write(json.dumps(request).encode("utf-8") + b"\n")
+
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        if self._writer is None:
+            # 브로커에 연결되지 않은 동안의 메시지는 버림 (다음 주기 또는 snapshot 으로 복구)
+            self.dropped += 1
+            return
+        self.published += 1
+        self._write({"op": "pub", "topic": topic, "data": message})
+        await self._writer.drain()
+
+    async def subscribe(self, topic: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[topic].append(queue)
+        if self._writer is not None:
+            self._write({"op": "sub", "topic": topic})
+        return queue
+
+    async def wait_connected(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.broker is not None:
+            await self.broker.close()
+            self.broker = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "unix",
+            "path": self.path,
+            "connected": self._connected.is_set(),
+            "broker": self.broker is not None,
+            "published": self.published,
+            "dropped": self.dropped + (self.broker.dropped if self.broker else 0),
+            "reconnects": self.reconnects
+        }
+
+
+class RedisBus:
+    """
+    Redis pub/sub 버스 (여러 호스트에 걸친 워커용).
+    수신 중 오류가 나면 reconnect_seconds 부터 두 배씩(최대 max_reconnect_seconds) 기다렸다가 pubsub 을 새로 만들어 다시 구독합니다.
+    """
+
+    def __init__(self, url: str, reconnect_seconds: float = 1.0, max_reconnect_seconds: float = 30.0):
+        if aioredis is None:
+            raise ValueError("redis:// live bus requires the 'redis' package")
+        self.url = url
+        self.reconnect_seconds = reconnect_seconds
+        self.max_reconnect_seconds = max_reconnect_seconds
+        self._client = aioredis.from_url(url)
+        self._pubsub = self._client.pubsub()
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+        # 구독 요청이 실패했거나 수신 오류가 난 뒤 다시 구독해야 하는지
+        self._resubscribe = False
+        self.published = 0
+        self.dropped = 0
+        self.errors = 0
+        self.reconnects = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        failures = 0
+        while True:
+            if not self._subscribers:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                if self._resubscribe:
+                    await self._reset_pubsub()
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as e:
+                failures += 1
+                self.errors += 1
+                self._resubscribe = True
+                delay = min(self.reconnect_seconds * 2 ** (failures - 1), self.max_reconnect_seconds)
+                logger.warning("실시간 분석 Redis 버스 수신 실패 (%s회 연속, %.0f초 후 다시 구독): %s", failures, delay, e)
+                await asyncio.sleep(delay)
+                continue
+            if failures:
+                failures = 0
+                self.reconnects += 1
+                logger.info("실시간 분석 Redis 버스 다시 구독 완료: %s", ", ".join(self._subscribers))
+            if message is None:
+                continue
+            try:
+                topic = message["channel"].decode("utf-8") if isinstance(message["channel"], bytes) else message["channel"]
+                data = json.loads(message["data"])
+            except (KeyError, TypeError, ValueError) as e:
+                # 형식이 잘못된 메시지 하나 때문에 수신을 멈추지 않음
+                self.dropped += 1
+                logger.warning("실시간 분석 Redis 버스 메시지를 읽을 수 없어 버립니다: %s", e)
+                continue
+            for queue in self._subscribers.get(topic, ()):
+                self.dropped += _put_latest(queue, data)
+
+    async def _reset_pubsub(self):
+        """pubsub 연결을 새로 만들고 지금까지 구독한 토픽을 모두 다시 구독합니다."""
+        stale, self._pubsub = self._pubsub, self._client.pubsub()
+        try:
+            await stale.close()
+        except Exception as e:
+            logger.debug("실시간 분석 Redis 버스 이전 pubsub 종료 실패: %s", e)
+        await self._pubsub.subscribe(*self._subscribers)
+        self._resubscribe = False
+
+    async def wait_connected(self, timeout: float) -> bool:
+        return True
+
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        self.published += 1
+        await self._client.publish(topic, json.dumps(message))
+
+    async def subscribe(self, topic: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        new_topic = topic not in self._subscribers
+        self._subscribers[topic].append(queue)
+        if new_topic and not self._resubscribe:
+            try:
+                await self._pubsub.subscribe(topic)
+            except Exception as e:
+                # 수신 태스크가 다시 연결하면서 구독
+                self._resubscribe = True
+                logger.warning("실시간 분석 Redis 버스 구독 실패 %s: %s", topic, e)
+        return queue
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._pubsub.close()
+        await self._client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "published": self.published,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "reconnects": self.reconnects
+        }
+
+
+def create_bus(url: str):
+    """LIVE_BUS_URL 로 버스를 만듭니다. 지원하지 않는 주소면 ValueError 를 발생시킵니다."""
+    if url.startswith("memory://"):
+        return InProcessBus()
+    if url.startswith("unix://"):
+        return UnixSocketBus(url[len("unix://"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBus(url)
+    raise ValueError(f"Unsupported live bus url: {url} (expected memory://, unix:// or redis://)")
+
+
+class ProducerLock:
+    """파일 락으로 같은 호스트의 워커 중 하나만 프로듀서가 되도록 합니다. 락은 프로세스가 끝나면 자동으로 풀립니다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            raise ValueError("LIVE_ROLE=auto requires fcntl (use producer/relay roles instead)")
+        handle = open(self.path, "a+")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class RelayLatest:
+    """릴레이 워커가 버스로 받은 시계열별 최신 분석 결과 (구독 시 키 프레임의 기준 값)"""
+
+    def __init__(self):
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def apply(self, updates: List[Dict[str, Any]]):
+        for update in updates:
+            self._latest[series_id(update)] = update
+
+    def latest(self, rooms: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
+        return [
+            update for update in self._latest.values()
+            if rooms is None or any(
+                room in rooms for room in series_rooms(update["model_name"], update.get("line_info"), update["cam_number"])
+            )
+        ]
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+
+LIVE_ROLES = ("standalone", "auto", "producer", "relay")
+
+
+class LiveRole:
+    """이 워커의 실시간 분석 역할과 버스"""
+
+    def __init__(self, role: str = "standalone", bus_url: str = "memory://", lock_path: str = "/tmp/zscore-live-producer.lock"):
+        if role not in LIVE_ROLES:
+            raise ValueError(f"Unknown LIVE_ROLE: {role} (expected one of {', '.join(LIVE_ROLES)})")
+        self.role = role
+        self.bus = create_bus(bus_url) if role != "standalone" else None
+        self.lock = ProducerLock(lock_path)
+        self.relay = RelayLatest()
+        self.worker_id = f"{platform.node()}:{os.getpid()}"
+
+    @property
+    def producing(self) -> bool:
+        """현재 이 워커가 분석을 수행하는지 (락을 새로 잡지는 않음)"""
+        return self.role in ("standalone", "producer") or (self.role == "auto" and self.lock.held)
+
+    def try_produce(self) -> bool:
+        """프로듀서 역할을 맡을 수 있으면 True. auto 역할은 락을 잡으면 프로듀서가 됩니다."""
+        if self.role == "auto":
+            return self.lock.try_acquire()
+        return self.producing
+
+    def latest(self, rooms: Optional[Collection[str]], analyzer) -> List[Dict[str, Any]]:
+        """구독 시 키 프레임의 기준 값: 프로듀서는 분석 상태에서, 릴레이는 버스로 받은 값에서 가져옴"""
+        return analyzer.latest(rooms) if self.producing else self.relay.latest(rooms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "role": self.role,
+            "worker": self.worker_id,
+            "producing": self.producing,
+            "relay_series": len(self.relay),
+            "bus": self.bus.stats() if self.bus is not None else None
+        }
+
+
+# 애플리케이션 전역 워커 역할
+live_role = LiveRole(
+    role=os.getenv("LIVE_ROLE", "standalone"),
+    bus_url=os.getenv("LIVE_BUS_URL", "memory://"),
+    lock_path=os.getenv("LIVE_PRODUCER_LOCK", "/tmp/zscore-live-producer.lock"),
+)
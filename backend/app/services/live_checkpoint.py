@@ -0,0 +1,144 @@
+"""
+실시간 분석 상태 체크포인트.
+
+프로듀서 워커는 interval 초마다 시계열별 윈도우, PPM 이력(기울기용), 검출기 상태, (캠, 메트릭) 요약 PPM 이력,
+알람 연속 위반 횟수와 측정 ID 워터마크를 하나의 압축 npz 파일로 저장합니다. 재시작하면 파일에서 상태를 복원하고 워터마크 이후 측정값만 다시 반영하므로,
+전체 시계열의 최근 이력을 다시 읽지 않고 몇 초 안에 정상 분석 결과를 보낼 수 있습니다.
+
+다음 경우에는 체크포인트를 쓰지 않고 기존처럼 최근 이력으로 상태를 적재합니다.
+- 파일이 없거나 읽을 수 없음, 형식 버전/윈도우 크기/규격/검출기 설정이 현재 설정과 다름
+- 저장한 지 max_age_seconds 가 지남 (밀린 측정값을 다시 반영하는 것보다 새로 적재하는 편이 빠르고 기울기도 의미가 없음)
+- DB 의 최대 측정 ID 가 워터마크보다 작음 (DB 가 초기화된 경우)
+
+같은 호스트의 다른 워커가 프로듀서를 이어받을 때도 같은 파일에서 복원합니다.
+"""
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..crud import analysis as analysis_crud
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 3
+
+
+class LiveCheckpoint:
+    """실시간 분석 상태(LiveAnalyzer + AlarmEngine)의 주기적 저장과 시작 시 복원. path 가 비어 있으면 사용하지 않습니다."""
+
+    def __init__(self, path: Optional[str], interval: float = 30.0, max_age_seconds: float = 3600.0):
+        self.path = path
+        self.interval = interval
+        self.max_age_seconds = max_age_seconds
+        self._last_save = time.monotonic()
+        self.saves = 0
+        self.failures = 0
+        self.last_save_seconds = 0.0
+        self.last_bytes = 0
+        self.last_saved_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.restored_series: Optional[int] = None
+        self.restored_watermark: Optional[int] = None
+        self.restore_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def maybe_save(self, analyzer, alarm_engine) -> bool:
+        """마지막 저장 후 interval 초가 지났으면 저장합니다."""
+        if not self.enabled or time.monotonic() - self._last_save < self.interval:
+            return False
+        return self.save(analyzer, alarm_engine)
+
+    def save(self, analyzer, alarm_engine) -> bool:
+        """상태를 임시 파일에 쓴 뒤 교체합니다 (쓰는 도중 종료되어도 이전 체크포인트는 그대로)."""
+        if not self.enabled:
+            return False
+        start = time.perf_counter()
+        arrays = analyzer.export_state()
+        if arrays is None:
+            return False
+        arrays.update(alarm_engine.export_state())
+        arrays["version"] = np.int64(CHECKPOINT_VERSION)
+        arrays["saved_at"] = np.float64(time.time())
+
+        self._last_save = time.monotonic()
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.warning("실시간 분석 체크포인트 저장 실패 %s: %s", self.path, e)
+            return False
+
+        self.saves += 1
+        self.last_bytes = os.path.getsize(self.path)
+        self.last_saved_at = datetime.now()
+        self.last_save_seconds = time.perf_counter() - start
+        return True
+
+    def restore(self, db, analyzer, alarm_engine) -> bool:
+        """체크포인트로 상태를 복원합니다. 복원하지 못하면 False (analyzer.poll 이 최근 이력으로 적재)."""
+        if not self.enabled or not os.path.exists(self.path):
+            return False
+        start = time.perf_counter()
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            if int(arrays["version"]) != CHECKPOINT_VERSION:
+                raise ValueError(f"unsupported checkpoint version {int(arrays['version'])}")
+            age = time.time() - float(arrays["saved_at"])
+            if age > self.max_age_seconds:
+                logger.info("실시간 분석 체크포인트가 %.0f초 전에 저장되어 최근 이력으로 다시 적재합니다", age)
+                return False
+            max_id = analysis_crud.get_max_measurement_id(db)
+            if max_id is None or int(max_id) < int(arrays["watermark"]):
+                logger.info("실시간 분석 체크포인트 워터마크가 DB 보다 앞서 있어 최근 이력으로 다시 적재합니다")
+                return False
+            series = analyzer.restore_state(arrays)
+            alarm_engine.restore_state(arrays)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("실시간 분석 체크포인트 복원 실패 %s: %s", self.path, e)
+            return False
+
+        self.restored_series = series
+        self.restored_watermark = int(arrays["watermark"])
+        self.restore_seconds = time.perf_counter() - start
+        logger.info(
+            "실시간 분석 체크포인트 복원 완료: 시계열 %s개, 워터마크 %s (%.0f초 전 저장, %.0fms)",
+            series, self.restored_watermark, age, self.restore_seconds * 1000
+        )
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "interval_seconds": self.interval,
+            "saves": self.saves,
+            "failures": self.failures,
+            "last_saved_at": self.last_saved_at.isoformat() if self.last_saved_at else None,
+            "last_save_ms": round(self.last_save_seconds * 1000, 3),
+            "last_bytes": self.last_bytes,
+            "last_error": self.last_error,
+            "restored_series": self.restored_series,
+            "restored_watermark": self.restored_watermark,
+            "restore_ms": round(self.restore_seconds * 1000, 3)
+        }
+
+
+# 애플리케이션 전역 체크포인트 (LIVE_CHECKPOINT_PATH 를 빈 값으로 두면 사용하지 않음)
+live_checkpoint = LiveCheckpoint(
+    os.getenv("LIVE_CHECKPOINT_PATH", "data/live_state/live_analysis.npz"),
+    interval=float(os.getenv("LIVE_CHECKPOINT_SECONDS", "30")),
+    max_age_seconds=float(os.getenv("LIVE_CHECKPOINT_MAX_AGE_SECONDS", "3600")),
+)
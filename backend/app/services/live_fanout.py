@@ -0,0 +1,237 @@
+"""
+실시간 분석 프레임의 클라이언트별 전송 큐 (WebSocket fan-out backpressure).
+
+분석 주기는 프레임을 클라이언트별 큐에 넣기만 하고, 실제 전송은 클라이언트마다 별도 태스크가
+응답(ack)을 기다리며 하나씩 보냅니다. 느린 클라이언트가 있어도 분석 주기와 다른 클라이언트는 지연되지 않습니다.
+
+- 큐는 room 별로 프레임을 하나만 보관하며, 아직 보내지 못한 프레임에 새 프레임이 오면 합쳐서(merge_frames)
+  시계열별 최신 값만 남깁니다. 대기 room 수가 max_queue 를 넘으면 가장 오래된 프레임을 버립니다
+  (클라이언트는 seq 가 끊긴 것을 보고 키 프레임을 다시 요청).
+- 응답이 slow_ack_seconds 보다 늦거나 ack_timeout 안에 오지 않으면 저속 모드로 낮춰
+  slow_interval 초마다 합쳐진 프레임을 한 번씩 보냅니다. 응답이 빨라지면 원래대로 돌아갑니다.
+- 응답 없음이 max_timeouts 번 연속되거나, 가장 오래된 대기 프레임이 max_lag_seconds 이상 밀리면 연결을 끊습니다.
+- 전송 자체가 실패(예외)하면 큐를 비우고 바로 연결을 끊습니다.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .live_frames import DeltaFrameEncoder, encode_frame, merge_frames
+
+logger = logging.getLogger(__name__)
+
+# (sid, payload, timeout) -> 응답을 받았으면 True, 시간 초과면 False
+SendFunc = Callable[[str, Any, float], Awaitable[bool]]
+DisconnectFunc = Callable[[str], Awaitable[None]]
+
+
+class PendingFrame:
+    """큐에 넣은 프레임. 같은 프레임을 받는 클라이언트끼리 포맷별 인코딩 결과를 공유합니다."""
+
+    __slots__ = ("frame", "encoder", "_payloads")
+
+    def __init__(self, frame: Dict[str, Any], encoder: Optional[DeltaFrameEncoder] = None):
+        self.frame = frame
+        self.encoder = encoder
+        self._payloads: Dict[str, Any] = {}
+
+    def payload(self, fmt: str):
+        if fmt not in self._payloads:
+            self._payloads[fmt] = encode_frame(self.frame, fmt)
+        return self._payloads[fmt]
+
+    def merge(self, newer: "PendingFrame") -> "PendingFrame":
+        return PendingFrame(merge_frames(self.frame, newer.frame), newer.encoder or self.encoder)
+
+
+class ClientChannel:
+    """클라이언트 하나의 전송 큐와 전송 통계"""
+
+    def __init__(self, sid: str, fmt: str):
+        self.sid = sid
+        self.fmt = fmt
+        # room -> (대기 프레임, 처음 대기하기 시작한 시각)
+        self.pending: "OrderedDict[str, Tuple[PendingFrame, float]]" = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.degraded = False
+        self.closing = False
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.consecutive_timeouts = 0
+        self.last_ack_seconds: Optional[float] = None
+
+    def oldest_wait(self, now: float) -> float:
+        return now - min(since for _, since in self.pending.values()) if self.pending else 0.0
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "format": self.fmt,
+            "queue_depth": len(self.pending),
+            "oldest_wait_seconds": round(self.oldest_wait(now), 3),
+            "degraded": self.degraded,
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "timeouts": self.timeouts,
+            "last_ack_ms": round(self.last_ack_seconds * 1000, 3) if self.last_ack_seconds is not None else None
+        }
+
+
+class FanoutHub:
+    """
+    클라이언트별 전송 큐 모음. 모든 메서드는 이벤트 루프에서 호출해야 합니다.
+    bind() 로 실제 전송/연결 종료 함수를 연결한 뒤 사용합니다.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 64,
+        ack_timeout: float = 10.0,
+        slow_ack_seconds: float = 2.0,
+        slow_interval: float = 15.0,
+        max_timeouts: int = 3,
+        max_lag_seconds: float = 60.0
+    ):
+        self.max_queue = max(max_queue, 1)
+        self.ack_timeout = ack_timeout
+        self.slow_ack_seconds = slow_ack_seconds
+        self.slow_interval = slow_interval
+        self.max_timeouts = max(max_timeouts, 1)
+        self.max_lag_seconds = max_lag_seconds
+        self.clients: Dict[str, ClientChannel] = {}
+        self._send: Optional[SendFunc] = None
+        self._disconnect: Optional[DisconnectFunc] = None
+        # 연결이 끊긴 클라이언트의 누적 통계
+        self._retired = {"sent": 0, "merged": 0, "dropped": 0, "timeouts": 0}
+        self.slow_disconnects = 0
+        self.send_failures = 0
+
+    def bind(self, send: SendFunc, disconnect: DisconnectFunc):
+        self._send = send
+        self._disconnect = disconnect
+
+    def add_client(self, sid: str, fmt: str):
+        channel = self.clients.get(sid)
+        if channel is None:
+            channel = self.clients[sid] = ClientChannel(sid, fmt)
+            channel.task = asyncio.create_task(self._run(channel))
+        channel.fmt = fmt
+
+    def remove_client(self, sid: str):
+        channel = self.clients.pop(sid, None)
+        if channel is None:
+            return
+        if channel.task is not None:
+            channel.task.cancel()
+        for field in self._retired:
+            self._retired[field] += getattr(channel, field)
+
+    def enqueue(self, sid: str, room: str, item: PendingFrame):
+        """room 프레임을 클라이언트 큐에 넣습니다. 대기 중인 같은 room 프레임이 있으면 합칩니다."""
+        channel = self.clients.get(sid)
+        if channel is None or channel.closing:
+            return
+        now = time.monotonic()
+        queued = channel.pending.pop(room, None)
+        if queued is not None:
+            item, since = queued[0].merge(item), queued[1]
+            channel.merged += 1
+        else:
+            since = now
+            if len(channel.pending) >= self.max_queue:
+                channel.pending.popitem(last=False)
+                channel.dropped += 1
+        channel.pending[room] = (item, since)
+
+        if channel.oldest_wait(now) > self.max_lag_seconds:
+            logger.warning("실시간 분석: 클라이언트 %s 전송이 %.0f초 이상 밀려 연결을 끊습니다", sid, self.max_lag_seconds)
+            self._drop(channel)
+            return
+        channel.wakeup.set()
+
+    def discard(self, sid: str, room: str):
+        """구독 해제한 room 의 대기 프레임을 버립니다."""
+        channel = self.clients.get(sid)
+        if channel is not None:
+            channel.pending.pop(room, None)
+
+    def _drop(self, channel: ClientChannel, slow: bool = True):
+        channel.closing = True
+        channel.dropped += len(channel.pending)
+        channel.pending.clear()
+        if slow:
+            self.slow_disconnects += 1
+        if self._disconnect is not None:
+            asyncio.create_task(self._disconnect(channel.sid))
+
+    async def _run(self, channel: ClientChannel):
+        while not channel.closing:
+            await channel.wakeup.wait()
+            channel.wakeup.clear()
+            while channel.pending and not channel.closing:
+                _, (item, _) = channel.pending.popitem(last=False)
+                payload = item.payload(channel.fmt)
+                start = time.monotonic()
+                try:
+                    acked = await self._send(channel.sid, payload, self.ack_timeout)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("실시간 분석: 클라이언트 %s 전송 실패로 연결을 끊습니다: %s", channel.sid, e)
+                    self.send_failures += 1
+                    self._drop(channel, slow=False)
+                    return
+                if not acked:
+                    channel.timeouts += 1
+                    channel.consecutive_timeouts += 1
+                    channel.degraded = True
+                    if channel.consecutive_timeouts >= self.max_timeouts:
+                        logger.warning("실시간 분석: 클라이언트 %s 가 %s회 연속 응답하지 않아 연결을 끊습니다",
+                                       channel.sid, channel.consecutive_timeouts)
+                        self._drop(channel)
+                        return
+                    continue
+                channel.sent += 1
+                channel.consecutive_timeouts = 0
+                channel.last_ack_seconds = time.monotonic() - start
+                if item.encoder is not None:
+                    item.encoder.record_bytes(channel.fmt, payload)
+                if channel.degraded != (channel.last_ack_seconds > self.slow_ack_seconds):
+                    channel.degraded = not channel.degraded
+                    logger.info("실시간 분석: 클라이언트 %s %s", channel.sid, "저속 모드 전환" if channel.degraded else "저속 모드 해제")
+            if channel.degraded:
+                # 저속 모드: 그동안 들어온 프레임이 합쳐지도록 기다렸다가 보냄
+                await asyncio.sleep(self.slow_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        clients = {sid: channel.stats(now) for sid, channel in self.clients.items()}
+        totals = {field: value + sum(client[field] for client in clients.values()) for field, value in self._retired.items()}
+        depths = [client["queue_depth"] for client in clients.values()]
+        return {
+            "clients": len(clients),
+            "degraded_clients": sum(1 for client in clients.values() if client["degraded"]),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "slow_disconnects": self.slow_disconnects,
+            "send_failures": self.send_failures,
+            **totals,
+            "per_client": clients
+        }
+
+
+# 애플리케이션 전역 fan-out 큐
+live_fanout = FanoutHub(
+    max_queue=int(os.getenv("LIVE_CLIENT_QUEUE_SIZE", "64")),
+    ack_timeout=float(os.getenv("LIVE_CLIENT_ACK_TIMEOUT_SECONDS", "10")),
+    slow_ack_seconds=float(os.getenv("LIVE_CLIENT_SLOW_ACK_SECONDS", "2")),
+    slow_interval=float(os.getenv("LIVE_CLIENT_SLOW_INTERVAL_SECONDS", "15")),
+    max_timeouts=int(os.getenv("LIVE_CLIENT_MAX_TIMEOUTS", "3")),
+    max_lag_seconds=float(os.getenv("LIVE_CLIENT_MAX_LAG_SECONDS", "60")),
+)
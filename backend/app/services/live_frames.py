@@ -0,0 +1,195 @@
+"""
+실시간 분석 결과의 배치/델타 프레임 인코딩.
+
+주기마다 시계열별로 메시지를 보내는 대신, 한 주기의 변경 사항을 프레임 하나로 묶어 보냅니다.
+
+    {"room": "cam:2", "seq": 42, "keyframe": false, "analyzed_at": "...",
+     "series": [{"id": "M1:2:angle", "predicted_ppm": 812.3, "mean": 0.0123}, ...]}
+
+- 델타 프레임: 값이 바뀐 시계열의, 직전에 보낸 값과 달라진 필드만 포함 (식별 필드는 id 로 대체)
+- 키 프레임: 모든 시계열의 전체 필드 포함 (keyframe_interval 주기마다, 구독 시, 재동기화 요청 시)
+인코더는 구독 room 마다 하나씩 두며(live_subscriptions), 프레임의 "room" 으로 구분합니다.
+클라이언트는 room 별 seq 가 연속되지 않으면 "analysis_resync" 이벤트로 키 프레임을 요청합니다.
+전송이 밀린 클라이언트에게는 대기 중인 프레임을 합쳐(merge_frames) 보내며, 합친 델타 프레임은
+"from_seq" 에 첫 프레임의 seq 를 담습니다 (from_seq 가 마지막으로 받은 seq + 1 이면 연속).
+
+연결 직후에는 구독과 관계없이 메모리의 시계열별 최신 값을 담은 "analysis_snapshot" 을 보내므로,
+다시 연결한 화면이 DB 를 조회하지 않고 바로 최신 상태를 표시할 수 있습니다.
+"""
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import wire_format
+
+FRAME_EVENT = "analysis_batch"
+RESYNC_EVENT = "analysis_resync"
+SNAPSHOT_EVENT = "analysis_snapshot"
+FRAME_FORMATS = ("json", "msgpack")
+
+# 시계열 식별 필드 (키 프레임과 처음 보내는 시계열에만 포함)
+IDENTITY_FIELDS = ("model_name", "cam_number", "metric")
+# 프레임 단위로 한 번만 보내는 필드
+FRAME_FIELDS = ("analyzed_at",)
+
+
+def series_id(update: Dict[str, Any]) -> str:
+    return f"{update['model_name']}:{update['cam_number']}:{update['metric']}"
+
+
+def encode_frame(frame: Dict[str, Any], fmt: str = "json"):
+    """json 이면 그대로(Socket.IO 가 JSON 으로 직렬화), msgpack 이면 바이너리로 인코딩합니다."""
+    if fmt == "msgpack":
+        if wire_format.msgpack is None:
+            raise ValueError("msgpack frames require the 'msgpack' package")
+        return wire_format.msgpack.packb(frame, use_bin_type=True)
+    return frame
+
+
+def merge_frames(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    같은 room 의 연속된 두 프레임을 하나로 합칩니다. 시계열별로 newer 의 필드가 older 를 덮어쓰므로
+    아직 보내지 못한 이전 값은 최신 값으로 대체됩니다. newer 가 키 프레임이면 newer 만으로 충분합니다.
+    """
+    if newer["keyframe"]:
+        return newer
+    series = {entry["id"]: dict(entry) for entry in older["series"]}
+    for entry in newer["series"]:
+        series.setdefault(entry["id"], {}).update(entry)
+    merged = {**newer, "keyframe": older["keyframe"], "series": list(series.values())}
+    if older["keyframe"]:
+        merged.pop("from_seq", None)
+    else:
+        merged["from_seq"] = older.get("from_seq", older["seq"])
+    return merged
+
+
+def latest_distribution(series: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """시계열별 최신 분석 결과로 메트릭별 캠별 최신 평균/표준편차를 만듭니다 (/analysis/distribution 과 같은 형식)."""
+    latest: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for update in series:
+        key = (update["metric"], update["cam_number"])
+        current = latest.get(key)
+        if current is None or (update.get("last_measured_at") or "") > (current.get("last_measured_at") or ""):
+            latest[key] = update
+    distribution: Dict[str, List[Dict[str, Any]]] = {}
+    for (metric, cam_number), update in sorted(latest.items()):
+        distribution.setdefault(metric, []).append(
+            {"cam_number": str(cam_number), "mean": update["mean"], "std_dev": update["std_dev"]}
+        )
+    return distribution
+
+
+def snapshot_message(series: List[Dict[str, Any]], alarms: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """연결 직후 보내는 전체 최신 상태: 시계열별 최신 분석 결과, 캠별 분포, 최근 알람"""
+    return {
+        "analyzed_at": datetime.now().isoformat(),
+        "series": series,
+        "distribution": latest_distribution(series),
+        "alarms": alarms
+    }
+
+
+def frame_formats_available() -> List[str]:
+    return [fmt for fmt in FRAME_FORMATS if fmt != "msgpack" or wire_format.msgpack is not None]
+
+
+class DeltaFrameEncoder:
+    """시계열별 마지막 전송 값을 기억하여 주기별 델타 프레임을 만듭니다."""
+
+    def __init__(self, keyframe_interval: int = 12):
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.seq = 0
+        self._sent: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.keyframes = 0
+        self.fields_sent = 0
+        self.fields_skipped = 0
+        self.bytes_sent: Dict[str, int] = {}
+
+    def next_frame(self, updates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        이번 주기의 분석 결과로 다음 프레임을 만듭니다.
+        보낼 변경 사항이 없고 키 프레임 차례도 아니면 None 을 반환하며 seq 는 증가하지 않습니다.
+        """
+        with self._lock:
+            keyframe = self.seq % self.keyframe_interval == 0
+            series = []
+            for update in updates:
+                key = series_id(update)
+                previous = self._sent.get(key)
+                current = {field: value for field, value in update.items() if field not in FRAME_FIELDS}
+                self._sent[key] = current
+                if keyframe:
+                    continue
+                if previous is None:
+                    entry = {"id": key, **current}
+                else:
+                    entry = {"id": key}
+                    for field, value in current.items():
+                        if field in IDENTITY_FIELDS:
+                            continue
+                        if previous.get(field) != value:
+                            entry[field] = value
+                        else:
+                            self.fields_skipped += 1
+                if len(entry) > 1:
+                    series.append(entry)
+
+            if keyframe:
+                series = [{"id": key, **fields} for key, fields in self._sent.items()]
+            if not series:
+                return None
+
+            self.seq += 1
+            self.frames += 1
+            self.keyframes += int(keyframe)
+            self.fields_sent += sum(len(entry) - 1 for entry in series)
+            return self._frame(series, keyframe)
+
+    def reset(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """기준 값을 updates 로 바꾸고 그 전체 값을 담은 키 프레임을 반환합니다 (seq 는 증가하지 않음)."""
+        with self._lock:
+            self._sent = {
+                series_id(update): {field: value for field, value in update.items() if field not in FRAME_FIELDS}
+                for update in updates
+            }
+        return self.snapshot_frame()
+
+    def snapshot_frame(self) -> Dict[str, Any]:
+        """현재까지 보낸 모든 시계열의 전체 값 (재동기화용 키 프레임, seq 는 증가하지 않음)"""
+        with self._lock:
+            return self._frame([{"id": key, **fields} for key, fields in self._sent.items()], True)
+
+    def _frame(self, series: List[Dict[str, Any]], keyframe: bool) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "keyframe": keyframe,
+            "analyzed_at": datetime.now().isoformat(),
+            "series": series
+        }
+
+    def record_bytes(self, fmt: str, payload):
+        """전송한 프레임 크기를 포맷별로 집계합니다 (json 은 직렬화 크기로 추정)."""
+        size = len(payload) if isinstance(payload, (bytes, bytearray)) else len(
+            json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        )
+        with self._lock:
+            self.bytes_sent[fmt] = self.bytes_sent.get(fmt, 0) + size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total_fields = self.fields_sent + self.fields_skipped
+            return {
+                "seq": self.seq,
+                "frames": self.frames,
+                "keyframes": self.keyframes,
+                "series_tracked": len(self._sent),
+                "fields_sent": self.fields_sent,
+                "fields_skipped": self.fields_skipped,
+                "delta_ratio": self.fields_skipped / total_fields if total_fields else 0.0,
+                "bytes_sent": dict(self.bytes_sent),
+                "formats_available": frame_formats_available()
+            }
@@ -0,0 +1,185 @@
+"""
+실시간 분석 결과(HANDY_DISTR_ANALYSIS)와 알람(HANDY_ALARMS)의 일괄 저장.
+
+분석 주기는 결과를 메모리 버퍼에 넣기만 하고, 별도 스레드가 flush_interval 초마다 또는 버퍼가
+batch_size 건 이상 쌓이면 batch_size 건씩 bulk insert 합니다. 분석 루프와 이벤트 루프는 DB 쓰기를 기다리지 않습니다.
+
+- 저장에 실패하면 버퍼에 되돌려 두고 retry_seconds 부터 두 배씩(최대 max_retry_seconds) 늘려 가며 다시 시도
+- DB 장애가 길어져 버퍼가 max_buffer 건을 넘으면 가장 오래된 결과부터 버림
+- 종료 시(stop) 남은 결과를 한 번 더 저장 시도
+
+HANDY_DISTR_ANALYSIS 에는 모델 컬럼이 없으므로 모델별 결과가 아니라 LiveAnalyzer.cam_summaries() 의
+(캠, 메트릭) 요약(캠의 모든 모델 윈도우를 합친 통계)을 주기마다 (캠, 메트릭) 당 한 행씩 저장합니다.
+상태를 적재/복원한 직후에는 새 측정값이 들어온 캠만 저장하므로 재시작해도 같은 결과를 다시 넣지 않습니다.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from ..crud import analysis as analysis_crud
+
+logger = logging.getLogger(__name__)
+
+
+def history_record(update: Dict[str, Any]) -> Dict[str, Any]:
+    """(캠, 메트릭) 요약(LiveAnalyzer.cam_summaries() 항목)을 HANDY_DISTR_ANALYSIS 행으로 변환합니다."""
+    return {
+        "analyzed_at": datetime.fromisoformat(update["analyzed_at"]),
+        "cam_number": update["cam_number"],
+        "metric_type": update["metric"],
+        "mean": update["mean"],
+        "std_dev": update["std_dev"],
+        "predicted_ppm": update["predicted_ppm"],
+        "ppm_slope": update["ppm_slope"]
+    }
+
+
+class BatchedWriter:
+    """메모리 버퍼와 백그라운드 저장 스레드. to_record 로 변환한 행을 insert(db, records) 로 저장합니다."""
+
+    def __init__(
+        self,
+        name: str,
+        insert: Callable[[Any, List[Dict[str, Any]]], int],
+        to_record: Callable[[Dict[str, Any]], Dict[str, Any]],
+        enabled: bool = True,
+        flush_interval: float = 10.0,
+        batch_size: int = 500,
+        max_buffer: int = 50000,
+        retry_seconds: float = 5.0,
+        max_retry_seconds: float = 60.0
+    ):
+        self.name = name
+        self.insert = insert
+        self.to_record = to_record
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.batch_size = max(batch_size, 1)
+        self.max_buffer = max(max_buffer, self.batch_size)
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session_factory: Optional[Callable] = None
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.dropped = 0
+        self.last_flush_seconds = 0.0
+        self.last_error: Optional[str] = None
+
+    def start(self, session_factory: Callable):
+        """session_factory 로 DB 세션을 만들어 저장하는 스레드를 시작합니다."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._session_factory = session_factory
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """남은 결과를 저장하고 스레드를 종료합니다."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def add(self, items: List[Dict[str, Any]]):
+        """저장할 항목을 버퍼에 넣습니다 (DB 를 기다리지 않음)."""
+        if not self.enabled or not items:
+            return
+        records = [self.to_record(item) for item in items]
+        with self._lock:
+            self._buffer.extend(records)
+            self._trim_locked()
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _trim_locked(self):
+        overflow = len(self._buffer) - self.max_buffer
+        for _ in range(max(overflow, 0)):
+            self._buffer.popleft()
+        if overflow > 0:
+            self.dropped += overflow
+            logger.warning("%s 저장 버퍼가 가득 차 오래된 %s건을 버렸습니다", self.name, overflow)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if self.consecutive_failures:
+                # 재시도 대기 중에는 버퍼가 차도 깨어나지 않음
+                self._stopping.wait(min(self.retry_seconds * 2 ** (self.consecutive_failures - 1), self.max_retry_seconds))
+            else:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self) -> bool:
+        """버퍼의 행을 batch_size 건씩 저장합니다. 저장에 실패하면 남은 행을 버퍼에 되돌리고 False."""
+        while True:
+            with self._lock:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            if not batch:
+                return True
+
+            start = time.perf_counter()
+            db = self._session_factory()
+            try:
+                self.insert(db, batch)
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    self._buffer.extendleft(reversed(batch))
+                    self._trim_locked()
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.last_error = str(e)
+                logger.warning("%s %s건 저장 실패 (연속 %s회): %s", self.name, len(batch), self.consecutive_failures, e)
+                return False
+            finally:
+                db.close()
+
+            self.written += len(batch)
+            self.flushes += 1
+            self.consecutive_failures = 0
+            self.last_flush_seconds = time.perf_counter() - start
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None,
+            "buffered": buffered,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "dropped": self.dropped,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+            "last_error": self.last_error
+        }
+
+
+# 애플리케이션 전역 분석 결과 저장기
+live_history_writer = BatchedWriter(
+    "analysis-history",
+    analysis_crud.bulk_insert_distribution_analysis,
+    history_record,
+    enabled=os.getenv("LIVE_HISTORY_ENABLED", "true").lower() in ("1", "true", "yes"),
+    flush_interval=float(os.getenv("LIVE_HISTORY_FLUSH_SECONDS", "10")),
+    batch_size=int(os.getenv("LIVE_HISTORY_BATCH_SIZE", "500")),
+    max_buffer=int(os.getenv("LIVE_HISTORY_MAX_BUFFER", "50000")),
+    retry_seconds=float(os.getenv("LIVE_HISTORY_RETRY_SECONDS", "5")),
+)
@@ -0,0 +1,88 @@
+"""
+실시간 분석 주기의 단계별 소요 시간과 이벤트 루프 지연 측정.
+
+- StageTimings: 단계(fetch/apply/compute/frames/total 등)별 최근 window 번의 소요 시간 (마지막/평균/최대)
+- LoopLagMonitor: interval 초마다 잠들었다 깨어나는 시각이 예정보다 얼마나 늦었는지로 이벤트 루프 지연을 측정
+  (분석 계산이나 동기 호출이 이벤트 루프를 막으면 지연이 커짐)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimings:
+    """단계별 최근 window 번의 소요 시간. 분석 스레드와 이벤트 루프에서 함께 접근하므로 락으로 보호합니다."""
+
+    def __init__(self, window: int = 60):
+        self.window = max(window, 1)
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """단계별 {last_ms, avg_ms, max_ms, count} (count 는 집계 구간의 측정 횟수)"""
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self._samples.items()}
+        return {
+            stage: {
+                "last_ms": round(values[-1] * 1000, 3),
+                "avg_ms": round(sum(values) / len(values) * 1000, 3),
+                "max_ms": round(max(values) * 1000, 3),
+                "count": len(values)
+            }
+            for stage, values in samples.items() if values
+        }
+
+
+class LoopLagMonitor:
+    """이벤트 루프 지연 측정 태스크. run() 을 이벤트 루프에서 태스크로 실행합니다."""
+
+    def __init__(self, interval: float = 0.5, warn_seconds: float = 0.2, window: int = 120):
+        self.interval = interval
+        self.warn_seconds = warn_seconds
+        self._samples: deque = deque(maxlen=max(window, 1))
+        self.max_lag_seconds = 0.0
+        self.stalls = 0
+
+    async def run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - expected, 0.0)
+            self._samples.append(lag)
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            if lag >= self.warn_seconds:
+                self.stalls += 1
+                logger.warning("이벤트 루프가 %.0fms 동안 응답하지 않았습니다", lag * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self._samples)
+        return {
+            "interval_ms": round(self.interval * 1000, 3),
+            "last_ms": round(samples[-1] * 1000, 3) if samples else None,
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else None,
+            "recent_max_ms": round(max(samples) * 1000, 3) if samples else None,
+            "max_ms": round(self.max_lag_seconds * 1000, 3),
+            "stalls": self.stalls,
+            "warn_ms": round(self.warn_seconds * 1000, 3)
+        }
+
+
+# 애플리케이션 전역 주기 소요 시간과 이벤트 루프 지연
+live_tick_timings = StageTimings()
+live_loop_lag = LoopLagMonitor(
+    interval=float(os.getenv("LIVE_LOOP_LAG_INTERVAL_SECONDS", "0.5")),
+    warn_seconds=float(os.getenv("LIVE_LOOP_LAG_WARN_SECONDS", "0.2")),
+)
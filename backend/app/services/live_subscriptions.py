@@ -0,0 +1,158 @@
+"""
+실시간 분석 구독 room 관리.
+
+클라이언트는 모델, 라인, 캠 단위 room 을 구독하고, 서버는 구독자가 있는 room 에 속한 시계열만 분석/전송합니다.
+room 이름은 "model:<모델명>", "line:<라인>", "cam:<캠 번호>" 형식이며, 시계열 하나는 세 room 에 모두 속합니다.
+
+room 마다 별도의 DeltaFrameEncoder 를 두어 구독자가 받은 값 기준으로 델타 프레임을 만들고,
+프레임은 구독자별 전송 큐(live_fanout)로 보냅니다.
+"""
+import os
+import threading
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .live_frames import DeltaFrameEncoder
+
+ROOM_KINDS = ("model", "line", "cam")
+
+
+def room_name(kind: str, value: Any) -> str:
+    """구독 대상을 room 이름으로 변환합니다. 잘못된 대상이면 ValueError 를 발생시킵니다."""
+    if kind not in ROOM_KINDS:
+        raise ValueError(f"Unknown subscription kind: {kind} (expected one of {', '.join(ROOM_KINDS)})")
+    if value is None or str(value).strip() == "":
+        raise ValueError(f"Subscription {kind} value is required")
+    if kind == "cam":
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid cam number: {value}")
+    return f"{kind}:{str(value).strip()}"
+
+
+def parse_room(data: Any) -> str:
+    """구독 요청 {"model": ...} / {"line": ...} / {"cam": ...} / {"room": "cam:3"} 을 room 이름으로 변환합니다."""
+    if isinstance(data, str):
+        data = {"room": data}
+    if not isinstance(data, dict):
+        raise ValueError("Subscription request must be an object")
+    if "room" in data:
+        kind, _, value = str(data["room"]).partition(":")
+        return room_name(kind, value)
+    for kind in ROOM_KINDS:
+        if kind in data:
+            return room_name(kind, data[kind])
+    raise ValueError(f"Subscription request needs one of: room, {', '.join(ROOM_KINDS)}")
+
+
+def series_rooms(model_name: str, line_info: Optional[str], cam_number: int) -> Tuple[str, ...]:
+    """시계열이 속한 room 목록 (라인 정보가 없으면 라인 room 제외)"""
+    rooms = [f"model:{model_name}", f"cam:{cam_number}"]
+    if line_info:
+        rooms.append(f"line:{line_info}")
+    return tuple(rooms)
+
+
+class SubscriptionRegistry:
+    """
+    클라이언트별 구독 room 과 room 별 프레임 인코더를 관리합니다.
+    이벤트 루프와 분석 스레드에서 함께 접근하므로 락으로 보호합니다.
+    """
+
+    def __init__(self, keyframe_interval: int = 12):
+        self.keyframe_interval = keyframe_interval
+        self._lock = threading.Lock()
+        self._client_formats: Dict[str, str] = {}
+        self._client_rooms: Dict[str, Set[str]] = {}
+        self._room_clients: Dict[str, Set[str]] = {}
+        self._encoders: Dict[str, DeltaFrameEncoder] = {}
+        # 구독자가 없어져 버린 room 인코더의 누적 전송량
+        self._retired = {"frames": 0, "keyframes": 0, "fields_sent": 0, "fields_skipped": 0, "bytes_sent": {}}
+
+    def add_client(self, sid: str, fmt: str):
+        with self._lock:
+            self._client_formats[sid] = fmt
+            self._client_rooms.setdefault(sid, set())
+
+    def client_format(self, sid: str) -> str:
+        with self._lock:
+            return self._client_formats.get(sid, "json")
+
+    def subscribe(self, sid: str, room: str) -> Tuple[DeltaFrameEncoder, bool]:
+        """구독을 등록하고 (room 인코더, 새로 만든 room 인지) 를 반환합니다."""
+        with self._lock:
+            self._client_rooms.setdefault(sid, set()).add(room)
+            self._room_clients.setdefault(room, set()).add(sid)
+            encoder = self._encoders.get(room)
+            created = encoder is None
+            if created:
+                encoder = self._encoders[room] = DeltaFrameEncoder(self.keyframe_interval)
+            return encoder, created
+
+    def unsubscribe(self, sid: str, room: str) -> bool:
+        """구독을 해제합니다. 구독자가 없어진 room 은 인코더도 버립니다. 구독 중이었으면 True."""
+        with self._lock:
+            return self._unsubscribe_locked(sid, room)
+
+    def _unsubscribe_locked(self, sid: str, room: str) -> bool:
+        rooms = self._client_rooms.get(sid)
+        if not rooms or room not in rooms:
+            return False
+        rooms.discard(room)
+        clients = self._room_clients.get(room, set())
+        clients.discard(sid)
+        if not clients:
+            self._room_clients.pop(room, None)
+            encoder = self._encoders.pop(room, None)
+            if encoder is not None:
+                self._merge_frame_stats(self._retired, encoder.stats())
+        return True
+
+    @staticmethod
+    def _merge_frame_stats(totals: Dict[str, Any], encoder_stats: Dict[str, Any]):
+        for field in ("frames", "keyframes", "fields_sent", "fields_skipped"):
+            totals[field] += encoder_stats[field]
+        for fmt, size in encoder_stats["bytes_sent"].items():
+            totals["bytes_sent"][fmt] = totals["bytes_sent"].get(fmt, 0) + size
+
+    def remove_client(self, sid: str) -> List[str]:
+        """연결이 끊긴 클라이언트의 모든 구독을 해제하고 해제한 room 목록을 반환합니다."""
+        with self._lock:
+            rooms = list(self._client_rooms.get(sid, ()))
+            for room in rooms:
+                self._unsubscribe_locked(sid, room)
+            self._client_rooms.pop(sid, None)
+            self._client_formats.pop(sid, None)
+            return rooms
+
+    def client_rooms(self, sid: str) -> List[str]:
+        with self._lock:
+            return sorted(self._client_rooms.get(sid, ()))
+
+    def active_rooms(self) -> FrozenSet[str]:
+        """구독자가 한 명 이상인 room"""
+        with self._lock:
+            return frozenset(self._room_clients)
+
+    def room_clients(self, room: str) -> List[str]:
+        """room 구독자 목록"""
+        with self._lock:
+            return list(self._room_clients.get(room, ()))
+
+    def encoder(self, room: str) -> Optional[DeltaFrameEncoder]:
+        with self._lock:
+            return self._encoders.get(room)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            encoders = list(self._encoders.items())
+            rooms = {room: len(clients) for room, clients in self._room_clients.items()}
+            clients = len(self._client_formats)
+            frames = {**self._retired, "bytes_sent": dict(self._retired["bytes_sent"])}
+        for _, encoder in encoders:
+            self._merge_frame_stats(frames, encoder.stats())
+        return {"clients": clients, "rooms": rooms, "frames": frames}
+
+
+# 애플리케이션 전역 구독 관리
+live_subscriptions = SubscriptionRegistry(keyframe_interval=int(os.getenv("LIVE_KEYFRAME_INTERVAL", "12")))
@@ -0,0 +1,152 @@
+"""
+6개 위상각 다변량 모니터링 (Hotelling T²).
+
+위상각을 하나의 목록으로 합치면 위상각 사이의 상관관계가 사라지므로, 행(레코드) 단위 벡터로
+직전 window 행의 평균 벡터와 공분산 행렬을 유지하고 현재 행의 T² = (x - μ)ᵀ S⁻¹ (x - μ) 를 계산합니다.
+
+- RollingCovariance: 행 추가/제거 시 평균 벡터와 편차 제곱합 행렬을 rank-one 갱신 (O(d²))
+- rolling_hotelling_t2: 같은 결과를 누적합(prefix sum)으로 모든 행에 대해 일괄 계산 (백테스팅용)
+- hotelling_t2_limit: 추정된 평균/공분산 기준 새 관측치의 T² 관리 한계 (F 분포)
+"""
+import numpy as np
+import scipy.stats as stats
+from typing import Optional
+
+# 분산이 이 값보다 작은 위상각(상수 열)은 T² 계산에서 제외 (표준편차 1e-10 에 해당)
+VAR_EPSILON = 1e-20
+
+# 기본 관리 한계 유의수준 (단변량 3-시그마와 같은 오경보율)
+DEFAULT_T2_ALPHA = 0.0027
+
+
+def hotelling_t2_limit(dim: int, window: int, alpha: float = DEFAULT_T2_ALPHA) -> float:
+    """
+    window 개 행으로 추정한 평균/공분산 기준, 새 관측치 T² 의 상한 관리 한계.
+    UCL = p(n+1)(n-1) / (n(n-p)) · F_{1-α}(p, n-p)
+    """
+    if window <= dim:
+        raise ValueError(f"window must be greater than the number of variables ({dim})")
+    if not 0 < alpha < 1:
+        raise ValueError("t2_alpha must be in (0, 1)")
+    n, p = window, dim
+    return float(p * (n + 1) * (n - 1) / (n * (n - p)) * stats.f.ppf(1 - alpha, p, n - p))
+
+
+def hotelling_t2(deviation: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    """
+    편차 벡터 (..., d) 와 공분산 행렬 (..., d, d) 로 T² 를 계산합니다.
+    분산이 VAR_EPSILON 미만인 변수는 제외하고, 특이 행렬이면 유사 역행렬을 사용합니다.
+    """
+    deviation = np.array(deviation, dtype=np.float64)
+    cov = np.array(cov, dtype=np.float64)
+    dim = cov.shape[-1]
+    diag = np.arange(dim)
+
+    variance = cov[..., diag, diag]
+    degenerate = variance < VAR_EPSILON
+    if degenerate.any():
+        deviation[degenerate] = 0.0
+        cov[degenerate[..., :, None] | degenerate[..., None, :]] = 0.0
+        cov[..., diag, diag] = np.where(degenerate, 1.0, variance)
+
+    try:
+        solved = np.linalg.solve(cov, deviation[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        solved = (np.linalg.pinv(cov, rcond=1e-10) @ deviation[..., None])[..., 0]
+    return np.clip((deviation * solved).sum(axis=-1), 0.0, None)
+
+
+class RollingCovariance:
+    """
+    최근 window 개 행(dim 차원 벡터)의 평균 벡터/공분산 행렬 누적기.
+
+    행을 추가/제거할 때 다변량 Welford 방식의 rank-one 갱신으로 O(dim²) 에 갱신하며,
+    부동소수점 오차가 누적되지 않도록 window 번 갱신할 때마다 버퍼 전체로 다시 계산합니다.
+    """
+
+    def __init__(self, dim: int, window: int):
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        self.dim = dim
+        self.window = window
+        self._buffer = np.zeros((window, dim), dtype=np.float64)
+        self._start = 0
+        self.count = 0
+        self.mean = np.zeros(dim)
+        self.m2 = np.zeros((dim, dim))
+        self._updates = 0
+
+    def _add(self, row: np.ndarray):
+        self.count += 1
+        delta = row - self.mean
+        self.mean = self.mean + delta / self.count
+        self.m2 += np.outer(delta, row - self.mean)
+
+    def _remove(self, row: np.ndarray):
+        old_mean = self.mean
+        self.count -= 1
+        self.mean = old_mean - (row - old_mean) / self.count
+        self.m2 -= np.outer(row - self.mean, row - old_mean)
+
+    def push(self, row):
+        row = np.asarray(row, dtype=np.float64).reshape(self.dim)
+        if self.count == self.window:
+            self._remove(self._buffer[self._start].copy())
+            self._buffer[self._start] = row
+            self._start = (self._start + 1) % self.window
+        else:
+            self._buffer[(self._start + self.count) % self.window] = row
+        self._add(row)
+
+        self._updates += 1
+        if self._updates >= self.window:
+            self._resync()
+
+    def _resync(self):
+        rows = self.rows()
+        self.mean = rows.mean(axis=0)
+        centered = rows - self.mean
+        self.m2 = centered.T @ centered
+        self._updates = 0
+
+    def rows(self) -> np.ndarray:
+        """윈도우의 행을 오래된 순서대로 반환합니다."""
+        index = (self._start + np.arange(self.count)) % self.window
+        return self._buffer[index]
+
+    def covariance(self) -> np.ndarray:
+        if self.count < 2:
+            return np.zeros((self.dim, self.dim))
+        return self.m2 / (self.count - 1)
+
+    def t2(self, row) -> Optional[float]:
+        """현재 윈도우 통계 기준 row 의 T² (윈도우 행 수가 차원 이하이면 None)"""
+        if self.count <= self.dim:
+            return None
+        row = np.asarray(row, dtype=np.float64).reshape(self.dim)
+        return float(hotelling_t2(row - self.mean, self.covariance()))
+
+
+def rolling_hotelling_t2(rows: np.ndarray, window: int, offset: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (n, d) 행렬의 각 행 i (window <= i < n) 에 대해 직전 window 행 rows[i-window:i] 기준 T² 를 일괄 계산합니다.
+    반환 배열의 k 번째 값은 행 window + k 의 T² 입니다. 메모리는 O(n·d²) 입니다.
+    offset 은 누적합의 수치 안정성을 위해 빼는 기준 벡터입니다 (기본값: 전체 평균).
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    n, dim = rows.shape
+    if n <= window:
+        return np.empty(0)
+
+    centered = rows - (rows.mean(axis=0) if offset is None else offset)
+    prefix_sum = np.concatenate((np.zeros((1, dim)), np.cumsum(centered, axis=0)))
+    outer = centered[:, :, None] * centered[:, None, :]
+    prefix_outer = np.concatenate((np.zeros((1, dim, dim)), np.cumsum(outer, axis=0)))
+
+    end = np.arange(window, n)
+    window_sum = prefix_sum[end] - prefix_sum[end - window]
+    window_outer = prefix_outer[end] - prefix_outer[end - window]
+
+    mean = window_sum / window
+    cov = (window_outer - window * mean[:, :, None] * mean[:, None, :]) / (window - 1)
+    return hotelling_t2(centered[end] - mean, cov)
@@ -0,0 +1,252 @@
+import numpy as np
+import scipy.stats as stats
+from typing import Dict, List, Optional
+
+from .detectors import ControlChartDetector
+from .multivariate import hotelling_t2_limit, rolling_hotelling_t2
+
+# PPM 규격 (calculate_predicted_ppm_value 기본값과 동일)
+DEFAULT_USL = 0.25
+DEFAULT_LSL = -0.25
+
+# PPM 기울기 계산에 사용하는 최근 PPM 개수
+PPM_SLOPE_POINTS = 10
+
+# 위상각 허용 범위 (범위를 벗어난 값은 클램핑)
+ANGLE_MIN = -500.0
+ANGLE_MAX = 500.0
+
+
+def parse_angle_column(values: List) -> np.ndarray:
+    """
+    원본 문자열 위상각 값 목록을 float 배열로 변환합니다.
+    대부분의 값은 한 번에 변환하고, 변환이 불가능한 값이 섞인 경우에만 값 단위로 처리합니다.
+    변환할 수 없는 값, NaN/Inf 는 0.0, 범위를 벗어난 값은 클램핑합니다.
+    """
+    try:
+        parsed = np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        parsed = np.empty(len(values), dtype=np.float64)
+        for k, value in enumerate(values):
+            try:
+                clean_value = str(value).strip().replace(',', '').replace(' ', '')
+                parsed[k] = float(clean_value)
+            except (ValueError, TypeError):
+                parsed[k] = 0.0
+
+    parsed[~np.isfinite(parsed)] = 0.0
+    return np.clip(parsed, ANGLE_MIN, ANGLE_MAX)
+
+
+def ppm_from_stats(mean: np.ndarray, std: np.ndarray, usl: float = DEFAULT_USL, lsl: float = DEFAULT_LSL) -> np.ndarray:
+    """calculate_predicted_ppm_value 의 PPM 계산을 평균/표준편차 배열에 대해 수행합니다."""
+    mean = np.asarray(mean, dtype=np.float64)
+    std = np.asarray(std, dtype=np.float64)
+    valid = np.isfinite(mean) & np.isfinite(std) & (std >= 1e-10)
+    safe_std = np.where(valid, std, 1.0)
+
+    z_usl = np.clip((usl - mean) / safe_std, -10, 10)
+    z_lsl = np.clip((lsl - mean) / safe_std, -10, 10)
+    total_defect_prob = np.clip(stats.norm.sf(z_usl) + stats.norm.cdf(z_lsl), 0.0, 1.0)
+
+    ppm = total_defect_prob * 1_000_000
+    ppm[~valid | ~np.isfinite(ppm)] = 0.0
+    return ppm
+
+
+def rolling_ppm_slope(ppm: np.ndarray, points: int = PPM_SLOPE_POINTS) -> np.ndarray:
+    """
+    최근 points 개 PPM 에 대한 선형 회귀 기울기를 계산합니다 (calculate_ppm_slope_value 와 동일한 규칙).
+    반환 배열의 k 번째 값은 ppm[k:k+points] 구간의 기울기입니다.
+    """
+    ppm = np.asarray(ppm, dtype=np.float64)
+    if len(ppm) < points:
+        return np.empty(0)
+
+    windows = np.lib.stride_tricks.sliding_window_view(np.where(np.isfinite(ppm), ppm, 0.0), points)
+    x = np.arange(points) - (points - 1) / 2.0
+    slope = windows @ x / (x @ x)
+    slope[windows.max(axis=1) == windows.min(axis=1)] = 0.0
+    return np.clip(slope, -1000, 1000)
+
+
+class PhaseAngleBacktestState:
+    """
+    6개 위상각 모델 백테스팅의 롤링 상태.
+
+    청크 단위로 데이터를 넣으면 청크 사이에는 최근 window_size 행과 PPM 기울기용 최근 PPM 만 보관하므로,
+    전체 이력을 메모리에 올리지 않고도 무제한 길이의 데이터를 처리할 수 있습니다.
+    detector(EWMA/CUSUM)가 주어지면 행별 위상각 평균을 검출기에 넣어 변화 감지 신호도 함께 계산합니다.
+    t2_alpha 가 주어지면 직전 window_size 행의 평균 벡터/공분산 행렬 기준 Hotelling T² 도 계산합니다.
+    """
+
+    def __init__(
+        self,
+        window_size: int,
+        num_columns: int = 6,
+        usl: float = DEFAULT_USL,
+        lsl: float = DEFAULT_LSL,
+        detector: Optional[ControlChartDetector] = None,
+        t2_alpha: Optional[float] = None
+    ):
+        self.window_size = window_size
+        self.num_columns = num_columns
+        self.usl = usl
+        self.lsl = lsl
+        self.detector = detector
+        self.t2_limit = hotelling_t2_limit(num_columns, window_size, t2_alpha) if t2_alpha is not None else None
+        self.t2_offset: Optional[np.ndarray] = None
+        self.window_rows = np.empty((0, num_columns))
+        self.ppm_tail = np.empty(0)
+        self.offset: Optional[float] = None
+        self.rows_seen = 0
+
+    def process_chunk(self, angles: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        (m, num_columns) 위상각 행렬을 처리하여 윈도우가 채워진 시점별 통계를 반환합니다.
+
+        반환 딕셔너리의 "row_index" 는 청크 내 행 번호이며, mean/std/ppm/ppm_slope 는 해당 시점
+        직전 window_size 행(모든 위상각 합산)의 통계입니다. ppm_slope 는 PPM 이력이 부족하면 NaN 입니다.
+        검출기가 있으면 해당 시점 행의 "drift_statistic", "drift_signal" 도 포함합니다.
+        다변량 모드이면 해당 시점 행의 "t2_statistic", "t2_signal" 도 포함합니다.
+        """
+        angles = np.asarray(angles, dtype=np.float64).reshape(-1, self.num_columns)
+        chunk_rows = len(angles)
+        carry = len(self.window_rows)
+        combined = np.vstack([self.window_rows, angles]) if carry else angles
+        self.rows_seen += chunk_rows
+
+        if self.offset is None and len(combined):
+            # 누적합의 수치 안정성을 위한 기준값
+            self.offset = float(combined.mean())
+            self.t2_offset = combined.mean(axis=0)
+
+        w = self.window_size
+        first = max(w - carry, 0)
+        row_index = np.arange(first, chunk_rows)
+        result = {"row_index": row_index}
+
+        if self.detector is not None:
+            # 기준 구간(처음 window_size 행)도 검출기에 넣어야 하므로 모든 행을 처리
+            detection = self.detector.update_many(angles.mean(axis=1))
+            result["drift_statistic"] = detection["statistic"][row_index]
+            result["drift_signal"] = detection["signal"][row_index]
+
+        if len(row_index) == 0:
+            self.window_rows = combined[-w:].copy()
+            empty = np.empty(0)
+            result.update(mean=empty, std=empty, ppm=empty, ppm_slope=empty)
+            if self.t2_limit is not None:
+                result.update(t2_statistic=empty, t2_signal=np.empty(0, dtype=bool))
+            return result
+
+        # 행별 합/제곱합의 누적합으로 각 시점의 직전 window_size 행 통계 계산
+        centered = combined - self.offset
+        prefix_sum = np.concatenate(([0.0], np.cumsum(centered.sum(axis=1))))
+        prefix_sq = np.concatenate(([0.0], np.cumsum((centered * centered).sum(axis=1))))
+        end = row_index + carry
+        if self.t2_limit is not None:
+            # combined 의 w 번째 행부터 계산되며, 첫 값이 청크의 row_index[0] 행에 해당
+            t2 = rolling_hotelling_t2(combined, w, self.t2_offset)
+            result["t2_statistic"] = t2
+            result["t2_signal"] = t2 > self.t2_limit
+        count = w * self.num_columns
+        window_sum = prefix_sum[end] - prefix_sum[end - w]
+        window_sq = prefix_sq[end] - prefix_sq[end - w]
+
+        centered_mean = window_sum / count
+        variance = np.clip((window_sq - count * centered_mean ** 2) / (count - 1), 0.0, None)
+        mean = centered_mean + self.offset
+        std = np.sqrt(variance)
+
+        ppm = ppm_from_stats(mean, std, self.usl, self.lsl)
+
+        history = np.concatenate([self.ppm_tail, ppm])
+        slope = np.full(len(ppm), np.nan)
+        slopes = rolling_ppm_slope(history)
+        if len(slopes):
+            slope[len(ppm) - len(slopes):] = slopes[-len(ppm):]
+
+        self.window_rows = combined[-w:].copy()
+        self.ppm_tail = history[-(PPM_SLOPE_POINTS - 1):].copy()
+
+        result.update(mean=mean, std=std, ppm=ppm, ppm_slope=slope)
+        return result
+
+
+class PhaseAngleMetricsAccumulator:
+    """처리된 시점의 PPM/기울기 요약 지표를 점진적으로 집계합니다."""
+
+    def __init__(self):
+        self.count = 0
+        self.ppm_count = 0
+        self.ppm_sum = 0.0
+        self.ppm_max = None
+        self.ppm_min = None
+        self.slope_count = 0
+        self.slope_sum = 0.0
+        self.drift_points = 0
+        self.drift_signals = 0
+        self.t2_points = 0
+        self.t2_signals = 0
+
+    def add(self, point):
+        """PhaseAngleData 한 건을 집계합니다."""
+        self.count += 1
+        if point.predicted_ppm is not None:
+            self.ppm_count += 1
+            self.ppm_sum += point.predicted_ppm
+            self.ppm_max = point.predicted_ppm if self.ppm_max is None else max(self.ppm_max, point.predicted_ppm)
+            self.ppm_min = point.predicted_ppm if self.ppm_min is None else min(self.ppm_min, point.predicted_ppm)
+        if point.ppm_slope is not None:
+            self.slope_count += 1
+            self.slope_sum += point.ppm_slope
+        if point.drift_signal is not None:
+            self.drift_points += 1
+            self.drift_signals += int(point.drift_signal)
+        if point.t2_signal is not None:
+            self.t2_points += 1
+            self.t2_signals += int(point.t2_signal)
+
+    def add_batch(
+        self,
+        ppm_values: np.ndarray,
+        slope_values: np.ndarray,
+        drift_signals: Optional[np.ndarray] = None,
+        t2_signals: Optional[np.ndarray] = None
+    ):
+        """반올림된 PPM/기울기 배열을 한 번에 집계합니다. 기울기의 NaN 은 값 없음으로 처리합니다."""
+        self.count += len(ppm_values)
+        if len(ppm_values):
+            self.ppm_count += len(ppm_values)
+            self.ppm_sum += float(ppm_values.sum())
+            batch_max, batch_min = float(ppm_values.max()), float(ppm_values.min())
+            self.ppm_max = batch_max if self.ppm_max is None else max(self.ppm_max, batch_max)
+            self.ppm_min = batch_min if self.ppm_min is None else min(self.ppm_min, batch_min)
+        valid_slopes = slope_values[~np.isnan(slope_values)]
+        self.slope_count += len(valid_slopes)
+        self.slope_sum += float(valid_slopes.sum())
+        if drift_signals is not None:
+            self.drift_points += len(drift_signals)
+            self.drift_signals += int(np.count_nonzero(drift_signals))
+        if t2_signals is not None:
+            self.t2_points += len(t2_signals)
+            self.t2_signals += int(np.count_nonzero(t2_signals))
+
+    def as_dict(self) -> Dict[str, float]:
+        metrics = {
+            "total_data_points": self.count,
+            "avg_ppm": self.ppm_sum / self.ppm_count if self.ppm_count else 0.0,
+            "max_ppm": float(self.ppm_max) if self.ppm_count else 0.0,
+            "min_ppm": float(self.ppm_min) if self.ppm_count else 0.0,
+            "avg_slope": self.slope_sum / self.slope_count if self.slope_count else 0.0
+        }
+        if self.drift_points:
+            # 변화 감지 검출기를 사용한 경우에만 포함
+            metrics["drift_signals"] = self.drift_signals
+            metrics["drift_signal_rate"] = self.drift_signals / self.drift_points
+        if self.t2_points:
+            # 다변량(Hotelling T²) 모드를 사용한 경우에만 포함
+            metrics["t2_signals"] = self.t2_signals
+            metrics["t2_signal_rate"] = self.t2_signals / self.t2_points
+        return metrics
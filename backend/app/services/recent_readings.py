@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..crud import analysis as analysis_crud
+
+logger = logging.getLogger(__name__)
+
+ReadingKey = Tuple[str, int, str]  # (모델, 캠 번호, 메트릭)
+
+
+class ReadingRing:
+    """
+    최근 측정값을 보관하는 고정 크기 링 버퍼.
+
+    id/timestamp/value/allowance 배열을 미리 할당해 두고, 새 값은 가장 오래된 값을 덮어씁니다.
+    complete 는 해당 키의 전체 이력이 버퍼 안에 있는지(한 번도 밀려난 값이 없는지)를 나타냅니다.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype="datetime64[us]")
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.allowances = np.zeros(capacity, dtype=np.float64)
+        self.start = 0
+        self.count = 0
+        self.complete = True
+
+    def append_many(self, ids: np.ndarray, timestamps: np.ndarray, values: np.ndarray, allowances: np.ndarray):
+        n = len(ids)
+        if n == 0:
+            return
+        if self.count + n > self.capacity:
+            self.complete = False
+        if n > self.capacity:
+            ids, timestamps, values, allowances = (
+                ids[-self.capacity:], timestamps[-self.capacity:], values[-self.capacity:], allowances[-self.capacity:]
+            )
+            n = self.capacity
+
+        position = (self.start + self.count + np.arange(n)) % self.capacity
+        self.ids[position] = ids
+        self.timestamps[position] = timestamps
+        self.values[position] = values
+        self.allowances[position] = allowances
+
+        overflow = max(self.count + n - self.capacity, 0)
+        self.start = (self.start + overflow) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def ordered(self) -> Dict[str, np.ndarray]:
+        """버퍼의 값을 오래된 순서대로 복사하여 반환합니다."""
+        index = (self.start + np.arange(self.count)) % self.capacity
+        return {
+            "id": self.ids[index],
+            "timestamp": self.timestamps[index],
+            "value": self.values[index],
+            "allowance": self.allowances[index]
+        }
+
+    def window(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        [start, end) 구간에서 최근 limit 개를 반환합니다.
+        요청 구간의 일부가 버퍼에서 이미 밀려났을 수 있으면 None 을 반환합니다 (DB 조회 필요).
+        측정값은 대체로 시간순으로 적재된다고 가정합니다.
+        """
+        data = self.ordered()
+        if not self.complete:
+            if start is None and limit is None:
+                return None
+            if start is not None and (self.count == 0 or np.datetime64(start, "us") < data["timestamp"][0]):
+                return None
+
+        mask = np.ones(self.count, dtype=bool)
+        if start is not None:
+            mask &= data["timestamp"] >= np.datetime64(start, "us")
+        if end is not None:
+            mask &= data["timestamp"] < np.datetime64(end, "us")
+        selected = {key: array[mask] for key, array in data.items()}
+
+        if limit is not None:
+            if len(selected["id"]) < limit and not self.complete and start is None:
+                # 버퍼 밖에 더 오래된 값이 있을 수 있음
+                return None
+            selected = {key: array[-limit:] if limit > 0 else array[:0] for key, array in selected.items()}
+        return selected
+
+
+class RecentReadingsCache:
+    """
+    (모델, 캠, 메트릭) 별 최근 측정값 메모리 캐시.
+
+    - warm(): (모델, 캠) 별 최근 capacity 개 측정값을 단일 쿼리로 적재
+    - refresh(): 마지막으로 적재한 측정 ID(워터마크) 이후의 새 측정값만 추가
+    - window(): 요청 구간이 버퍼 안에 있으면 메모리에서, 아니면 DB 에서 조회
+    조회 시 마지막 갱신 후 refresh_interval 초가 지났으면 먼저 새 측정값을 반영합니다.
+    """
+
+    def __init__(self, capacity: int = 2000, refresh_interval: float = 2.0):
+        self.capacity = capacity
+        self.refresh_interval = refresh_interval
+        self.rings: Dict[ReadingKey, ReadingRing] = {}
+        self.watermark: Optional[int] = None
+        self.warmed = False
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()  # 버퍼 읽기/쓰기
+        self._refresh_lock = threading.Lock()  # DB 적재는 한 번에 하나만
+        self.memory_hits = 0
+        self.db_fallbacks = 0
+
+    def warm(self, db) -> int:
+        """캐시를 비우고 (모델, 캠) 별 최근 측정값으로 다시 채운 뒤, 적재한 행 수를 반환합니다."""
+        with self._refresh_lock:
+            max_id = analysis_crud.get_max_measurement_id(db)
+            rows = analysis_crud.get_latest_measurement_rows(db, self.capacity)
+
+            rings: Dict[ReadingKey, ReadingRing] = {}
+            self._append_rows(rings, rows)
+            # 최근 capacity 개를 모두 채운 (모델, 캠) 은 더 오래된 이력이 DB 에 남아 있을 수 있음
+            group_counts: Dict[Tuple[str, int], int] = {}
+            for row in rows:
+                group_key = (row.model_name or "", int(row.cam_number))
+                group_counts[group_key] = group_counts.get(group_key, 0) + 1
+            for (model_name, cam_number, _), ring in rings.items():
+                ring.complete = group_counts.get((model_name, cam_number), 0) < self.capacity
+
+            ids = [int(row.id) for row in rows] + ([max_id] if max_id is not None else [])
+            with self._lock:
+                self.rings = rings
+                self.watermark = max(ids) if ids else None
+                self.warmed = True
+                self.last_refresh = time.monotonic()
+            return len(rows)
+
+    def refresh(self, db) -> int:
+        """워터마크 이후의 새 측정값을 버퍼에 추가하고, 추가한 행 수를 반환합니다."""
+        if not self.warmed:
+            return self.warm(db)
+        with self._refresh_lock:
+            rows = analysis_crud.get_measurement_rows_after(db, self.watermark)
+            with self._lock:
+                self._append_rows(self.rings, rows)
+                if rows:
+                    self.watermark = max(int(row.id) for row in rows)
+                self.last_refresh = time.monotonic()
+            return len(rows)
+
+    def maybe_refresh(self, db):
+        if not self.warmed or time.monotonic() - self.last_refresh >= self.refresh_interval:
+            self.refresh(db)
+
+    def _append_rows(self, rings: Dict[ReadingKey, ReadingRing], rows):
+        """(id, model_name, cam_number, timestamp, angle, torque, allowance, line_info) 행을 키별로 묶어 rings 에 추가합니다."""
+        if not rows:
+            return
+        ids, models, cams, timestamps, angles, torques, allowances, _ = zip(*rows)
+        ids = np.asarray(ids, dtype=np.int64)
+        cams = np.asarray(cams, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+        allowances = np.asarray(allowances, dtype=np.float64)
+        metric_values = {
+            "angle": np.asarray(angles, dtype=np.float64),
+            "torque": np.asarray(torques, dtype=np.float64)
+        }
+
+        groups: Dict[Tuple[str, int], list] = {}
+        for index, key in enumerate(zip((model or "" for model in models), cams.tolist())):
+            groups.setdefault(key, []).append(index)
+
+        for (model_name, cam_number), index in groups.items():
+            index = np.asarray(index)
+            for metric, values in metric_values.items():
+                selected = index[~np.isnan(values[index])]
+                if len(selected) == 0:
+                    continue
+                ring = rings.get((model_name, cam_number, metric))
+                if ring is None:
+                    ring = rings[(model_name, cam_number, metric)] = ReadingRing(self.capacity)
+                ring.append_many(ids[selected], timestamps[selected], values[selected], allowances[selected])
+
+    def window(
+        self,
+        db,
+        model_name: str,
+        cam_number: int,
+        metric: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[str, Dict[str, np.ndarray]]:
+        """구간의 측정값과 출처("memory" 또는 "database")를 반환합니다."""
+        if metric not in analysis_crud.METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        try:
+            self.maybe_refresh(db)
+        except Exception as e:
+            logger.warning("Recent readings cache refresh failed: %s", e)
+            db.rollback()
+
+        with self._lock:
+            ring = self.rings.get((model_name, cam_number, metric))
+            if ring is not None:
+                data = ring.window(start, end, limit)
+            elif self.warmed:
+                # 적재 이후 한 번도 측정값이 없던 키
+                data = analysis_crud.empty_readings()
+            else:
+                data = None
+            if data is not None:
+                self.memory_hits += 1
+                return "memory", data
+            self.db_fallbacks += 1
+
+        return "database", analysis_crud.get_recent_measurements(
+            db, model_name, cam_number, metric, start, end, limit
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.db_fallbacks
+            return {
+                "keys": len(self.rings),
+                "capacity_per_key": self.capacity,
+                "buffered_readings": sum(ring.count for ring in self.rings.values()),
+                "bytes": sum(
+                    ring.ids.nbytes + ring.timestamps.nbytes + ring.values.nbytes + ring.allowances.nbytes
+                    for ring in self.rings.values()
+                ),
+                "watermark": self.watermark,
+                "warmed": self.warmed,
+                "memory_hits": self.memory_hits,
+                "db_fallbacks": self.db_fallbacks,
+                "memory_hit_rate": self.memory_hits / lookups if lookups > 0 else 0.0
+            }
+
+
+# 애플리케이션 전역 최근 측정값 캐시
+recent_readings_cache = RecentReadingsCache(
+    capacity=int(os.getenv("RECENT_READINGS_CAPACITY", "2000")),
+    refresh_interval=float(os.getenv("RECENT_READINGS_REFRESH_SECONDS", "2")),
+)
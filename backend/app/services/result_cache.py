@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+
+class BacktestResultCache:
+    """
+    백테스팅 결과 LRU 캐시.
+
+    - 키: 엔드포인트 이름 + 요청 파라미터
+    - 각 항목은 저장 시점의 데이터 워터마크(최대 ID, 최대 타임스탬프 등)를 함께 보관하며,
+      조회 시 워터마크가 달라졌다면(새 데이터 적재) 해당 항목을 무효화합니다.
+    - 직렬화된 응답 바이트를 저장하므로 적중 시 재계산/재직렬화 없이 바로 응답합니다.
+    - 항목 수와 전체 바이트 수 두 가지 한도를 넘으면 가장 오래 사용하지 않은 항목부터 제거합니다.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """요청 파라미터를 정렬된 JSON 문자열로 만들어 캐시 키를 생성합니다."""
+        return endpoint + ":" + json.dumps(jsonable_encoder(params), sort_keys=True, separators=(",", ":"))
+
+    def get(self, key: str, watermark: Any) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            cached_watermark, payload = entry
+            if cached_watermark != watermark:
+                # 새로운 데이터가 적재되어 결과가 더 이상 유효하지 않음
+                self._remove(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: str, watermark: Any, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (watermark, payload)
+            self._bytes += len(payload)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0
+            }
+
+
+# 애플리케이션 전역 백테스팅 결과 캐시
+backtest_cache = BacktestResultCache(
+    max_entries=int(os.getenv("BACKTEST_CACHE_MAX_ENTRIES", "128")),
+    max_bytes=int(os.getenv("BACKTEST_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+# 백테스팅 단계 이름 (processing_info / 메트릭에 표시되는 순서)
+STAGES = ("query", "fetch", "parse", "compute", "serialize")
+
+# 단계별 소요 시간 히스토그램 버킷 (초)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class StageTimer:
+    """
+    요청 하나의 단계별 소요 시간을 측정합니다.
+
+        timer = StageTimer("model-realtime")
+        with timer.stage("query"):
+            ...
+        processing_info["timing_ms"] = timer.as_dict()
+        timer.finish()  # 전역 메트릭에 기록
+
+    같은 단계를 여러 번 측정하면(청크 단위 처리 등) 합산됩니다.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.stages: "OrderedDict[str, float]" = OrderedDict()
+        self._start = time.perf_counter()
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def as_dict(self) -> Dict[str, float]:
+        """단계별 소요 시간(ms)과 지금까지의 전체 소요 시간(total_ms)을 반환합니다."""
+        timing = {f"{name}_ms": round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+        timing["total_ms"] = round(self.elapsed() * 1000, 3)
+        return timing
+
+    def server_timing_header(self) -> str:
+        """HTTP Server-Timing 헤더 값 (브라우저 개발자 도구에서 확인 가능)"""
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(parts)
+
+    def finish(self, outcome: str = "computed"):
+        """측정 결과를 전역 메트릭에 기록합니다. 여러 번 호출해도 한 번만 기록됩니다."""
+        if self._finished:
+            return
+        self._finished = True
+        stage_metrics.observe(self.endpoint, outcome, dict(self.stages), self.elapsed())
+
+
+def timed_stage(timer: Optional[StageTimer], name: str):
+    """timer 가 None 이면 아무것도 측정하지 않는 컨텍스트를 반환합니다."""
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for k, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.buckets[k] += 1
+
+
+class StageMetrics:
+    """엔드포인트/단계별 소요 시간 누적 메트릭 (프로세스 단위)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[Tuple[str, str], _Histogram] = {}
+        self._requests: Dict[Tuple[str, str], _Histogram] = {}
+
+    def observe(self, endpoint: str, outcome: str, stages: Dict[str, float], total: float):
+        with self._lock:
+            for name, seconds in stages.items():
+                self._stages.setdefault((endpoint, name), _Histogram()).observe(seconds)
+            self._requests.setdefault((endpoint, outcome), _Histogram()).observe(total)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._requests.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """엔드포인트별 요청 수와 단계별 평균/최대 소요 시간(ms)"""
+        with self._lock:
+            endpoints: Dict[str, Dict[str, Any]] = {}
+            for (endpoint, outcome), hist in sorted(self._requests.items()):
+                entry = endpoints.setdefault(endpoint, {"requests": {}, "stages": {}})
+                entry["requests"][outcome] = {
+                    "count": hist.count,
+                    "avg_ms": round(hist.total / hist.count * 1000, 3) if hist.count else 0.0,
+                    "max_ms": round(hist.max * 1000, 3)
+                }
+            for (endpoint, name), hist in sorted(self._stages.items()):
+                entry = endpoints.setdefault(endpoint, {"requests": {}, "stages": {}})
+                entry["stages"][name] = {
+                    "count": hist.count,
+                    "total_ms": round(hist.total * 1000, 3),
+                    "avg_ms": round(hist.total / hist.count * 1000, 3) if hist.count else 0.0,
+                    "max_ms": round(hist.max * 1000, 3)
+                }
+            return endpoints
+
+    def prometheus_text(self, extra_metrics: Optional[List[Tuple[str, str, str, float]]] = None) -> str:
+        """Prometheus 텍스트 형식으로 메트릭을 반환합니다. extra_metrics: (이름, 타입, 설명, 값) 목록"""
+        lines: List[str] = []
+        with self._lock:
+            self._append_histograms(
+                lines, "backtest_stage_duration_seconds", "Backtest stage duration in seconds",
+                self._stages, "stage"
+            )
+            self._append_histograms(
+                lines, "backtest_request_duration_seconds", "Backtest request duration in seconds",
+                self._requests, "outcome"
+            )
+        for name, metric_type, description, value in extra_metrics or []:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _append_histograms(lines: List[str], name: str, description: str, histograms, label: str):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for (endpoint, value), hist in sorted(histograms.items()):
+            labels = f'endpoint="{endpoint}",{label}="{value}"'
+            for bound, count in zip(DURATION_BUCKETS, hist.buckets):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.total}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+
+# 애플리케이션 전역 단계별 소요 시간 메트릭
+stage_metrics = StageMetrics()
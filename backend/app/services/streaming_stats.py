@@ -0,0 +1,305 @@
+"""
+스트리밍 통계 라이브러리.
+
+백테스팅과 실시간 분석에서 공통으로 사용하는 평균/분산 계산을 한 곳에 모읍니다.
+모든 누적기는 O(1) 로 갱신되며, NaN/Inf 값은 일관되게 무시합니다.
+
+- RunningStats: 전체 구간(expanding) Welford 누적기, merge() 로 병렬 결과 결합 가능
+- SlidingWindowStats: 최근 window 개 값에 대한 이동 윈도우 누적기
+- EWMStats: 지수가중 이동 평균/분산
+- rolling_mean_std, ewm_mean_var, finite_mean_std: 위 누적기와 같은 결과를 내는 numpy 일괄 계산
+- PrefixSums: 여러 윈도우 크기의 rolling_mean_std 가 함께 쓰는 누적합 (한 번만 계산)
+"""
+import math
+import numpy as np
+from scipy.signal import lfilter
+from typing import Iterable, Optional, Tuple
+
+
+def _is_finite(value) -> bool:
+    try:
+        return math.isfinite(value)
+    except TypeError:
+        return False
+
+
+class RunningStats:
+    """Welford 알고리즘 기반의 전체 구간 평균/분산 누적기."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> "RunningStats":
+        stats = cls()
+        stats.push_many(values)
+        return stats
+
+    def push(self, value: float):
+        if not _is_finite(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def push_many(self, values: Iterable[float]):
+        """여러 값을 한 번에 추가합니다. 배열은 일괄 계산 후 merge 로 결합합니다."""
+        array = np.asarray(values, dtype=np.float64).ravel()
+        array = array[np.isfinite(array)]
+        if len(array) == 0:
+            return
+        batch = RunningStats()
+        batch.count = len(array)
+        batch.mean = float(array.mean())
+        batch.m2 = float(((array - batch.mean) ** 2).sum())
+        self.merge(batch)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """다른 누적기의 결과를 결합합니다 (Chan 의 병렬 알고리즘)."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        return self
+
+    def variance(self, ddof: int = 1) -> float:
+        if self.count <= ddof:
+            return 0.0
+        return max(self.m2 / (self.count - ddof), 0.0)
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.variance(ddof))
+
+
+class SlidingWindowStats:
+    """
+    최근 window 개 값에 대한 이동 윈도우 평균/분산 누적기.
+
+    미리 할당한 링 버퍼에 값을 보관하고, 값이 추가/제거될 때 Welford 방식으로 O(1) 갱신합니다.
+    부동소수점 오차가 누적되지 않도록 window 번 갱신할 때마다 버퍼 전체로 다시 계산합니다(분할 상환 O(1)).
+    """
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self._buffer = np.zeros(window, dtype=np.float64)
+        self._start = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._updates = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.window
+
+    def push(self, value: float):
+        if not _is_finite(value):
+            return
+        value = float(value)
+        if self.count < self.window:
+            self._buffer[(self._start + self.count) % self.window] = value
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self._buffer[self._start]
+            self._buffer[self._start] = value
+            self._start = (self._start + 1) % self.window
+            old_mean = self.mean
+            self.mean += (value - old) / self.window
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+
+        self._updates += 1
+        if self._updates >= self.window:
+            self._resync()
+
+    def push_many(self, values: Iterable[float]):
+        for value in np.asarray(values, dtype=np.float64).ravel():
+            self.push(value)
+
+    def load(self, values: Iterable[float]):
+        """윈도우를 values(오래된 순서, 유한한 값 중 최근 window 개)로 다시 채웁니다."""
+        array = np.asarray(values, dtype=np.float64).ravel()
+        array = array[np.isfinite(array)][-self.window:]
+        self._buffer[:len(array)] = array
+        self._start = 0
+        self.count = len(array)
+        self._resync()
+
+    def _resync(self):
+        values = self.values()
+        self.mean = float(values.mean()) if len(values) else 0.0
+        self.m2 = float(((values - self.mean) ** 2).sum()) if len(values) else 0.0
+        self._updates = 0
+
+    def values(self) -> np.ndarray:
+        """윈도우의 값을 오래된 순서대로 반환합니다."""
+        index = (self._start + np.arange(self.count)) % self.window
+        return self._buffer[index]
+
+    def variance(self, ddof: int = 1) -> float:
+        if self.count <= ddof:
+            return 0.0
+        return max(self.m2 / (self.count - ddof), 0.0)
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.variance(ddof))
+
+
+class EWMStats:
+    """
+    지수가중 이동 평균/분산 누적기.
+
+    alpha 또는 span(alpha = 2 / (span + 1)) 으로 가중치를 지정하며, 첫 값으로 평균을 초기화합니다.
+    initial_mean 을 주면 첫 값으로 초기화하지 않고 그 값에서 시작합니다 (EWMA 관리도의 z_0 = 0 등).
+    """
+
+    __slots__ = ("alpha", "count", "mean", "var", "started")
+
+    def __init__(self, alpha: Optional[float] = None, span: Optional[float] = None, initial_mean: Optional[float] = None):
+        if alpha is None:
+            if span is None:
+                raise ValueError("alpha or span is required")
+            alpha = 2.0 / (span + 1.0)
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.count = 0
+        self.started = initial_mean is not None
+        self.mean = float(initial_mean) if self.started else 0.0
+        self.var = 0.0
+
+    def push(self, value: float):
+        if not _is_finite(value):
+            return
+        self.count += 1
+        if not self.started:
+            self.started = True
+            self.mean = float(value)
+            self.var = 0.0
+            return
+        delta = value - self.mean
+        self.mean += self.alpha * delta
+        self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+
+    def push_many(self, values: Iterable[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """값을 순서대로 넣고 시점별 평균/분산 배열을 반환합니다 (push 를 반복한 것과 같은 결과)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        initial = (self.mean, self.var) if self.started else None
+        mean, var = ewm_mean_var(values, self.alpha, initial)
+        finite = int(np.isfinite(values).sum())
+        if finite:
+            self.count += finite
+            self.started = True
+            self.mean = float(mean[-1])
+            self.var = float(var[-1])
+        return mean, var
+
+    def std(self) -> float:
+        return math.sqrt(max(self.var, 0.0))
+
+
+def finite_mean_std(values: Iterable[float], ddof: int = 1) -> Tuple[int, float, float]:
+    """NaN/Inf 를 제외한 값의 (개수, 평균, 표준편차) 를 반환합니다. 값이 ddof 개 이하이면 표준편차는 0 입니다."""
+    array = np.asarray(values, dtype=np.float64).ravel()
+    array = array[np.isfinite(array)]
+    if len(array) == 0:
+        return 0, 0.0, 0.0
+    mean = float(array.mean())
+    std = float(array.std(ddof=ddof)) if len(array) > ddof else 0.0
+    return len(array), mean, std
+
+
+class PrefixSums:
+    """
+    시계열의 누적합과 제곱 누적합. 한 번 만들어 두면 윈도우 크기마다 차분만으로 이동 평균/표준편차를 계산합니다.
+    수치 안정성을 위해 전체 평균을 뺀 값으로 누적합을 계산합니다.
+    """
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        self.n = len(values)
+        self.offset = values.mean() if self.n else 0.0
+        centered = values - self.offset
+        self.prefix_sum = np.concatenate(([0.0], np.cumsum(centered)))
+        self.prefix_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+
+    def mean_std(self, window: int, ddof: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """모든 길이 window 구간의 평균/표준편차 (rolling_mean_std 와 같은 결과)"""
+        if window <= ddof or self.n < window:
+            return np.empty(0), np.empty(0)
+        window_sum = self.prefix_sum[window:] - self.prefix_sum[:-window]
+        window_sq = self.prefix_sq[window:] - self.prefix_sq[:-window]
+
+        centered_mean = window_sum / window
+        variance = (window_sq - window * centered_mean ** 2) / (window - ddof)
+        return centered_mean + self.offset, np.sqrt(np.clip(variance, 0.0, None))
+
+
+def rolling_mean_std(values: np.ndarray, window: int, ddof: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    누적합(prefix sum)으로 모든 길이 window 구간의 평균/표준편차를 한 번에 계산합니다.
+
+    반환 배열의 k 번째 값은 values[k:k+window] 구간의 통계입니다 (길이 len(values) - window + 1).
+    여러 윈도우 크기에 대해 계산할 때는 PrefixSums 를 한 번 만들어 mean_std() 를 호출합니다.
+    """
+    return PrefixSums(values).mean_std(window, ddof)
+
+
+def ewm_mean_var(
+    values: np.ndarray,
+    alpha: float,
+    initial: Optional[Tuple[float, float]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    EWMStats 에 값을 순서대로 넣었을 때의 시점별 평균/분산을 일괄 계산합니다 (NaN 은 이전 값 유지).
+    initial=(평균, 분산) 을 주면 그 상태에서 이어서 계산하고, 없으면 첫 유효값으로 초기화합니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mean = np.full(n, np.nan)
+    var = np.full(n, np.nan)
+    finite_index = np.flatnonzero(np.isfinite(values))
+    if len(finite_index) == 0:
+        if initial is not None:
+            mean[:] = initial[0]
+            var[:] = initial[1]
+        return mean, var
+
+    x = values[finite_index]
+    decay = 1.0 - alpha
+    # 초기 상태가 없으면 첫 값이 mean_0 = x_0, var_0 = 0
+    start = 0 if initial is not None else 1
+    initial_mean, initial_var = initial if initial is not None else (x[0], 0.0)
+    # mean_t = decay * mean_{t-1} + alpha * x_t
+    m, _ = lfilter([alpha], [1.0, -decay], x[start:], zi=[decay * initial_mean])
+    finite_mean = np.concatenate((x[:start], m))
+    # var_t = decay * (var_{t-1} + alpha * (x_t - mean_{t-1})^2)
+    previous_mean = np.concatenate(([initial_mean], finite_mean[:-1]))[start:]
+    delta_sq = (x[start:] - previous_mean) ** 2
+    v, _ = lfilter([decay * alpha], [1.0, -decay], delta_sq, zi=[decay * initial_var])
+    finite_var = np.concatenate((np.zeros(start), v))
+
+    # NaN 위치는 직전 유효값의 통계를 유지 (첫 유효값 이전은 초기 상태)
+    position = np.searchsorted(finite_index, np.arange(n), side="right") - 1
+    valid = position >= 0
+    mean[valid] = finite_mean[position[valid]]
+    var[valid] = finite_var[position[valid]]
+    if initial is not None:
+        mean[~valid] = initial_mean
+        var[~valid] = initial_var
+    return mean, var
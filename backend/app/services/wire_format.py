@@ -0,0 +1,89 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+
+# 선택적 의존성: 설치되어 있지 않으면 해당 포맷 요청 시 400 오류를 반환합니다.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# format 쿼리 파라미터 검증용 정규식
+FORMAT_PATTERN = "^(json|columnar|msgpack|arrow)$"
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/json",
+    "msgpack": "application/x-msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def to_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    레코드(딕셔너리) 목록을 필드별 배열로 변환합니다.
+    필드 순서는 처음 등장한 순서를 따르며, 값이 없는 필드는 None 으로 채웁니다.
+    """
+    fields: Dict[str, None] = {}
+    for record in records:
+        for key in record:
+            fields.setdefault(key, None)
+    return {field: [record.get(field) for record in records] for field in fields}
+
+
+def encode_json(payload: Any) -> bytes:
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_payload(payload: Any, fmt: str = "json", table_key: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    응답 객체를 요청된 포맷으로 직렬화합니다.
+
+    - json: 기존 형식 그대로
+    - columnar: {"format": "columnar", "length": n, "columns": {필드: [...]}, "meta": {...}}
+      payload[table_key] 의 레코드 목록을 필드별 배열로 변환하고 나머지 항목은 meta 로 전달
+    - msgpack: columnar 구조를 MessagePack 으로 인코딩
+    - arrow: payload[table_key] 를 Arrow IPC 스트림으로 인코딩, meta 는 스키마 메타데이터("meta")에 JSON 으로 저장
+    """
+    payload = jsonable_encoder(payload)
+    if fmt == "json" or table_key is None:
+        return encode_json(payload), MEDIA_TYPES["json"]
+
+    records = payload.get(table_key) or []
+    meta = {key: value for key, value in payload.items() if key != table_key}
+    columns = to_columns(records)
+
+    if fmt == "columnar":
+        body = {"format": "columnar", "length": len(records), "columns": columns, "meta": meta}
+        return encode_json(body), MEDIA_TYPES["columnar"]
+
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise HTTPException(status_code=400, detail="msgpack format requires the 'msgpack' package")
+        body = {"format": "columnar", "length": len(records), "columns": columns, "meta": meta}
+        return msgpack.packb(body, use_bin_type=True), MEDIA_TYPES["msgpack"]
+
+    if fmt == "arrow":
+        if pa is None:
+            raise HTTPException(status_code=400, detail="arrow format requires the 'pyarrow' package")
+        table = pa.table(columns)
+        table = table.replace_schema_metadata({"meta": json.dumps(meta, ensure_ascii=False)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), MEDIA_TYPES["arrow"]
+
+    raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+
+
+def encoded_response(payload: Any, fmt: str = "json", table_key: Optional[str] = None) -> Response:
+    """encode_payload 결과를 FastAPI Response 로 반환합니다."""
+    body, media_type = encode_payload(payload, fmt, table_key)
+    return Response(content=body, media_type=media_type)
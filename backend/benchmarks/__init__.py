@@ -0,0 +1,16 @@
+"""
+백테스팅 커널 성능 벤치마크.
+
+시드가 고정된 합성 위상각/토크 시계열로 주요 백테스팅 함수의 포인트당 처리 시간,
+최대 메모리, 메모리 블록 수를 측정하고 저장된 기준값(baseline.json)과 비교합니다.
+DB 를 사용하지 않는 계산 경로만 측정하므로 Oracle 없이 로컬에서 실행할 수 있습니다.
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks                        # 기본 크기(1k, 10k, 100k) 측정 후 기준값과 비교
+    python -m benchmarks --sizes 1k,1m,10m      # 측정 크기 지정
+    python -m benchmarks --kernels ppm_value    # 특정 커널만 측정
+    python -m benchmarks --update-baseline      # 현재 결과를 기준값으로 저장
+
+기준값보다 허용 오차(--tolerance, 기본 25%, 커널별로 더 크게 지정 가능) 이상 느려지면 종료 코드 1 을 반환합니다.
+측정 잡음으로 인한 실패를 줄이기 위해 시간 회귀는 --confirm 번까지 다시 측정하여 더 빠른 결과로 판정합니다.
+"""
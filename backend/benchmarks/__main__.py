@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import sys
+
+from .data import format_size, parse_size
+from .environment import load_backtest_module
+from .kernels import KERNELS
+from .runner import compare, default_repeats, format_report, load_baseline, measure, result_key, save_baseline
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="백테스팅 커널 성능 벤치마크")
+    parser.add_argument('--sizes', default="1k,10k,100k", help='측정할 데이터 크기 목록 (예: 1k,10k,100k,1m,10m)')
+    parser.add_argument('--kernels', default=",".join(KERNELS), help=f'측정할 커널 목록 (기본값: 전체 - {", ".join(KERNELS)})')
+    parser.add_argument('--repeats', type=int, default=None, help='시간 측정 반복 횟수 (기본값: 크기에 따라 5/3/1)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='기준값 파일 경로')
+    parser.add_argument('--tolerance', type=float, default=float(os.getenv("BENCHMARK_TOLERANCE", "0.25")),
+                        help='허용 처리 시간 증가율 (기본값: 0.25 = 25%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=float(os.getenv("BENCHMARK_MEMORY_TOLERANCE", "0.25")),
+                        help='허용 최대 메모리 증가율 (기본값: 0.25 = 25%%)')
+    parser.add_argument('--confirm', type=int, default=int(os.getenv("BENCHMARK_CONFIRM", "2")),
+                        help='시간 회귀로 판정된 항목의 재측정 횟수 (기본값: 2, 0 이면 재측정 안 함)')
+    parser.add_argument('--update-baseline', action='store_true', help='측정 결과를 기준값으로 저장 (회귀 판정 안 함)')
+    parser.add_argument('--output', default=None, help='측정 결과를 JSON 파일로 저장')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    kernel_names = [name.strip() for name in args.kernels.split(",") if name.strip()]
+    unknown = [name for name in kernel_names if name not in KERNELS]
+    if unknown:
+        parser.error(f"알 수 없는 커널: {', '.join(unknown)}")
+
+    # 모듈 import 시간이 첫 측정에 포함되지 않도록 미리 불러옴
+    load_backtest_module()
+
+    results = []
+    for name in kernel_names:
+        kernel = KERNELS[name]
+        for n in sizes:
+            if n > kernel.max_points:
+                print(f"건너뜀: {name}@{format_size(n)} (최대 {format_size(kernel.max_points)})")
+                continue
+            print(f"측정 중: {name}@{format_size(n)} - {kernel.description}", flush=True)
+            results.append(measure(kernel, n, args.repeats or default_repeats(n)))
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        save_baseline(args.baseline, results, baseline)
+        print(format_report(results))
+        print(f"\n기준값을 저장했습니다: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"기준값 파일이 없습니다: {args.baseline} (--update-baseline 으로 생성)")
+    kernel_tolerances = {name: kernel.tolerance for name, kernel in KERNELS.items() if kernel.tolerance is not None}
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance, kernel_tolerances)
+    for attempt in range(1, args.confirm + 1):
+        retry = [index for index, result in enumerate(results) if "time" in result["regression"]]
+        if not retry:
+            break
+        for index in retry:
+            result = results[index]
+            print(f"재측정 {attempt}/{args.confirm}: {result_key(result['kernel'], result['points'])} "
+                  f"({result['time_ratio']:.2f}x)", flush=True)
+            again = measure(KERNELS[result["kernel"]], result["points"], args.repeats or default_repeats(result["points"]))
+            if again["ns_per_point"] < result["ns_per_point"]:
+                results[index] = again
+        regressions = compare(results, baseline, args.tolerance, args.memory_tolerance, kernel_tolerances)
+    print()
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if regressions:
+        print(f"\n성능 회귀 {len(regressions)}건 (허용 오차: 시간 {args.tolerance:.0%} 또는 커널별 limit, 메모리 {args.memory_tolerance:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+# 벤치마크 데이터는 항상 같은 시드로 생성하여 실행 간 비교가 가능하도록 합니다.
+SEED = 20240101
+
+PHASE_ANGLE_COLUMNS = ['d072', 'd077', 'd082', 'd087', 'd092', 'd097']
+
+# HANDY_ZSCORE_RAW_DATA 조회 결과와 같은 속성을 가진 행
+RawRecord = namedtuple("RawRecord", ["id", "d000", "d001"] + PHASE_ANGLE_COLUMNS + ["create_time"])
+
+
+def parse_size(text: str) -> int:
+    """'1k', '10m' 같은 크기 표기를 정수로 변환합니다."""
+    text = text.strip().lower()
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def format_size(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def torque_series(n: int, seed: int = SEED) -> np.ndarray:
+    """
+    토크 측정값 시계열. 평균 주변의 정규 잡음에 느린 드리프트와 드문 스파이크를 더합니다.
+    """
+    rng = np.random.default_rng(seed)
+    drift = 0.02 * np.sin(np.arange(n) / 5000.0)
+    values = rng.normal(0.0, 0.05, n) + drift
+    spikes = rng.random(n) < 0.002
+    values[spikes] += rng.choice([-0.3, 0.3], spikes.sum())
+    return values
+
+
+def measurement_records(n: int, seed: int = SEED) -> List[Dict]:
+    """perform_backtest_improved 입력 형식의 측정값 목록 (3개 중 1개는 allowance 없음)."""
+    values = torque_series(n, seed)
+    allowances = np.where(np.arange(n) % 3 == 0, np.nan, 0.1)
+    return [
+        {'value': value} if np.isnan(allowance) else {'value': value, 'allowance': allowance}
+        for value, allowance in zip(values.tolist(), allowances.tolist())
+    ]
+
+
+def phase_angle_matrix(n: int, seed: int = SEED) -> np.ndarray:
+    """(n, 6) 위상각 행렬. 캠별로 약간 다른 평균/산포를 가집니다."""
+    rng = np.random.default_rng(seed + 1)
+    means = np.linspace(-0.05, 0.05, len(PHASE_ANGLE_COLUMNS))
+    stds = np.linspace(0.06, 0.1, len(PHASE_ANGLE_COLUMNS))
+    return rng.normal(means, stds, size=(n, len(PHASE_ANGLE_COLUMNS)))
+
+
+def phase_angle_records(n: int, seed: int = SEED, model_name: str = "BENCH") -> List[RawRecord]:
+    """DB 원본과 같이 위상각을 문자열로 가진 조회 결과 행 목록."""
+    angles = phase_angle_matrix(n, seed)
+    start = datetime(2024, 1, 1)
+    return [
+        RawRecord(
+            i + 1, f"BC{i:09d}", model_name,
+            *(f"{value:.4f}" for value in row),
+            start + timedelta(seconds=i)
+        )
+        for i, row in enumerate(angles.tolist())
+    ]
+
+
+def ppm_series(n: int, seed: int = SEED) -> List[float]:
+    """PPM 기울기 계산 입력용 PPM 이력."""
+    rng = np.random.default_rng(seed + 2)
+    return (np.abs(np.cumsum(rng.normal(0.0, 50.0, n))) + 100.0).tolist()
@@ -0,0 +1,40 @@
+import sys
+import types
+
+
+def load_backtest_module():
+    """
+    app.api.backtest 모듈을 불러옵니다.
+
+    app.core.database 는 import 시점에 Oracle Instant Client 와 ORACLE_DATABASE_URL 이 필요합니다.
+    벤치마크는 DB 를 사용하지 않는 계산 경로만 측정하므로, Oracle 환경이 없으면
+    메모리 SQLite 엔진을 사용하는 database 모듈로 대신합니다.
+    """
+    try:
+        import app.core.database  # noqa: F401
+    except Exception as e:
+        print(f"Oracle 환경을 사용할 수 없어 메모리 SQLite 로 대신합니다: {e}")
+        sys.modules["app.core.database"] = _sqlite_database_module()
+
+    from app.api import backtest
+    return backtest
+
+
+def _sqlite_database_module() -> types.ModuleType:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import declarative_base, sessionmaker
+
+    module = types.ModuleType("app.core.database")
+    module.engine = create_engine("sqlite://")
+    module.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=module.engine)
+    module.Base = declarative_base()
+
+    def get_db():
+        db = module.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    module.get_db = get_db
+    return module
@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from . import data
+from .environment import load_backtest_module
+
+# 백테스팅 공통 파라미터 (API 기본값)
+WINDOW_SIZE = 50
+Z_THRESHOLD = 2.0
+PREDICTION_HORIZON = 10
+CHUNK_ROWS = 10000
+PPM_SLOPE_POINTS = 10
+
+
+@dataclass
+class Kernel:
+    """
+    측정 대상 함수.
+
+    setup(n) 으로 입력을 만들고(측정 제외) run(inputs) 의 실행 시간/메모리를 측정합니다.
+    max_points 보다 큰 크기는 입력 생성 자체가 과도하므로 건너뜁니다.
+    tolerance 는 이 커널의 최소 허용 시간 증가율입니다. 값마다 파이썬 객체를 만드는 커널은
+    GC/할당 시점에 따라 실행 간 편차가 커서 --tolerance 보다 크게 둡니다 (None 이면 --tolerance).
+    """
+    name: str
+    description: str
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+    max_points: int
+    tolerance: Optional[float] = None
+
+
+def _backtest_improved_setup(n: int):
+    return data.measurement_records(n)
+
+
+def _backtest_improved_run(measurements):
+    bt = load_backtest_module()
+    return bt.perform_backtest_improved(measurements, WINDOW_SIZE, Z_THRESHOLD, PREDICTION_HORIZON)
+
+
+def _backtest_arrays_setup(n: int):
+    values = data.torque_series(n)
+    allowances = np.where(np.arange(n) % 3 == 0, np.nan, 0.1)
+    return values, allowances
+
+
+def _backtest_arrays_run(inputs):
+    bt = load_backtest_module()
+    values, allowances = inputs
+    return bt.perform_backtest_arrays(values, allowances, WINDOW_SIZE, Z_THRESHOLD, PREDICTION_HORIZON)
+
+
+def _model_realtime_setup(n: int):
+    return data.phase_angle_records(n)
+
+
+def _model_realtime_run(raw_records):
+    """run_model_realtime_backtest 에서 DB 조회를 제외한 파싱/계산/집계 경로"""
+    bt = load_backtest_module()
+    params = bt.ModelBacktestParameters(
+        model_name="BENCH", window_size=WINDOW_SIZE, z_threshold=Z_THRESHOLD,
+        prediction_horizon=PREDICTION_HORIZON, max_records=len(raw_records)
+    )
+    angle_data, timestamp_data, barcode_data = bt.parse_phase_angle_records(raw_records)
+    metrics = bt.PhaseAngleMetricsAccumulator()
+    points = []
+    for point in bt.iter_phase_angle_points(angle_data, timestamp_data, barcode_data, params):
+        metrics.add(point)
+        points.append(point)
+    return points, metrics.as_dict()
+
+
+def _model_chunked_setup(n: int):
+    return data.phase_angle_matrix(n)
+
+
+def _model_chunked_run(angles):
+    """/model-realtime/chunked 의 청크 단위 롤링 계산 경로 (요약 지표만)"""
+    bt = load_backtest_module()
+    state = bt.PhaseAngleBacktestState(WINDOW_SIZE, num_columns=angles.shape[1])
+    metrics = bt.PhaseAngleMetricsAccumulator()
+    for start in range(0, len(angles), CHUNK_ROWS):
+        stats_chunk = state.process_chunk(angles[start:start + CHUNK_ROWS])
+        metrics.add_batch(np.round(stats_chunk["ppm"], 2), np.round(stats_chunk["ppm_slope"], 4))
+    return metrics.as_dict()
+
+
+def _model_chunked_t2_run(angles):
+    """/model-realtime/chunked 다변량(Hotelling T²) 모드의 청크 단위 계산 경로"""
+    bt = load_backtest_module()
+    state = bt.PhaseAngleBacktestState(WINDOW_SIZE, num_columns=angles.shape[1], t2_alpha=bt.DEFAULT_T2_ALPHA)
+    metrics = bt.PhaseAngleMetricsAccumulator()
+    for start in range(0, len(angles), CHUNK_ROWS):
+        stats_chunk = state.process_chunk(angles[start:start + CHUNK_ROWS])
+        metrics.add_batch(
+            np.round(stats_chunk["ppm"], 2), np.round(stats_chunk["ppm_slope"], 4),
+            t2_signals=stats_chunk["t2_signal"]
+        )
+    return metrics.as_dict()
+
+
+def _ppm_value_setup(n: int):
+    return data.torque_series(n).tolist()
+
+
+def _ppm_value_run(values):
+    bt = load_backtest_module()
+    return bt.calculate_predicted_ppm_value(values)
+
+
+def _ppm_slope_setup(n: int):
+    return data.ppm_series(n)
+
+
+def _ppm_slope_run(ppm_history):
+    """실제 사용 방식과 같이 최근 10개 PPM 이력마다 기울기를 계산"""
+    bt = load_backtest_module()
+    return [
+        bt.calculate_ppm_slope_value(ppm_history[i - PPM_SLOPE_POINTS:i])
+        for i in range(PPM_SLOPE_POINTS, len(ppm_history) + 1)
+    ]
+
+
+def _detector_setup(n: int):
+    return data.torque_series(n)
+
+
+def _ewma_stream_run(values):
+    """실시간 분석과 같이 측정값마다 EWMA 검출기를 O(1) 갱신"""
+    bt = load_backtest_module()
+    detector = bt.create_detector("ewma", WINDOW_SIZE)
+    return [detector.update(value) for value in values.tolist()]
+
+
+def _cusum_batch_run(values):
+    """백테스팅과 같이 CUSUM 검출기를 배열 단위로 계산"""
+    bt = load_backtest_module()
+    return bt.create_detector("cusum", WINDOW_SIZE).update_many(values)
+
+
+KERNELS: Dict[str, Kernel] = {
+    kernel.name: kernel for kernel in [
+        Kernel("backtest_improved", "perform_backtest_improved (측정값 dict 목록)",
+               _backtest_improved_setup, _backtest_improved_run, 1_000_000, tolerance=0.5),
+        Kernel("backtest_arrays", "perform_backtest_arrays (값/허용오차 배열)",
+               _backtest_arrays_setup, _backtest_arrays_run, 10_000_000),
+        Kernel("model_realtime", "run_model_realtime_backtest 파싱/계산 경로 (DB 조회 제외)",
+               _model_realtime_setup, _model_realtime_run, 1_000_000, tolerance=0.5),
+        Kernel("model_chunked", "PhaseAngleBacktestState 청크 단위 계산",
+               _model_chunked_setup, _model_chunked_run, 10_000_000),
+        Kernel("model_chunked_t2", "PhaseAngleBacktestState 청크 단위 계산 (다변량 T² 포함)",
+               _model_chunked_setup, _model_chunked_t2_run, 10_000_000),
+        Kernel("ppm_value", "calculate_predicted_ppm_value",
+               _ppm_value_setup, _ppm_value_run, 10_000_000),
+        Kernel("ppm_slope", "calculate_ppm_slope_value (최근 10개 PPM 이력마다)",
+               _ppm_slope_setup, _ppm_slope_run, 1_000_000, tolerance=0.5),
+        Kernel("ewma_stream", "EWMADetector.update (측정값마다)",
+               _detector_setup, _ewma_stream_run, 10_000_000, tolerance=0.5),
+        Kernel("cusum_batch", "CUSUMDetector.update_many (배열 단위)",
+               _detector_setup, _cusum_batch_run, 10_000_000),
+    ]
+}
@@ -0,0 +1,168 @@
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .data import format_size
+from .kernels import Kernel
+
+# 메모리 비교 시 이보다 작은 증가는 잡음으로 간주
+MEMORY_NOISE_BYTES = 1024 * 1024
+
+# 짧은 실행은 측정 잡음이 크므로 누적 실행 시간이 이 값이 될 때까지 반복 (최대 MAX_REPEATS 회)
+MIN_MEASURE_SECONDS = 0.5
+MAX_REPEATS = 50
+
+
+def result_key(kernel_name: str, n: int) -> str:
+    return f"{kernel_name}@{format_size(n)}"
+
+
+def measure(kernel: Kernel, n: int, repeats: int) -> Dict[str, Any]:
+    """
+    커널 하나를 크기 n 으로 측정합니다.
+
+    - 시간: 최소 repeats 번(누적 MIN_MEASURE_SECONDS 미만이면 더) 실행 중 가장 빠른 실행 시간 (입력 생성 제외).
+      다른 프로세스나 GC 의 영향은 실행 시간을 늘리기만 하므로 회귀 판정에는 최솟값을 쓰고, 중앙값은 편차 확인용으로 기록
+    - 메모리: 별도 1회 실행을 tracemalloc 으로 추적한 최대 사용량과,
+      실행 후 남아 있는(결과 포함) 새 메모리 블록 수
+    """
+    inputs = kernel.setup(n)
+
+    timings = []
+    while len(timings) < repeats or (sum(timings) < MIN_MEASURE_SECONDS and len(timings) < MAX_REPEATS):
+        gc.collect()
+        start = time.perf_counter()
+        result = kernel.run(inputs)
+        timings.append(time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        baseline_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = kernel.run(inputs)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        allocated_blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "filename"))
+        del result
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "kernel": kernel.name,
+        "points": n,
+        "seconds": best,
+        "ns_per_point": best / n * 1e9,
+        "median_ns_per_point": statistics.median(timings) / n * 1e9,
+        "peak_memory_bytes": peak_bytes - baseline_bytes,
+        "allocated_blocks": allocated_blocks,
+        "repeats": len(timings),
+    }
+
+
+def default_repeats(n: int) -> int:
+    """작은 입력은 여러 번 실행하여 잡음을 줄이고, 큰 입력은 한 번만 실행"""
+    if n <= 10_000:
+        return 5
+    if n <= 100_000:
+        return 3
+    return 1
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: Optional[Dict[str, Any]],
+    tolerance: float,
+    memory_tolerance: float,
+    kernel_tolerances: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    측정 결과를 기준값과 비교하여 각 결과에 비율과 회귀 여부를 기록합니다.
+    포인트당 시간이 (1 + tolerance) 배, 최대 메모리가 (1 + memory_tolerance) 배를 넘으면 회귀입니다.
+    kernel_tolerances 에 커널별 허용 시간 증가율이 있으면 tolerance 와 둘 중 큰 값을 씁니다.
+    """
+    baseline_results = (baseline or {}).get("results", {})
+    regressions = []
+    for result in results:
+        base = baseline_results.get(result_key(result["kernel"], result["points"]))
+        result["regression"] = []
+        result["tolerance"] = max(tolerance, (kernel_tolerances or {}).get(result["kernel"], tolerance))
+        if base is None:
+            result["time_ratio"] = None
+            result["memory_ratio"] = None
+            continue
+
+        result["time_ratio"] = result["ns_per_point"] / base["ns_per_point"] if base["ns_per_point"] > 0 else None
+        if result["time_ratio"] is not None and result["time_ratio"] > 1 + result["tolerance"]:
+            result["regression"].append("time")
+
+        base_memory = base.get("peak_memory_bytes", 0)
+        result["memory_ratio"] = result["peak_memory_bytes"] / base_memory if base_memory > 0 else None
+        if (
+            result["peak_memory_bytes"] > base_memory * (1 + memory_tolerance)
+            and result["peak_memory_bytes"] - base_memory > MEMORY_NOISE_BYTES
+        ):
+            result["regression"].append("memory")
+
+        if result["regression"]:
+            regressions.append(result)
+    return regressions
+
+
+def environment_info() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None):
+    """측정 결과를 기준값 파일에 저장합니다. 이번에 측정하지 않은 항목은 기존 기준값을 유지합니다."""
+    merged = dict((baseline or {}).get("results", {}))
+    for result in results:
+        merged[result_key(result["kernel"], result["points"])] = {
+            "ns_per_point": round(result["ns_per_point"], 3),
+            "peak_memory_bytes": result["peak_memory_bytes"],
+            "allocated_blocks": result["allocated_blocks"],
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment_info(), "results": dict(sorted(merged.items()))}, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    header = (
+        f"{'kernel':<20}{'size':>8}{'ns/point':>14}{'median':>14}{'peak MB':>10}{'blocks':>10}"
+        f"{'vs base':>10}{'limit':>8}  status"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        ratio = result.get("time_ratio")
+        limit = result.get("tolerance")
+        status = ",".join(result.get("regression") or []) or ("new" if ratio is None else "ok")
+        lines.append(
+            f"{result['kernel']:<20}{format_size(result['points']):>8}"
+            f"{result['ns_per_point']:>14.1f}{result['median_ns_per_point']:>14.1f}"
+            f"{result['peak_memory_bytes'] / 1024 / 1024:>10.2f}{result['allocated_blocks']:>10}"
+            f"{('-' if ratio is None else f'{ratio:.2f}x'):>10}{('-' if limit is None else f'{1 + limit:.2f}x'):>8}  {status}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.services.backtest_state import BacktestStateStore, IncrementalBacktestState
+from app.services.detectors import create_detector
+
+
+def make_state():
+    return IncrementalBacktestState(
+        window_size=20, max_points=50, detector=create_detector("ewma", 30), t2_alpha=0.01
+    )
+
+
+def test_state_file_round_trip_resumes_like_uninterrupted_run(tmp_path):
+    rng = np.random.default_rng(0)
+    angles = rng.normal(0.0, 0.05, (120, 6))
+
+    uninterrupted = make_state()
+    uninterrupted.angle_state.process_chunk(angles[:70])
+    expected = uninterrupted.angle_state.process_chunk(angles[70:])
+
+    state = make_state()
+    state.angle_state.process_chunk(angles[:70])
+    state.series.append({"timestamp": np.datetime64("2024-01-01T00:00:00").item(), "ppm": np.float64(12.5)})
+    state.last_id = 70
+    BacktestStateStore(str(tmp_path)).save("key", state)
+
+    restored = BacktestStateStore(str(tmp_path)).get("key")
+    assert restored is not None and restored is not state
+    assert restored.last_id == 70 and restored.series.maxlen == 50
+    assert list(restored.series) == [{"timestamp": state.series[0]["timestamp"], "ppm": 12.5}]
+
+    actual = restored.angle_state.process_chunk(angles[70:])
+    for field in ("mean", "std", "ppm", "ppm_slope", "drift_statistic", "t2_statistic"):
+        np.testing.assert_allclose(actual[field], expected[field], rtol=1e-12, equal_nan=True, err_msg=field)
+    np.testing.assert_array_equal(actual["drift_signal"], expected["drift_signal"])
+
+
+def test_unreadable_state_file_is_ignored(tmp_path):
+    store = BacktestStateStore(str(tmp_path))
+    store.save("key", make_state())
+    path = store._path("key")
+    with open(path, "wb") as f:
+        f.write(b"not an npz file")
+    assert BacktestStateStore(str(tmp_path)).get("key") is None
+
+
+def test_memory_only_store_keeps_recent_states():
+    store = BacktestStateStore(None, max_in_memory=1)
+    first, second = make_state(), make_state()
+    store.save("a", first)
+    store.save("b", second)
+    assert store.get("a") is None and store.get("b") is second
+    with pytest.raises(ValueError):
+        IncrementalBacktestState.from_arrays({**second.to_arrays(), "header": np.array('{"version": 0}')})
@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.detectors import create_detector, restore_detector
+
+DETECTORS = [("ewma", {"ewma_lambda": 0.2, "ewma_limit": 2.5}), ("cusum", {"cusum_k": 0.5, "cusum_h": 4.0})]
+
+
+def drifting_values(size=400, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.0, 0.05, size)
+    values[size // 2:] += 0.08  # 후반부 평균 이동 (신호가 나야 함)
+    values[[7, 60, 250]] = np.nan
+    return values
+
+
+def run_scalar(detector, values):
+    results = [detector.update(value) for value in values]
+    return np.array([statistic for statistic, _ in results]), np.array([signal for _, signal in results])
+
+
+@pytest.mark.parametrize("kind,params", DETECTORS)
+def test_update_many_matches_repeated_update(kind, params):
+    values = drifting_values()
+    scalar = create_detector(kind, 50, **params)
+    statistic, signal = run_scalar(scalar, values)
+
+    batched = create_detector(kind, 50, **params)
+    # 기준 구간 중간, 기준 구간 경계, 감시 구간에 걸친 배치로 나눠 처리
+    parts = [batched.update_many(chunk) for chunk in np.split(values, [30, 51, 52, 200])]
+    np.testing.assert_allclose(np.concatenate([part["statistic"] for part in parts]), statistic, rtol=1e-9, equal_nan=True)
+    np.testing.assert_array_equal(np.concatenate([part["signal"] for part in parts]), signal)
+
+    assert signal.any()
+    assert batched.signals == scalar.signals == int(signal.sum())
+    assert batched.count == scalar.count
+    assert batched.mean == pytest.approx(scalar.mean) and batched.std == pytest.approx(scalar.std)
+
+
+@pytest.mark.parametrize("kind,params", DETECTORS)
+def test_restored_detector_continues_identically(kind, params):
+    values = drifting_values(seed=1)
+    for split in (20, 120):  # 기준 구간 도중, 감시 구간 도중
+        original = create_detector(kind, 50, **params)
+        original.update_many(values[:split])
+        restored = restore_detector(original.export_state())
+
+        expected = original.update_many(values[split:])
+        actual = restored.update_many(values[split:])
+        np.testing.assert_allclose(actual["statistic"], expected["statistic"], rtol=1e-12, equal_nan=True)
+        assert restored.signals == original.signals
+
+
+def test_constant_baseline_is_not_monitored():
+    detector = create_detector("cusum", 10)
+    detector.update_many(np.full(10, 0.5))
+    statistic, signal = detector.update(5.0)
+    assert statistic == 0.0 and not signal
+    assert math.isnan(detector.update(float("nan"))[0])
+
+
+def test_invalid_detector_settings_raise():
+    with pytest.raises(ValueError):
+        create_detector("shewhart", 50)
+    with pytest.raises(ValueError):
+        create_detector("ewma", 50, ewma_lambda=0.0)
+    with pytest.raises(ValueError):
+        create_detector("cusum", 1)
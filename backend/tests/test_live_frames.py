@@ -0,0 +1,123 @@
+import asyncio
+
+from app.services.live_fanout import ClientChannel, FanoutHub, PendingFrame
+from app.services.live_frames import DeltaFrameEncoder, merge_frames
+
+
+def make_update(cam=1, metric="angle", ppm=100.0, mean=0.01, model="M1"):
+    return {
+        "analyzed_at": "2024-01-01T00:00:00",
+        "model_name": model,
+        "cam_number": cam,
+        "metric": metric,
+        "predicted_ppm": ppm,
+        "mean": mean
+    }
+
+
+def test_first_frame_is_keyframe_then_deltas_carry_changed_fields_only():
+    encoder = DeltaFrameEncoder(keyframe_interval=10)
+    first = encoder.next_frame([make_update(ppm=100.0, mean=0.01)])
+    assert first["keyframe"] and first["seq"] == 1
+    assert first["series"] == [{"id": "M1:1:angle", "model_name": "M1", "cam_number": 1, "metric": "angle",
+                                "predicted_ppm": 100.0, "mean": 0.01}]
+
+    delta = encoder.next_frame([make_update(ppm=120.0, mean=0.01), make_update(cam=2)])
+    assert not delta["keyframe"] and delta["seq"] == 2
+    by_id = {entry["id"]: entry for entry in delta["series"]}
+    # 값이 바뀐 필드만 (식별 필드 제외), 처음 보는 시계열은 전체 필드
+    assert by_id["M1:1:angle"] == {"id": "M1:1:angle", "predicted_ppm": 120.0}
+    assert by_id["M1:2:angle"]["model_name"] == "M1"
+
+
+def test_unchanged_tick_returns_none_without_advancing_seq():
+    encoder = DeltaFrameEncoder(keyframe_interval=10)
+    encoder.next_frame([make_update()])
+    assert encoder.next_frame([make_update()]) is None
+    assert encoder.next_frame([]) is None
+    assert encoder.next_frame([make_update(ppm=1.0)])["seq"] == 2
+
+
+def test_keyframe_interval_resends_every_series():
+    encoder = DeltaFrameEncoder(keyframe_interval=2)
+    encoder.next_frame([make_update(cam=1), make_update(cam=2)])
+    encoder.next_frame([make_update(cam=1, ppm=5.0)])
+    keyframe = encoder.next_frame([])
+    assert keyframe["keyframe"] and keyframe["seq"] == 3
+    assert {entry["id"] for entry in keyframe["series"]} == {"M1:1:angle", "M1:2:angle"}
+    assert {entry["id"]: entry["predicted_ppm"] for entry in keyframe["series"]}["M1:1:angle"] == 5.0
+
+
+def test_reset_and_snapshot_do_not_advance_seq():
+    encoder = DeltaFrameEncoder(keyframe_interval=10)
+    encoder.next_frame([make_update()])
+    snapshot = encoder.reset([make_update(ppm=7.0)])
+    assert snapshot["keyframe"] and snapshot["seq"] == 1
+    assert encoder.snapshot_frame()["series"][0]["predicted_ppm"] == 7.0
+    # 기준 값이 바뀌었으므로 같은 값은 다시 보내지 않음
+    assert encoder.next_frame([make_update(ppm=7.0)]) is None
+
+
+def test_merge_deltas_keeps_latest_fields_and_first_seq():
+    older = {"seq": 5, "keyframe": False, "series": [{"id": "a", "predicted_ppm": 1.0, "mean": 0.1}]}
+    newer = {"seq": 6, "keyframe": False, "series": [{"id": "a", "predicted_ppm": 2.0}, {"id": "b", "mean": 0.3}]}
+    merged = merge_frames(older, newer)
+    assert merged["seq"] == 6 and merged["from_seq"] == 5 and not merged["keyframe"]
+    assert {entry["id"]: entry for entry in merged["series"]} == {
+        "a": {"id": "a", "predicted_ppm": 2.0, "mean": 0.1},
+        "b": {"id": "b", "mean": 0.3}
+    }
+    # 이미 합친 프레임에 다시 합쳐도 첫 seq 유지
+    third = {"seq": 7, "keyframe": False, "series": [{"id": "b", "mean": 0.4}]}
+    assert merge_frames(merged, third)["from_seq"] == 5
+
+
+def test_merge_onto_keyframe_stays_keyframe_and_newer_keyframe_wins():
+    keyframe = {"seq": 5, "keyframe": True, "series": [{"id": "a", "predicted_ppm": 1.0}]}
+    delta = {"seq": 6, "keyframe": False, "series": [{"id": "a", "predicted_ppm": 2.0}]}
+    merged = merge_frames(keyframe, delta)
+    assert merged["keyframe"] and merged["seq"] == 6 and "from_seq" not in merged
+    assert merged["series"] == [{"id": "a", "predicted_ppm": 2.0}]
+
+    newer_keyframe = {"seq": 7, "keyframe": True, "series": [{"id": "b", "mean": 0.1}]}
+    assert merge_frames(delta, newer_keyframe) is newer_keyframe
+
+
+def test_fanout_merges_pending_frames_per_room_and_drops_oldest_room():
+    hub = FanoutHub(max_queue=2)
+    channel = hub.clients["sid"] = ClientChannel("sid", "json")
+    encoder = DeltaFrameEncoder(keyframe_interval=100)
+    frames = [encoder.next_frame([make_update(ppm=float(ppm))]) for ppm in range(3)]
+    for frame in frames:
+        hub.enqueue("sid", "cam:1", PendingFrame(frame))
+
+    item, _ = channel.pending["cam:1"]
+    assert channel.merged == 2
+    assert item.frame["seq"] == 3 and item.frame["keyframe"]
+    assert item.frame["series"][0]["predicted_ppm"] == 2.0
+
+    hub.enqueue("sid", "cam:2", PendingFrame({"seq": 1, "keyframe": True, "series": []}))
+    hub.enqueue("sid", "cam:3", PendingFrame({"seq": 1, "keyframe": True, "series": []}))
+    assert list(channel.pending) == ["cam:2", "cam:3"] and channel.dropped == 1
+
+
+def test_fanout_drops_client_when_send_raises():
+    disconnected = []
+
+    async def send(sid, payload, timeout):
+        raise RuntimeError("socket closed")
+
+    async def disconnect(sid):
+        disconnected.append(sid)
+
+    async def scenario():
+        hub = FanoutHub()
+        hub.bind(send, disconnect)
+        hub.add_client("sid", "json")
+        hub.enqueue("sid", "cam:1", PendingFrame({"seq": 1, "keyframe": True, "series": []}))
+        await asyncio.sleep(0.05)
+        return hub
+
+    hub = asyncio.run(scenario())
+    assert hub.clients["sid"].closing and hub.send_failures == 1
+    assert disconnected == ["sid"]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services.streaming_stats import EWMStats, RunningStats, SlidingWindowStats, rolling_mean_std
+
+
+def test_sliding_window_matches_rolling_mean_std():
+    rng = np.random.default_rng(0)
+    values = rng.normal(10.0, 0.5, 1000)
+    expected_mean, expected_std = rolling_mean_std(values, 50)
+
+    window = SlidingWindowStats(50)
+    means, stds = [], []
+    for value in values:
+        window.push(value)
+        if window.full:
+            means.append(window.mean)
+            stds.append(window.std(ddof=1))
+    np.testing.assert_allclose(means, expected_mean, rtol=1e-9)
+    np.testing.assert_allclose(stds, expected_std, rtol=1e-6)
+
+
+def test_sliding_window_push_many_equals_repeated_push_and_ignores_nan():
+    values = np.array([1.0, np.nan, 2.0, 4.0, np.inf, 8.0, 16.0])
+    batched = SlidingWindowStats(3)
+    batched.push_many(values)
+    scalar = SlidingWindowStats(3)
+    for value in values:
+        scalar.push(value)
+    np.testing.assert_array_equal(batched.values(), [4.0, 8.0, 16.0])
+    np.testing.assert_array_equal(batched.values(), scalar.values())
+    assert batched.mean == pytest.approx(scalar.mean) and batched.std() == pytest.approx(np.std([4.0, 8.0, 16.0], ddof=1))
+
+
+def test_running_stats_merge_equals_single_pass():
+    rng = np.random.default_rng(1)
+    left, right = rng.normal(0, 1, 300), rng.normal(3, 2, 200)
+    merged = RunningStats.from_values(left).merge(RunningStats.from_values(right))
+    both = np.concatenate([left, right])
+    assert merged.count == 500
+    assert merged.mean == pytest.approx(both.mean())
+    assert merged.std() == pytest.approx(both.std(ddof=1))
+
+
+def test_ewm_push_many_equals_repeated_push():
+    values = np.array([0.5, np.nan, -0.2, 1.3, 0.0, 2.2])
+    batched = EWMStats(alpha=0.3)
+    mean, _ = batched.push_many(values[:2])
+    batched.push_many(values[2:])
+    scalar = EWMStats(alpha=0.3)
+    for value in values:
+        scalar.push(value)
+    assert batched.count == scalar.count == 5
+    assert batched.mean == pytest.approx(scalar.mean) and batched.var == pytest.approx(scalar.var)
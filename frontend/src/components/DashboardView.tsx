@@ -10,12 +10,16 @@ import { useQueryClient } from "@tanstack/react-query";
 import { Product, ProductsResponse } from "@/hooks/useProducts";
 import { ChartDataPoint } from "@/hooks/useChartData";
 import { useSocket } from "@/hooks/useSocket"; // useSocket 훅 import
+import { useLiveAlarms } from "@/hooks/useLiveAlarms";
+import { useLiveSnapshot } from "@/hooks/useLiveSnapshot";
 
 let nextId = 6;
 
 const DashboardView: React.FC = () => {
   const queryClient = useQueryClient();
   useSocket(); // 웹소켓 연결 활성화
+  useLiveAlarms(); // 실시간 PPM/기울기 알람 토스트
+  useLiveSnapshot(); // 연결 직후 메모리의 최신 분석 상태로 차트 캐시 갱신
   const [selectedProductId, setSelectedProductId] = useState<number | null>(
     null
   );
@@ -16,6 +16,13 @@ import { useState, useEffect, memo } from "react";
 import { useChartData, ChartDataPoint } from "@/hooks/useChartData";
 import { useQueryClient } from "@tanstack/react-query";
 import { socket } from "@/lib/socket";
+import {
+  ANALYSIS_FRAME_EVENT,
+  AnalysisFrame,
+  applyAnalysisFrame,
+  subscribeRoom,
+  unsubscribeRoom,
+} from "@/lib/liveFrames";
 
 const PPM_ALARM_THRESHOLD = 500;
 const PPM_WARNING_THRESHOLD = 400;
@@ -65,24 +72,34 @@ const PpmChart = memo(function PpmChart() {
   });
 
   useEffect(() => {
-    const handleAnalysisUpdate = (newPoint: ChartDataPoint) => {
+    const handleAnalysisFrame = (frame: AnalysisFrame) => {
+      // 프레임에는 바뀐 시계열만 포함되므로 선택된 메트릭/CAM 의 값만 차트에 추가
+      const points: ChartDataPoint[] = applyAnalysisFrame(frame).filter(
+        (point) => point.metric === metric && point.cam_number === camNumber
+      );
+      if (points.length === 0) return;
+
       queryClient.setQueryData(
         ["chartData", { startDate: "", endDate: "", metric, camNumber }],
         (oldData: ChartDataPoint[] | undefined) => {
           // oldData가 없거나 배열이 아닌 경우 새로운 배열로 시작
-          if (!oldData || !Array.isArray(oldData)) return [newPoint];
+          if (!oldData || !Array.isArray(oldData)) return points;
 
           // 데이터가 너무 많아지지 않도록 100개로 제한
-          const newData = [...oldData, newPoint];
+          const newData = [...oldData, ...points];
           return newData.slice(-100);
         }
       );
     };
 
-    socket.on("analysis_updated", handleAnalysisUpdate);
+    // 선택된 CAM 의 시계열만 받도록 CAM room 구독
+    const room = `cam:${camNumber}`;
+    subscribeRoom(room);
+    socket.on(ANALYSIS_FRAME_EVENT, handleAnalysisFrame);
 
     return () => {
-      socket.off("analysis_updated", handleAnalysisUpdate);
+      socket.off(ANALYSIS_FRAME_EVENT, handleAnalysisFrame);
+      unsubscribeRoom(room);
     };
   }, [queryClient, metric, camNumber]);
 
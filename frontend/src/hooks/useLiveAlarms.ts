@@ -0,0 +1,39 @@
+import { useEffect } from "react";
+import { socket } from "@/lib/socket";
+import { useToast } from "@/components/ToastContainer";
+
+// 서버 알람 엔진이 주기마다 새로 발생한 알람을 묶어 보내는 이벤트 (backend/app/services/live_alarms.py)
+const ALARM_EVENT = "live_alarms";
+
+export interface LiveAlarm {
+  alarm_type: "ppm" | "ppm_slope";
+  level: "CAUTION" | "WARNING";
+  message: string;
+  model_name: string;
+  line_info: string | null;
+  cam_number: number;
+  metric: string;
+  value: number;
+  threshold: number;
+  consecutive: number;
+  measurement_id: number | null;
+  created_at: string;
+}
+
+/** 실시간 알람을 토스트로 표시합니다 (CAUTION: 주의, WARNING: 경고). */
+export const useLiveAlarms = () => {
+  const { showToast } = useToast();
+
+  useEffect(() => {
+    function onAlarms({ alarms }: { alarms: LiveAlarm[] }) {
+      for (const alarm of alarms) {
+        showToast(alarm.message, alarm.level === "WARNING" ? "error" : "warning");
+      }
+    }
+
+    socket.on(ALARM_EVENT, onAlarms);
+    return () => {
+      socket.off(ALARM_EVENT, onAlarms);
+    };
+  }, [showToast]);
+};
@@ -0,0 +1,53 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import { socket } from "@/lib/socket";
+import { LiveSeriesPoint } from "@/lib/liveFrames";
+import { ChartDataPoint } from "@/hooks/useChartData";
+import { ProcessDistribution } from "@/hooks/useProcessDistribution";
+import { LiveAlarm } from "@/hooks/useLiveAlarms";
+
+// 연결 직후 서버가 보내는 메모리의 최신 분석 상태 (backend/app/services/live_frames.py)
+const SNAPSHOT_EVENT = "analysis_snapshot";
+
+interface AnalysisSnapshot {
+  analyzed_at: string;
+  series: Array<LiveSeriesPoint & { last_measured_at: string | null }>;
+  distribution: Record<string, ProcessDistribution[]>;
+  alarms: LiveAlarm[];
+}
+
+/**
+ * 연결(재연결) 직후 받은 최신 상태로 분포/차트 캐시를 채웁니다.
+ * 캐시가 새 값으로 갱신되므로 재연결 시 /analysis/distribution, /analysis/history 를 다시 조회하지 않습니다.
+ */
+export const useLiveSnapshot = () => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    function onSnapshot(snapshot: AnalysisSnapshot) {
+      for (const [metric, rows] of Object.entries(snapshot.distribution)) {
+        queryClient.setQueryData(["distribution", metric], rows);
+      }
+
+      // 이력 차트는 이미 조회한 캐시에만 최신 값을 이어 붙임 (처음 여는 차트는 이력 조회가 필요)
+      for (const [queryKey, data] of queryClient.getQueriesData<ChartDataPoint[]>({
+        queryKey: ["chartData"],
+      })) {
+        const params = queryKey[1] as { metric: string; camNumber: number };
+        if (!Array.isArray(data) || !params) continue;
+        const latest = snapshot.series
+          .filter((point) => point.metric === params.metric && point.cam_number === params.camNumber)
+          .sort((a, b) => (a.last_measured_at ?? "").localeCompare(b.last_measured_at ?? ""))
+          .pop();
+        const last = data[data.length - 1];
+        if (!latest || (last && last.analyzed_at >= latest.analyzed_at)) continue;
+        queryClient.setQueryData(queryKey, [...data, latest].slice(-100));
+      }
+    }
+
+    socket.on(SNAPSHOT_EVENT, onSnapshot);
+    return () => {
+      socket.off(SNAPSHOT_EVENT, onSnapshot);
+    };
+  }, [queryClient]);
+};
@@ -0,0 +1,108 @@
+import { socket } from "@/lib/socket";
+
+// 서버가 구독 room 별로 주기마다 보내는 실시간 분석 배치 프레임 (backend/app/services/live_frames.py)
+export const ANALYSIS_FRAME_EVENT = "analysis_batch";
+const RESYNC_EVENT = "analysis_resync";
+
+export interface AnalysisFrame {
+  room: string;
+  seq: number;
+  // 전송이 밀려 여러 델타 프레임을 합친 경우 첫 프레임의 seq
+  from_seq?: number;
+  keyframe: boolean;
+  analyzed_at: string;
+  series: Array<{ id: string } & Record<string, unknown>>;
+}
+
+export interface LiveSeriesPoint {
+  analyzed_at: string;
+  model_name: string;
+  line_info: string | null;
+  cam_number: number;
+  metric: string;
+  predicted_ppm: number;
+  mean: number;
+  std_dev: number;
+  ppm_slope: number;
+}
+
+interface RoomState {
+  lastSeq: number | null;
+  resyncPending: boolean;
+  // 시계열별 마지막 전체 값 (델타 프레임을 이 값에 덮어써서 복원)
+  series: Map<string, Record<string, unknown>>;
+}
+
+const roomStates = new Map<string, RoomState>();
+// room 별 구독 수 (같은 room 을 여러 컴포넌트가 구독할 수 있음)
+const roomRefs = new Map<string, number>();
+
+/** room("model:M1", "line:L1", "cam:3") 을 구독합니다. 재연결하면 자동으로 다시 구독합니다. */
+export function subscribeRoom(room: string) {
+  const refs = roomRefs.get(room) ?? 0;
+  roomRefs.set(room, refs + 1);
+  if (refs === 0 && socket.connected) {
+    socket.emit("subscribe", { room });
+  }
+}
+
+export function unsubscribeRoom(room: string) {
+  const refs = roomRefs.get(room) ?? 0;
+  if (refs > 1) {
+    roomRefs.set(room, refs - 1);
+    return;
+  }
+  roomRefs.delete(room);
+  roomStates.delete(room);
+  if (socket.connected) {
+    socket.emit("unsubscribe", { room });
+  }
+}
+
+// 서버는 클라이언트 응답(ack)을 기준으로 전송 속도를 조절하므로 받은 프레임마다 즉시 응답
+socket.on(ANALYSIS_FRAME_EVENT, (_frame: unknown, ack?: () => void) => ack?.());
+
+socket.on("connect", () => {
+  // 새 연결에는 서버 쪽 구독 정보가 없으므로 다시 구독 (구독 시 키 프레임을 받음)
+  roomStates.clear();
+  roomRefs.forEach((_, room) => socket.emit("subscribe", { room }));
+});
+
+/**
+ * 프레임을 적용하고 이번 프레임에서 새 측정값이 반영된 시계열의 전체 값을 반환합니다.
+ * room 의 seq 가 끊기면 서버에 키 프레임을 요청하고, 키 프레임을 받을 때까지 델타 프레임은 무시합니다.
+ */
+export function applyAnalysisFrame(frame: AnalysisFrame): LiveSeriesPoint[] {
+  if (!roomRefs.has(frame.room)) return [];
+
+  let state = roomStates.get(frame.room);
+  if (!state) {
+    state = { lastSeq: null, resyncPending: false, series: new Map() };
+    roomStates.set(frame.room, state);
+  }
+
+  if (!frame.keyframe) {
+    if (state.lastSeq === null || (frame.from_seq ?? frame.seq) !== state.lastSeq + 1) {
+      state.lastSeq = null;
+      if (!state.resyncPending) {
+        state.resyncPending = true;
+        socket.emit(RESYNC_EVENT, { room: frame.room });
+      }
+      return [];
+    }
+  }
+  state.lastSeq = frame.seq;
+  state.resyncPending = false;
+
+  const points: LiveSeriesPoint[] = [];
+  for (const { id, ...fields } of frame.series) {
+    const previous = state.series.get(id);
+    const merged = { ...(frame.keyframe ? {} : previous), ...fields };
+    state.series.set(id, merged);
+    // 키 프레임에는 바뀌지 않은 시계열도 포함되므로 새 측정값이 반영된 시계열만 반환
+    if (previous?.last_measurement_id !== merged.last_measurement_id) {
+      points.push({ ...merged, analyzed_at: frame.analyzed_at } as unknown as LiveSeriesPoint);
+    }
+  }
+  return points;
+}
@@ -1,7 +1,10 @@
 import { io } from "socket.io-client";
 
 const URL = process.env.NEXT_PUBLIC_SOCKET_URL || "http://localhost:8000";
+// 여러 백엔드 워커에 sticky session 없이 접속할 때는 "websocket" 만 사용 (미지정 시 기본 polling -> websocket)
+const TRANSPORTS = process.env.NEXT_PUBLIC_SOCKET_TRANSPORTS?.split(",");
 
 export const socket = io(URL, {
   autoConnect: false,
+  transports: TRANSPORTS,
 });